@@ -0,0 +1,633 @@
+import argparse
+import concurrent.futures
+import os
+import random
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import main as game
+
+
+def time_frames(draw, frames):
+    draw(0)
+    start = time.perf_counter()
+    for frame in range(frames):
+        draw(frame)
+    return (time.perf_counter() - start) * 1000.0 / frames
+
+
+def bench_asteroids(args):
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+    camera = pygame.Vector2(game.WORLD_WIDTH / 2, game.WORLD_HEIGHT / 2)
+    half_w = game.WIDTH / (2 * game.CAMERA_ZOOM)
+    half_h = game.HEIGHT / (2 * game.CAMERA_ZOOM)
+    print(f"asteroid draw, {game.WIDTH}x{game.HEIGHT}, {args.frames} frames")
+    for count in args.counts:
+        rng = random.Random(args.seed)
+        asteroids = []
+        for _ in range(count):
+            asteroid = game.spawn_asteroid(rng, rng.choice((1, 2, 3, 4)), avoid_center=False)
+            asteroid.pos = camera + pygame.Vector2(rng.uniform(-half_w, half_w), rng.uniform(-half_h, half_h))
+            asteroids.append(asteroid)
+
+        display = game.DisplayList()
+
+        def draw(frame):
+            surface.fill(game.COLORS["bg"])
+            for asteroid in asteroids:
+                angle = asteroid.angle + asteroid.spin * frame / game.FPS
+                screen_pos = game.world_to_screen(asteroid.pos, camera)
+                game.draw_asteroid(display, screen_pos, angle, asteroid.shape, game.COLORS["asteroid"])
+            game.flush_display_list(surface, display)
+
+        for step in args.steps:
+            game.ASTEROID_ROTATION_STEP = step
+            game.ASTEROID_ROTATION_CACHE.clear()
+            ms = time_frames(draw, args.frames)
+            label = "exact" if step <= 0 else f"{step:g} deg"
+            print(
+                f"  {count:>6} asteroids  {label:>8}: {ms:8.2f} ms/frame"
+                f"  tables {len(game.ASTEROID_ROTATION_CACHE)}"
+            )
+
+
+def busy_state(seed, elites, keep_world=True):
+    # Elites, freighters and the boss placed in view of the ship, over the
+    # seed's own asteroids and enemies unless keep_world is off.
+    state, stars = game.new_game_state(seed)
+    if not keep_world:
+        state.asteroids = []
+        state.enemies = []
+    camera = state.ship_pos
+    half_w = game.WIDTH / (2 * game.CAMERA_ZOOM)
+    half_h = game.HEIGHT / (2 * game.CAMERA_ZOOM)
+    rng = random.Random(seed)
+
+    def on_screen():
+        return camera + pygame.Vector2(rng.uniform(-half_w, half_w), rng.uniform(-half_h, half_h))
+
+    for _ in range(elites):
+        enemy = game.spawn_enemy(rng, elite=True)
+        enemy.pos = on_screen()
+        enemy.pursuing = True
+        enemy.shield = 1
+        state.enemies.append(enemy)
+    for freighter in state.freighters:
+        freighter["pos"] = on_screen()
+    state.boss.pos = on_screen()
+    state.boss.vel = pygame.Vector2(1, 0)
+    return state, stars
+
+
+def turn_ships(state):
+    for enemy in state.enemies:
+        enemy.angle = (enemy.angle + 90 / game.FPS) % 360
+    for freighter in state.freighters:
+        freighter["angle"] = (freighter["angle"] + 30 / game.FPS) % 360
+    state.boss.angle = (state.boss.angle + 20 / game.FPS) % 360
+
+
+def bench_ships(args):
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+    state, stars = busy_state(args.seed, args.elites, keep_world=False)
+    quality = game.QUALITY_LEVELS[0]
+    display = game.DisplayList()
+    print(
+        f"ship sprites, {game.WIDTH}x{game.HEIGHT}, {args.elites} elites,"
+        f" {len(state.freighters)} freighters, boss, {args.frames} frames"
+    )
+
+    def draw(frame):
+        turn_ships(state)
+        game.draw_world(surface, state, stars, quality, display)
+
+    for use_sprites in (False, True):
+        game.USE_SPRITES = use_sprites
+        game.SPRITE_CACHE.clear()
+        ms = time_frames(draw, args.frames)
+        label = "sprites" if use_sprites else "lines"
+        print(f"  {label:>8}: {ms:8.2f} ms/frame  sprites cached {len(game.SPRITE_CACHE)}")
+
+
+def bench_render_scale(args):
+    print(f"world render + upscale, {args.elites} elites, {args.frames} frames")
+    fonts = {"main": pygame.font.Font(None, 24), "popup": pygame.font.Font(None, 22)}
+    zoom = game.CAMERA_ZOOM
+    for width, height in args.sizes:
+        screen = pygame.display.set_mode((width, height))
+        for scale in args.scales:
+            game.RENDER_SCALE = scale
+            game.WIDTH = max(1, round(width * scale))
+            game.HEIGHT = max(1, round(height * scale))
+            game.CAMERA_ZOOM = zoom * scale
+            game.ASTEROID_ROTATION_CACHE.clear()
+            game.SPRITE_CACHE.clear()
+            state, stars = busy_state(args.seed, args.elites)
+            world = screen if scale >= 1.0 else pygame.Surface((game.WIDTH, game.HEIGHT)).convert(screen)
+            quality = game.QUALITY_LEVELS[0]
+            display = game.DisplayList()
+
+            def draw(frame):
+                turn_ships(state)
+                game.draw_world(world, state, stars, quality, display)
+                if world is not screen:
+                    pygame.transform.scale(world, (width, height), screen)
+                game.draw_world_text(screen, state, fonts)
+
+            ms = time_frames(draw, args.frames)
+            print(f"  {width}x{height}  scale {scale:>4.2f} ({game.WIDTH}x{game.HEIGHT}): {ms:8.2f} ms/frame")
+    game.RENDER_SCALE = 1.0
+    game.CAMERA_ZOOM = zoom
+
+
+def bench_zoom(args):
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+    state, stars = busy_state(args.seed, args.elites)
+    quality = game.QUALITY_LEVELS[0]
+    display = game.DisplayList()
+    lod = (game.LOD_POINT_PX, game.LOD_SIMPLE_PX, game.LOD_PICKUP_PX)
+    zoom = game.CAMERA_ZOOM
+    print(
+        f"world draw by zoom, {game.WIDTH}x{game.HEIGHT}, {len(state.asteroids)} asteroids,"
+        f" {len(state.enemies)} enemies, {len(state.pickups)} pickups, {args.frames} frames"
+    )
+
+    def draw(frame):
+        turn_ships(state)
+        game.draw_world(surface, state, stars, quality, display)
+
+    for level in game.CAMERA_ZOOM_LEVELS:
+        game.CAMERA_ZOOM = level
+        results = []
+        for use_lod in (False, True):
+            game.LOD_POINT_PX, game.LOD_SIMPLE_PX, game.LOD_PICKUP_PX = lod if use_lod else (0, 0, 0)
+            ms = time_frames(draw, args.frames)
+            results.append(f"{ms:7.2f} ms {sum(display.counts.values()):>6} prims")
+        print(f"  zoom {level:>4.2f}  full {results[0]}  lod {results[1]}")
+    game.LOD_POINT_PX, game.LOD_SIMPLE_PX, game.LOD_PICKUP_PX = lod
+    game.CAMERA_ZOOM = zoom
+
+
+def legacy_starfield(seed, width, height):
+    rng = random.Random(seed ^ 0xA5A5A5A5)
+    surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    for _ in range(500):
+        brightness = rng.randint(35, 95)
+        size = 1 if rng.random() < 0.9 else 2
+        x = rng.randrange(0, width)
+        y = rng.randrange(0, height)
+        pygame.draw.circle(surface, (brightness, brightness, brightness), (x, y), size)
+    return {"layers": [(surface, 0.18)], "width": width, "height": height}
+
+
+def bench_starfield(args):
+    print(f"starfield blit, {args.frames} frames")
+    for width, height in args.sizes:
+        screen = pygame.display.set_mode((width, height))
+        game.WIDTH, game.HEIGHT = width, height
+        fields = (
+            ("1 layer alpha", legacy_starfield(args.seed, width, height)),
+            (f"{len(game.STAR_LAYERS)} layers key", game.generate_starfield(args.seed)),
+        )
+        for label, stars in fields:
+            tile_w = stars["width"]
+            tile_h = stars["height"]
+
+            def draw(frame):
+                screen.fill(game.COLORS["bg"])
+                ship_x = frame * 37.0
+                ship_y = frame * 23.0
+                for star_surface, parallax in stars["layers"]:
+                    offset_x = int((-ship_x * parallax) % tile_w)
+                    offset_y = int((-ship_y * parallax) % tile_h)
+                    for draw_x in (offset_x - tile_w, offset_x):
+                        for draw_y in (offset_y - tile_h, offset_y):
+                            screen.blit(star_surface, (draw_x, draw_y))
+
+            ms = time_frames(draw, args.frames)
+            print(f"  {width}x{height}  {label:>15}: {ms:8.2f} ms/frame")
+
+
+def bench_nebula(args):
+    cache_dir = tempfile.mkdtemp(prefix="nebula-")
+    game.NEBULA_CACHE_DIR = cache_dir
+    tiles = [(x, y) for x in range(4) for y in range(3)]
+    print(f"nebula tiles, {game.NEBULA_TILE_RES} px noise scaled to {game.NEBULA_TILE_SIZE} px, {len(tiles)} tiles")
+    try:
+        for label in ("generate", "disk"):
+            start = time.perf_counter()
+            for tile_x, tile_y in tiles:
+                game.load_nebula_tile(args.seed, tile_x, tile_y)
+            print(f"  {label:>8}: {(time.perf_counter() - start) * 1000.0 / len(tiles):8.2f} ms/tile (worker thread)")
+        for width, height in args.sizes:
+            screen = pygame.display.set_mode((width, height))
+            game.WIDTH, game.HEIGHT = width, height
+            ship_pos = pygame.Vector2(game.WORLD_WIDTH / 2, game.WORLD_HEIGHT / 2)
+            game.NEBULA_TILES.clear()
+            game.NEBULA_PENDING.clear()
+            game.draw_nebula(screen, args.seed, ship_pos)
+            while game.NEBULA_PENDING:
+                time.sleep(0.01)
+                game.draw_nebula(screen, args.seed, ship_pos)
+
+            def fill(frame):
+                screen.fill(game.COLORS["bg"])
+
+            def draw(frame):
+                game.draw_nebula(screen, args.seed, ship_pos)
+
+            print(
+                f"  {width}x{height}  background fill {time_frames(fill, args.frames):7.2f} ms"
+                f"  nebula tiles {time_frames(draw, args.frames):7.2f} ms"
+            )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def bench_capture(args):
+    screen = pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    state, stars = busy_state(args.seed, args.elites)
+    quality = game.QUALITY_LEVELS[0]
+    display = game.DisplayList()
+    latency = game.InputLatency()
+    print(f"frame capture, {game.WIDTH}x{game.HEIGHT}, {args.elites} elites, {game.CAPTURE_RING_SLOTS} ring slots, {args.frames} frames")
+    for capture_format in (None,) + game.CAPTURE_FORMATS:
+        directory = tempfile.mkdtemp(prefix="capture-")
+        capture = game.start_capture(screen, directory, capture_format) if capture_format else None
+
+        def draw(frame):
+            turn_ships(state)
+            game.draw_world(screen, state, stars, quality, display)
+            game.present_frame(latency, capture)
+
+        try:
+            ms = time_frames(draw, args.frames)
+            if capture:
+                game.stop_capture(capture)
+                copy_avg = capture.copy_total_ms / max(1, capture.frame - capture.dropped)
+                encode_avg = capture.encode_total_ms / max(1, capture.written)
+                print(
+                    f"  {capture_format:>4}: {ms:7.2f} ms/frame  copy {copy_avg:5.2f} ms  encode {encode_avg:6.1f} ms"
+                    f"  written {capture.written}  dropped {capture.dropped}"
+                )
+            else:
+                print(f"   off: {ms:7.2f} ms/frame")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def legacy_landmarks(seed, planet_count, moons_per_planet):
+    # The old all-pairs rejection scan, kept for comparison.
+    rng = random.Random(seed)
+    planets = []
+    moons = []
+    for _ in range(planet_count):
+        radius = rng.randint(*game.PLANET_RADIUS_RANGE)
+        for _ in range(game.PLANET_PLACE_ATTEMPTS):
+            pos = pygame.Vector2(
+                rng.uniform(radius, game.WORLD_WIDTH - radius),
+                rng.uniform(radius, game.WORLD_HEIGHT - radius),
+            )
+            if all((pos - p.pos).length() >= p.radius + radius + game.PLANET_GAP for p in planets):
+                planets.append(game.Landmark(id=len(planets), kind="planet", pos=pos, radius=radius, color=game.COLORS["planet"]))
+                break
+    for parent in planets:
+        for _ in range(moons_per_planet):
+            size = rng.randint(int(parent.radius * 0.16), int(parent.radius * 0.4))
+            min_orbit = parent.radius + size + 120
+            max_orbit = parent.radius + size + 520
+            for _ in range(game.MOON_PLACE_ATTEMPTS):
+                moon_pos = parent.pos + pygame.Vector2(rng.uniform(min_orbit, max_orbit), 0).rotate(rng.uniform(0, 360))
+                if not (size <= moon_pos.x <= game.WORLD_WIDTH - size and size <= moon_pos.y <= game.WORLD_HEIGHT - size):
+                    continue
+                if any((moon_pos - p.pos).length() < p.radius + size + game.PLANET_MOON_GAP for p in planets):
+                    continue
+                if any((moon_pos - m.pos).length() < m.radius + size + game.MOON_GAP for m in moons):
+                    continue
+                moons.append(
+                    game.Landmark(
+                        id=len(moons), kind="moon", pos=moon_pos, radius=size, color=game.COLORS["moon"], parent_id=parent.id
+                    )
+                )
+                break
+    return planets + moons
+
+
+def bench_landmarks(args):
+    print(f"landmark placement, {game.WORLD_WIDTH}x{game.WORLD_HEIGHT} world, {args.moons} moons per planet, {args.runs} seeds")
+    for count in args.counts:
+        results = []
+        for generate in (legacy_landmarks, game.generate_landmarks):
+            start = time.perf_counter()
+            for run in range(args.runs):
+                landmarks = generate(args.seed + run, count, args.moons)
+            results.append(((time.perf_counter() - start) * 1000.0 / args.runs, landmarks))
+        (legacy_ms, legacy), (placed_ms, placed) = results
+        planets, _, moons, moons_requested = game.landmark_placement(placed, count, args.moons)
+        # Poisson-disk sampling takes over from the darts at high counts, so
+        # only the grid path is expected to match the old scan.
+        if count < game.LANDMARK_POISSON_MIN_PLANETS:
+            method = "grid"
+            same = [(l.kind, l.pos, l.radius) for l in legacy] == [(l.kind, l.pos, l.radius) for l in placed]
+        else:
+            method = "poisson"
+            same = "n/a"
+        print(
+            f"  {count:>5} planets  all-pairs {legacy_ms:8.2f} ms placed {game.count_planets(legacy):>4}"
+            f"  {method} {placed_ms:7.2f} ms placed {planets}/{count} planets {moons}/{moons_requested} moons"
+            f"  identical {same}"
+        )
+
+
+def world_signature(world):
+    asteroids, pickups, enemies, landmarks, stars, freighters, boss, escorts = world
+    values = []
+    for thing in asteroids + pickups + enemies + landmarks + [boss]:
+        values.extend((thing.pos.x, thing.pos.y, getattr(thing, "angle", 0.0), getattr(thing, "radius", 0)))
+    for freighter in freighters:
+        values.extend((freighter["from"].x, freighter["to"].y, freighter["speed"], freighter["angle"]))
+    return values
+
+
+def bench_worldgen(args):
+    settings = (game.PLANET_COUNT, game.MOONS_PER_PLANET)
+    pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    start = time.perf_counter()
+    pool = game.start_world_pool(args.workers)
+    print(f"world generation, {args.workers} pool workers (started in {(time.perf_counter() - start) * 1000.0:.0f} ms), {args.runs} seeds")
+    try:
+        for planets, moons in args.settings:
+            game.PLANET_COUNT, game.MOONS_PER_PLANET = planets, moons
+            results = []
+            for use_pool in (None, pool):
+                game.WORLD_POOL = use_pool
+                game.ASTEROID_SHAPE_CACHE.clear()
+                elapsed = 0.0
+                signatures = []
+                for run in range(args.runs):
+                    world = game.new_world(args.seed + run)
+                    elapsed += game.WORLD_GEN_STATS.last_ms
+                    signatures.append(world_signature(world))
+                results.append((elapsed / args.runs, signatures))
+            (serial_ms, serial), (parallel_ms, parallel) = results
+            print(
+                f"  {planets:>4} planets x {moons} moons  serial {serial_ms:7.1f} ms"
+                f"  parallel {parallel_ms:7.1f} ms  identical {serial == parallel}"
+            )
+    finally:
+        game.WORLD_POOL = None
+        game.PLANET_COUNT, game.MOONS_PER_PLANET = settings
+        pool.shutdown()
+
+
+def bench_prefetch(args):
+    pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    print(f"new seed, {args.runs} swaps, generated in frame vs prefetched on a thread")
+    state, _ = game.new_game_state(args.seed)
+    sync_ms = []
+    for run in range(args.runs):
+        start = time.perf_counter()
+        game.reset_world(state, args.seed + run + 1)
+        sync_ms.append((time.perf_counter() - start) * 1000.0)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        prefetch = game.prefetch_world(executor, state.seed)
+        swap_ms = []
+        for _ in range(args.runs):
+            # Stands in for the time spent playing before N is pressed.
+            prefetch.job.result()
+            _, prefetch = game.swap_world(state, executor, prefetch)
+            swap_ms.append(game.WORLD_GEN_STATS.swap_ms)
+        prefetch.job.result()
+    finally:
+        executor.shutdown()
+    print(f"  in frame   avg {sum(sync_ms) / len(sync_ms):7.2f} ms  max {max(sync_ms):7.2f} ms")
+    print(f"  prefetched avg {sum(swap_ms) / len(swap_ms):7.2f} ms  max {max(swap_ms):7.2f} ms  waited {game.WORLD_GEN_STATS.swap_waits}")
+
+
+def bench_worldcache(args):
+    pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    cache_dir = tempfile.mkdtemp(prefix="worlds-")
+    game.WORLD_CACHE_DIR = cache_dir
+    game.USE_WORLD_CACHE = True
+    print(
+        f"new_world_static (what F6 and the cache use) for {args.runs} seeds, {game.WIDTH}x{game.HEIGHT}:"
+        " generated, from the disk blobs, from memory"
+    )
+    try:
+        results = []
+        for source in ("generated", "disk", "memory"):
+            if source != "memory":
+                game.WORLD_CACHE.clear()
+                game.WORLD_CACHE_STATS.bytes = 0
+            elapsed = 0.0
+            signatures = []
+            for run in range(args.runs):
+                start = time.perf_counter()
+                static = game.new_world_static(args.seed + run)
+                elapsed += (time.perf_counter() - start) * 1000.0
+                signatures.append(world_signature(([], []) + static))
+            results.append((source, elapsed / args.runs, signatures))
+        sizes = [os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)]
+        for source, ms, signatures in results:
+            print(f"  {source:<10} {ms:7.2f} ms  identical {signatures == results[0][2]}")
+        print(f"  blob {sum(sizes) / len(sizes) / 1024:.0f} KB per seed")
+    finally:
+        game.USE_WORLD_CACHE = False
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def bench_universe(args):
+    pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    quality = game.QUALITY_LEVELS[0]
+    controls = game.Controls()
+    world_size = game.WORLD_WIDTH, game.WORLD_HEIGHT
+    print(f"startup over {args.runs} seeds, then {args.sectors} sectors flown at {args.speed:.0f} px/s, {game.FPS} fps steps")
+    try:
+        for universe in (False, True):
+            if universe:
+                game.enable_universe()
+            elapsed = 0.0
+            for run in range(args.runs):
+                start = time.perf_counter()
+                state, stars = game.new_game_state(args.seed + run)
+                game.step_game(state, controls, 0.0, quality)
+                elapsed += (time.perf_counter() - start) * 1000.0
+            label = "universe" if universe else "classic"
+            print(f"  {label:<9} startup {elapsed / args.runs:7.2f} ms  landmarks {len(state.landmarks)}  pickups {len(state.pickups)}")
+        # Flying moves the ship by hand so the run does not depend on
+        # steering; each step still runs the full simulation.
+        dt = 1.0 / game.FPS
+        steps = int(args.sectors * game.SECTOR_SIZE / (args.speed * dt))
+        times = []
+        loads = []
+        for _ in range(steps):
+            state.ship_pos.x += args.speed * dt
+            state.ship_vel.update(0, 0)
+            loaded = state.universe.loaded
+            start = time.perf_counter()
+            game.step_game(state, controls, dt, quality)
+            times.append((time.perf_counter() - start) * 1000.0)
+            if state.universe.loaded != loaded:
+                loads.append(state.universe.load_ms)
+        universe = state.universe
+        print(
+            f"  flying    step avg {sum(times) / len(times):6.2f} ms  max {max(times):6.2f} ms"
+            f"  sector load avg {sum(loads) / len(loads):6.2f} max {max(loads):6.2f} ms  generated {universe.loaded}  evicted {universe.evicted}"
+        )
+    finally:
+        game.USE_UNIVERSE = False
+        game.WORLD_WIDTH, game.WORLD_HEIGHT = world_size
+
+
+def landmark_counts(text):
+    planets, moons = text.lower().split("x")
+    return int(planets), int(moons)
+
+
+def bench_rings(args):
+    surface = pygame.Surface((game.WIDTH, game.HEIGHT))
+    print(f"landmark ring draw, {game.WIDTH}x{game.HEIGHT}, visible ring {args.gap} px from the ship, {args.frames} frames")
+    display = game.DisplayList()
+    for radius in args.radii:
+        results = []
+        # One ring crossing the view and one a screen away from it, each
+        # drawn unconditionally and through draw_ring's rejection.
+        for offset in (args.gap, game.HEIGHT):
+            center = (game.WIDTH / 2, game.HEIGHT / 2 + radius + offset)
+
+            def circle(frame):
+                game.queue_draw(display, "circle", (255, 255, 255), 2, (int(center[0]), int(center[1])), radius)
+                game.flush_display_list(surface, display)
+
+            def ring(frame):
+                game.draw_ring(display, center, radius, (255, 255, 255), 2)
+                game.flush_display_list(surface, display)
+
+            results.append((time_frames(circle, args.frames), time_frames(ring, args.frames)))
+        (visible_circle, visible_ring), (off_circle, off_ring) = results
+        print(
+            f"  radius {radius:>5} px  visible: circle {visible_circle:6.3f} ms  draw_ring {visible_ring:6.3f} ms"
+            f"  off screen: circle {off_circle:6.3f} ms  draw_ring {off_ring:6.3f} ms"
+        )
+
+
+def bench_planets(args):
+    surface = pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    state, stars = game.new_game_state(args.seed)
+    state.asteroids = []
+    state.enemies = []
+    planet = next(landmark for landmark in state.landmarks if landmark.kind == "planet")
+    state.ship_pos = planet.pos + pygame.Vector2(planet.radius * 0.8, 0)
+    quality = game.QUALITY_LEVELS[0]
+    display = game.DisplayList()
+    zoom = game.CAMERA_ZOOM
+    print(f"planet impostors, {game.WIDTH}x{game.HEIGHT}, ship at the edge of a {planet.radius} px planet, {args.frames} frames")
+    for diameter in game.IMPOSTOR_BASE_DIAMETERS:
+        start = time.perf_counter()
+        game.render_impostor(args.seed, planet, diameter)
+        print(f"  render base {diameter:>5} px: {(time.perf_counter() - start) * 1000.0:8.2f} ms")
+
+    def draw(frame):
+        game.draw_world(surface, state, stars, quality, display)
+
+    for level in args.zooms:
+        game.CAMERA_ZOOM = level
+        game.USE_IMPOSTORS = False
+        rings = time_frames(draw, args.frames)
+        # The first sighting only queues the body on the worker; frames keep
+        # drawing the ring until it lands, then the steady state is timed.
+        game.USE_IMPOSTORS = True
+        start = time.perf_counter()
+        draw(0)
+        first = (time.perf_counter() - start) * 1000.0
+        while game.IMPOSTOR_PENDING:
+            time.sleep(0.005)
+            draw(0)
+        ready = (time.perf_counter() - start) * 1000.0
+        shaded = time_frames(draw, args.frames)
+        print(
+            f"  zoom {level:>4.2f}  rings {rings:7.2f} ms  shaded {shaded:7.2f} ms"
+            f"  first sighting {first:6.2f} ms  body ready after {ready:6.1f} ms"
+        )
+    print(f"  {game.describe_impostor_cache()}")
+    game.CAMERA_ZOOM = zoom
+
+
+def resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Azteroidz render benchmarks")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--frames", type=int, default=120)
+    commands = parser.add_subparsers(dest="command", required=True)
+    asteroids = commands.add_parser("asteroids", help="asteroid outline drawing, exact vs pre-rotated tables")
+    asteroids.add_argument("--counts", type=int, nargs="+", default=[1000, 10000])
+    asteroids.add_argument("--steps", type=float, nargs="+", default=[0.0, 1.0, 2.0])
+    asteroids.set_defaults(run=bench_asteroids)
+    ships = commands.add_parser("ships", help="elite enemies, freighters and boss, line path vs sprite cache")
+    ships.add_argument("--elites", type=int, default=200)
+    ships.set_defaults(run=bench_ships)
+    rings = commands.add_parser("rings", help="landmark rings, unconditional pygame circle vs draw_ring's rejection")
+    rings.add_argument("--radii", type=int, nargs="+", default=[500, 1440, 2880])
+    rings.add_argument("--gap", type=int, default=100)
+    rings.set_defaults(run=bench_rings)
+    zoom = commands.add_parser("zoom", help="world draw at every camera zoom level, with and without level of detail")
+    zoom.add_argument("--elites", type=int, default=200)
+    zoom.set_defaults(run=bench_zoom)
+    render_scale = commands.add_parser("render-scale", help="world drawn at reduced internal resolution and scaled up")
+    render_scale.add_argument("--sizes", type=resolution, nargs="+", default=[(1920, 1080), (3840, 2160)])
+    render_scale.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5])
+    render_scale.add_argument("--elites", type=int, default=200)
+    render_scale.set_defaults(run=bench_render_scale)
+    starfield = commands.add_parser("starfield", help="starfield blit, single alpha layer vs colorkeyed parallax layers")
+    starfield.add_argument("--sizes", type=resolution, nargs="+", default=[(1920, 1080), (3840, 2160)])
+    starfield.set_defaults(run=bench_starfield)
+    nebula = commands.add_parser("nebula", help="nebula tile generation vs disk cache, and per-frame blit of resident tiles")
+    nebula.add_argument("--sizes", type=resolution, nargs="+", default=[(1920, 1080), (3840, 2160)])
+    nebula.set_defaults(run=bench_nebula)
+    capture = commands.add_parser("capture", help="busy frames presented with capture off, to a raw stream and to a png sequence")
+    capture.add_argument("--elites", type=int, default=200)
+    capture.set_defaults(run=bench_capture)
+    landmarks = commands.add_parser("landmarks", help="planet and moon placement, all-pairs scan vs grid darts or Poisson-disk sampling")
+    landmarks.add_argument("--counts", type=int, nargs="+", default=[12, 50, 100, 200, 400])
+    landmarks.add_argument("--moons", type=int, default=3)
+    landmarks.add_argument("--runs", type=int, default=5)
+    landmarks.set_defaults(run=bench_landmarks)
+    worldgen = commands.add_parser("worldgen", help="new_world serial vs fanned out to a process pool, per planets x moons setting")
+    worldgen.add_argument("--settings", type=landmark_counts, nargs="+", default=[(12, 1), (50, 2), (100, 3)])
+    worldgen.add_argument("--workers", type=int, default=game.WORLD_POOL_WORKERS)
+    worldgen.add_argument("--runs", type=int, default=10)
+    worldgen.set_defaults(run=bench_worldgen)
+    prefetch = commands.add_parser("prefetch", help="new seed swap, world generated in the frame vs prefetched on a thread")
+    prefetch.add_argument("--runs", type=int, default=10)
+    prefetch.set_defaults(run=bench_prefetch)
+    worldcache = commands.add_parser("worldcache", help="new_world_static generated vs decoded from the on-disk and in-memory world cache")
+    worldcache.add_argument("--runs", type=int, default=10)
+    worldcache.set_defaults(run=bench_worldcache)
+    universe = commands.add_parser("universe", help="startup of the classic world vs the sector universe, and sector streaming while flying")
+    universe.add_argument("--runs", type=int, default=5)
+    universe.add_argument("--sectors", type=int, default=6)
+    universe.add_argument("--speed", type=float, default=4000.0)
+    universe.set_defaults(run=bench_universe)
+    planets = commands.add_parser("planets", help="shaded planet impostors, base render cost and per-frame blit vs rings only")
+    planets.add_argument("--zooms", type=float, nargs="+", default=[0.5, 0.25, 0.1])
+    planets.set_defaults(run=bench_planets)
+    args = parser.parse_args(argv)
+    # Benchmarks time the generators themselves, not replays of cached worlds.
+    game.USE_WORLD_CACHE = False
+    pygame.init()
+    args.run(args)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
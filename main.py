@@ -1,10 +1,22 @@
+import argparse
+import concurrent.futures
+import heapq
+import importlib.util
 import json
 import math
+import multiprocessing
 import os
+import queue
 import random
+import struct
 import sys
+import threading
 import time
+import zlib
+from array import array
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
+from multiprocessing import shared_memory
 from typing import Optional
 
 import pygame
@@ -75,7 +87,37 @@ WORLD_WIDTH = 80000
 WORLD_HEIGHT = 60000
 FPS = 60
 CAMERA_ZOOM = 0.5
-STAR_PARALLAX = 0.18
+CAMERA_ZOOM_LEVELS = (1.0, 0.75, 0.5, 0.35, 0.25, 0.15, 0.1, 0.06)
+CAMERA_ZOOM_DEFAULT_LEVEL = 2
+# World generation sizes view-relative things (pickup grid, initial enemies
+# kept off-screen) against this screen at the default zoom, so a seed's world
+# is the same whatever the display or the zoom it was generated at.
+WORLD_REFERENCE_RESOLUTION = (1024, 768)
+RENDER_SCALE = 1.0
+# (parallax, star count, brightness range, chance of a 1px star), far to near.
+STAR_LAYERS = (
+    (0.08, 240, (25, 60), 0.97),
+    (0.18, 180, (40, 85), 0.9),
+    (0.32, 80, (70, 110), 0.75),
+)
+STAR_COLORKEY = (0, 0, 0)
+# HUD text is antialiased against this, so it has to be close to the
+# background colour.
+HUD_COLORKEY = (0, 0, 0)
+USE_NEBULA = True
+NEBULA_PARALLAX = 0.04
+NEBULA_TILE_SIZE = 512
+NEBULA_TILE_RES = 128
+NEBULA_OCTAVES = (900, 450, 225, 110, 55)
+NEBULA_TILE_CACHE_MAX = 64
+NEBULA_UPLOADS_PER_FRAME = 2
+NEBULA_CACHE_DIR = os.path.join("cache", "nebula")
+NEBULA_VERSION = 1
+NEBULA_TILES = OrderedDict()
+NEBULA_PENDING = set()
+NEBULA_REQUESTS = queue.LifoQueue()
+NEBULA_RESULTS = queue.Queue()
+NEBULA_WORKER = None
 
 SAVE_PATH = "save.json"
 SHOOT_SOUND_PATH = os.path.join(BASE_DIR, "assets", "audio", "shoot-default.wav")
@@ -111,6 +153,37 @@ ASTEROID_SPEED = {
     1: (80, 150),
 }
 ASTEROID_SHAPE_CACHE = {}
+ASTEROID_JITTER_MAX = 1.2
+ASTEROID_ROTATION_STEP = 2.0
+ASTEROID_ROTATION_CACHE_MAX = 24576
+ASTEROID_ROTATION_CACHE = OrderedDict()
+USE_SPRITES = False
+SPRITE_HEADING_STEP = 3.0
+SPRITE_CACHE_MAX = 1024
+SPRITE_COLORKEY = (255, 0, 255)
+SPRITE_CACHE = OrderedDict()
+TEXT_CACHE_MAX = 512
+TEXT_ALPHA_LEVELS = 16
+TEXT_CACHE = OrderedDict()
+HUD_TIME_SMOOTHING = 0.1
+USE_IMPOSTORS = True
+IMPOSTOR_BASE_DIAMETERS = (96, 384, 1024)
+IMPOSTOR_MIN_DIAMETER = 6
+IMPOSTOR_MAX_DIAMETER = 4096
+IMPOSTOR_CACHE_BUDGET = 256 * 1024 * 1024
+IMPOSTOR_COLORKEY = (0, 0, 0)
+IMPOSTOR_LIGHT = (-0.45, -0.55, 0.70)
+IMPOSTOR_AMBIENT = 0.16
+IMPOSTOR_LIMB_DARKENING = 0.55
+IMPOSTOR_CACHE = OrderedDict()
+IMPOSTOR_CLOSEUP_TILE = 32
+IMPOSTOR_CLOSEUP_MAX = 2
+IMPOSTOR_CLOSEUPS = OrderedDict()
+IMPOSTOR_UPLOADS_PER_FRAME = 2
+IMPOSTOR_PENDING = set()
+IMPOSTOR_REQUESTS = queue.LifoQueue()
+IMPOSTOR_RESULTS = queue.Queue()
+IMPOSTOR_WORKER = None
 
 ASTEROID_NEARBY_TARGET = 28
 ASTEROID_NEARBY_RADIUS = 1800
@@ -147,6 +220,8 @@ ENEMY_SPAWN_BUFFER = 1800
 ENEMY_OFFSCREEN_MARGIN = 240
 ENEMY_DESPAWN_RADIUS = 5200
 ENEMY_SPAWN_INTERVAL = 3.2
+SPAWN_BURST_MAX = 6
+SPAWN_BUDGET_US = 1500
 
 BOSS_SCALE = 6.0
 BOSS_RADIUS = int(SHIP_RADIUS * BOSS_SCALE)
@@ -182,7 +257,6 @@ OBJECTIVE_ENEMIES_50 = 50
 OBJECTIVE_BOOST_50 = 50
 SOUND_NEAR_RADIUS = 600
 SOUND_FAR_RADIUS = 2400
-STAR_COUNT = 500
 FREIGHTER_COUNT = 10
 FREIGHTER_SPEED = (70, 110)
 FREIGHTER_RADIUS = SHIP_RADIUS * 5
@@ -219,6 +293,196 @@ BEACON_OFFSET_MAX = 260
 UI_PICKUP_RADIUS = 16
 UI_PICKUP_SPACING = 90
 UI_PICKUP_TOP_Y = 38
+QUALITY_SMOOTHING = 0.08
+QUALITY_DEGRADE_RATIO = 0.9
+QUALITY_RESTORE_RATIO = 0.6
+QUALITY_DEGRADE_HOLD = 0.75
+QUALITY_RESTORE_HOLD = 3.0
+ENEMY_AI_FAR_RADIUS = 1600
+ENEMY_CULL_RADIUS = SHIP_RADIUS * 5
+CULL_LABEL_MARGIN = 240
+# Level of detail by on-screen radius in px: below LOD_POINT_PX ships and
+# asteroids are single pixels, below LOD_SIMPLE_PX asteroids keep about
+# LOD_SIMPLE_VERTICES outline points, and below LOD_PICKUP_PX pickups are
+# merged into one marker per LOD_PICKUP_CELL px screen cell.
+LOD_POINT_PX = 1.5
+LOD_SIMPLE_PX = 6.0
+LOD_SIMPLE_VERTICES = 4
+LOD_PICKUP_PX = 3.0
+LOD_PICKUP_CELL = 24
+# Display list layers, flushed in this order; batching only regroups draws
+# within a layer.
+LAYER_BACKGROUND = 0
+LAYER_ENTITIES = 1
+LAYER_PLAYER = 2
+LAYER_EFFECTS = 3
+IDLE_WAIT_MS = 500
+INPUT_LATENCY_SMOOTHING = 0.1
+KEY_ACTIONS = {
+    pygame.K_ESCAPE: "quit",
+    pygame.K_F1: "toggle_debug",
+    pygame.K_F2: "toggle_god",
+    pygame.K_F3: "test_sound",
+    pygame.K_F5: "save",
+    pygame.K_F6: "load",
+    pygame.K_m: "toggle_map",
+    pygame.K_o: "toggle_objectives",
+    pygame.K_n: "new_seed",
+    pygame.K_1: "shield",
+    pygame.K_2: "boost",
+    pygame.K_3: "spread",
+    pygame.K_4: "mine",
+    pygame.K_5: "rapid",
+    pygame.K_EQUALS: "zoom_in",
+    pygame.K_PLUS: "zoom_in",
+    pygame.K_KP_PLUS: "zoom_in",
+    pygame.K_MINUS: "zoom_out",
+    pygame.K_KP_MINUS: "zoom_out",
+}
+JOY_BUTTON_ACTIONS = {
+    BTN_MAP: "toggle_map",
+    BTN_S: "shield",
+    BTN_T: "boost",
+    BTN_O: "spread",
+    BTN_L3: "mine",
+}
+INPUT_EVENT_TYPES = {
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.MOUSEMOTION,
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEWHEEL,
+    pygame.JOYAXISMOTION,
+    pygame.JOYBUTTONDOWN,
+    pygame.JOYBUTTONUP,
+    pygame.JOYHATMOTION,
+}
+SIM_IDLE_WAIT_MS = 50
+CAPTURE_RING_SLOTS = 8
+PLANET_COUNT = 12
+MOONS_PER_PLANET = 1
+PLANET_RADIUS_RANGE = (1760, 2880)
+PLANET_GAP = 1000
+PLANET_MOON_GAP = 140
+MOON_GAP = 80
+PLANET_PLACE_ATTEMPTS = 60
+MOON_PLACE_ATTEMPTS = 50
+PLANET_POISSON_CANDIDATES = 30
+PLANET_POISSON_SPREAD = 500
+LANDMARK_POISSON_MIN_PLANETS = 64
+LANDMARK_GRID_CELL = 2 * PLANET_RADIUS_RANGE[1] + PLANET_GAP
+WORLD_ASTEROID_COUNT = 120
+WORLD_POOL_WORKERS = 3
+WORLD_POOL = None
+USE_WORLD_CACHE = True
+# Bump whenever a generator's output for a given seed changes.
+WORLD_CACHE_VERSION = 4
+WORLD_CACHE_DIR = os.path.join("cache", "worlds")
+WORLD_CACHE_BUDGET = 128 * 1024 * 1024
+WORLD_CACHE_DISK_MAX = 256
+WORLD_CACHE = OrderedDict()
+WORLD_CACHE_LOCK = threading.Lock()
+WORLD_BLOB_MAGIC = b"AZWORLD\0"
+# Magic, version, settings digest, seed, escort count, then one record
+# count per section; the body is float64 records of the section widths.
+WORLD_BLOB_SECTIONS = (
+    ("landmarks", 7),
+    ("enemies", 13),
+    ("boss", 8),
+    ("patrol", 2),
+    ("freighters", 12),
+    ("stars", 5),
+)
+WORLD_BLOB_HEADER = struct.Struct(f"<8sIIqq{len(WORLD_BLOB_SECTIONS)}q")
+USE_UNIVERSE = False
+UNIVERSE_HOME_SIZE = (WORLD_WIDTH, WORLD_HEIGHT)
+UNIVERSE_SECTORS = 65536
+SECTOR_SIZE = 20000
+SECTOR_LOAD_RADIUS = 1
+SECTOR_KEEP_RADIUS = 2
+SECTOR_LOADS_PER_STEP = 1
+SECTOR_ID_STRIDE = 1 << 16
+CAPTURE_FORMATS = ("raw", "png")
+CAPTURE_PNG_LEVEL = 1
+SIM_STOP_TIMEOUT = 2.0
+SNAPSHOT_CONTROL_BYTES = 64
+SNAPSHOT_FIELDS = (
+    "frame",
+    "seed",
+    "sim_ms",
+    "score",
+    "lives",
+    "ship_x",
+    "ship_y",
+    "ship_angle",
+    "ship_vx",
+    "ship_vy",
+    "shield_time",
+    "shield_size_mult",
+    "shield_stock",
+    "rapid_time",
+    "rapid_stock",
+    "spread_time",
+    "spread_stock",
+    "mine_stock",
+    "boost_time",
+    "boost_stock",
+    "stop_thruster_timer",
+    "death_cause",
+    "enemies_destroyed",
+    "boosts_used",
+    "planet_total",
+    "flags",
+    "spawn_depth",
+    "spawn_spilled",
+    "spawn_spill_total",
+    "record_count",
+)
+SNAPSHOT_HEADER = len(SNAPSHOT_FIELDS)
+SNAPSHOT_RECORD = 8
+SNAPSHOT_MAX_RECORDS = 16384
+SNAPSHOT_PICKUP_MARGIN = 200
+SNAPSHOT_SLOT = SNAPSHOT_HEADER + SNAPSHOT_MAX_RECORDS * SNAPSHOT_RECORD
+SNAPSHOT_FLAGS = (
+    "game_over",
+    "god_mode",
+    "thrusting_render",
+    "stopping_render",
+    "strafe_left",
+    "strafe_right",
+    "escorts_alive",
+    "boss_defeated",
+)
+(
+    RECORD_ASTEROID,
+    RECORD_BULLET,
+    RECORD_ENEMY_BULLET,
+    RECORD_MINE,
+    RECORD_ENEMY,
+    RECORD_FREIGHTER,
+    RECORD_PICKUP,
+    RECORD_POPUP,
+    RECORD_SHARD,
+    RECORD_DISCOVERED,
+    RECORD_BOSS,
+) = range(11)
+DEATH_CAUSES = (None, "asteroid", "moon", "planet", "enemy bullet", "enemy ship", "boss ship")
+PICKUP_KINDS = ("shield", "spread", "mine", "boost", "rapid", "boost_canister")
+PICKUP_KIND_CODES = {kind: index for index, kind in enumerate(PICKUP_KINDS)}
+POPUP_WORDS = ("BOOST",)
+RING_CONTROL_BYTES = 64
+INPUT_RING_SLOTS = 64
+INPUT_RECORD = struct.Struct("<5id")
+CONTROL_BITS = ("thrusting", "reversing", "strafe_left", "strafe_right", "stopping", "firing")
+RING_ACTIONS = ("shield", "boost", "spread", "mine", "rapid", "toggle_god", "new_seed", "save", "load", "quit")
+QUALITY_LEVELS = [
+    {"starfield": True, "popups": 1.0, "shards": 1.0, "asteroid_step": 1, "far_ai_interval": 0.0},
+    {"starfield": True, "popups": 0.5, "shards": 1.0, "asteroid_step": 1, "far_ai_interval": 0.0},
+    {"starfield": True, "popups": 0.5, "shards": 0.5, "asteroid_step": 2, "far_ai_interval": 0.0},
+    {"starfield": True, "popups": 0.25, "shards": 0.25, "asteroid_step": 2, "far_ai_interval": 0.2},
+    {"starfield": False, "popups": 0.15, "shards": 0.15, "asteroid_step": 2, "far_ai_interval": 0.35},
+]
 
 
 COLORS = {
@@ -282,6 +546,7 @@ class Enemy:
     elite: bool = False
     escort: bool = False
     escort_offset: pygame.Vector2 = field(default_factory=pygame.Vector2)
+    ai_timer: float = 0.0
 
 
 @dataclass(slots=True)
@@ -295,6 +560,144 @@ class Boss:
     patrol_points: list
 
 
+@dataclass(slots=True)
+class SpawnQueue:
+    jobs: list = field(default_factory=list)
+    order: int = 0
+    spilled: int = 0
+    spill_total: int = 0
+    spill_mark: int = 0
+
+
+@dataclass(slots=True)
+class QualityGovernor:
+    level: int = 0
+    frame_ms: float = 0.0
+    over_time: float = 0.0
+    under_time: float = 0.0
+    pinned: bool = False
+
+
+@dataclass(slots=True)
+class InputLatency:
+    drained_at: float = 0.0
+    pending_since: Optional[float] = None
+    last_ms: float = 0.0
+    avg_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass(slots=True)
+class DisplayList:
+    batches: defaultdict = field(default_factory=lambda: defaultdict(list))
+    counts: dict = field(default_factory=dict)
+    batch_count: int = 0
+    layer: int = LAYER_BACKGROUND
+
+
+@dataclass(slots=True)
+class HudLayer:
+    surface: Optional[pygame.Surface] = None
+    key: Optional[tuple] = None
+    redraws: int = 0
+    ms: float = 0.0
+
+
+@dataclass(slots=True)
+class MapLayer:
+    surface: Optional[pygame.Surface] = None
+    key: Optional[tuple] = None
+    redraws: int = 0
+
+
+@dataclass(slots=True)
+class TextCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+TEXT_CACHE_STATS = TextCacheStats()
+
+
+@dataclass(slots=True)
+class ImpostorCacheStats:
+    bytes: int = 0
+    renders: int = 0
+    render_ms: float = 0.0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+IMPOSTOR_CACHE_STATS = ImpostorCacheStats()
+
+
+@dataclass(slots=True)
+class NebulaStats:
+    generated: int = 0
+    generate_ms: float = 0.0
+    disk_hits: int = 0
+    disk_ms: float = 0.0
+    uploads: int = 0
+    upload_ms: float = 0.0
+
+
+NEBULA_STATS = NebulaStats()
+
+
+@dataclass(slots=True)
+class WorldGenStats:
+    mode: str = "serial"
+    last_ms: float = 0.0
+    worlds: int = 0
+    swap_ms: float = 0.0
+    swap_max_ms: float = 0.0
+    swaps: int = 0
+    swap_waits: int = 0
+    # Planets placed and requested, then moons, for the world in play.
+    placement: tuple = (0, 0, 0, 0)
+
+
+@dataclass(slots=True)
+class WorldPrefetch:
+    seed: int
+    settings: tuple
+    shapes: dict
+    job: object = None
+    mode: str = ""
+    gen_ms: float = 0.0
+
+
+@dataclass(slots=True)
+class WorldCacheStats:
+    bytes: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+    load_ms: float = 0.0
+
+
+WORLD_CACHE_STATS = WorldCacheStats()
+
+
+@dataclass(slots=True)
+class Universe:
+    sectors: dict = field(default_factory=dict)
+    diffs: dict = field(default_factory=dict)
+    pending: list = field(default_factory=list)
+    center: Optional[tuple] = None
+    planets_seen: set = field(default_factory=set)
+    loaded: int = 0
+    evicted: int = 0
+    load_ms: float = 0.0
+
+
+WORLD_GEN_STATS = WorldGenStats()
+
+
 @dataclass(slots=True)
 class Landmark:
     id: int
@@ -305,6 +708,114 @@ class Landmark:
     parent_id: Optional[int] = None
 
 
+@dataclass(slots=True)
+class Controls:
+    turn: int = 0
+    thrusting: bool = False
+    reversing: bool = False
+    strafe_left: bool = False
+    strafe_right: bool = False
+    stopping: bool = False
+    firing: bool = False
+
+
+@dataclass(slots=True)
+class GameState:
+    seed: int
+    asteroids: list
+    pickups: list
+    enemies: list
+    landmarks: list
+    freighters: list
+    boss: Optional[Boss]
+    boss_escorts: list
+    planet_total: int
+    ship_pos: pygame.Vector2 = field(default_factory=lambda: pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2))
+    ship_vel: pygame.Vector2 = field(default_factory=pygame.Vector2)
+    ship_angle: float = -90
+    bullets: list = field(default_factory=list)
+    enemy_bullets: list = field(default_factory=list)
+    bullet_pool: list = field(default_factory=list)
+    enemy_bullet_pool: list = field(default_factory=list)
+    damage_popups: list = field(default_factory=list)
+    damage_popup_pool: list = field(default_factory=list)
+    beacons: dict = field(default_factory=dict)
+    enemy_shards: list = field(default_factory=list)
+    enemy_shard_pool: list = field(default_factory=list)
+    mines: list = field(default_factory=list)
+    fire_timer: float = 0.0
+    player_attack_timer: float = 0.0
+    enemies_destroyed: int = 0
+    boosts_used: int = 0
+    boss_defeated: bool = False
+    score: int = 0
+    lives: int = 3
+    game_over: bool = False
+    last_death_cause: Optional[str] = None
+    shield_time: float = 10.0
+    shield_size_mult: float = 3.0
+    shield_stock: int = 0
+    rapid_time: float = 0.0
+    rapid_stock: int = 0
+    spread_time: float = 0.0
+    spread_stock: int = 0
+    mine_stock: int = 0
+    boost_time: float = 0.0
+    boost_stock: int = 0
+    mine_cooldown: float = 0.0
+    asteroid_spawn_timer: float = 0.0
+    enemy_spawn_timer: float = 0.0
+    spawn_queue: SpawnQueue = field(default_factory=SpawnQueue)
+    thrusting_render: bool = False
+    stopping_render: bool = False
+    stop_thruster_timer: float = 0.0
+    stop_thruster_held: bool = False
+    stop_thruster_side: str = "both"
+    strafe_left: bool = False
+    strafe_right: bool = False
+    discovered_planets: set = field(default_factory=set)
+    god_mode: bool = False
+    escorts_alerted: bool = False
+    escorts_alive: bool = False
+    sound_events: list = field(default_factory=list)
+    universe: Optional[Universe] = None
+    landmark_grid: dict = field(default_factory=dict)
+    landmark_grid_source: Optional[list] = None
+
+
+@dataclass(slots=True)
+class SimLink:
+    process: object
+    snapshot_memory: object
+    ring_memory: object
+    snapshot_control: memoryview
+    snapshot_data: memoryview
+    ring_control: memoryview
+    ring_data: memoryview
+    events: object
+    pending_actions: int = 0
+    frame: int = 0
+    sim_ms: float = 0.0
+
+
+@dataclass(slots=True)
+class Capture:
+    directory: str
+    format: str
+    width: int
+    height: int
+    free: object
+    filled: object
+    worker: object = None
+    frame: int = 0
+    written: int = 0
+    dropped: int = 0
+    copy_ms: float = 0.0
+    copy_max_ms: float = 0.0
+    copy_total_ms: float = 0.0
+    encode_total_ms: float = 0.0
+
+
 def wrap_position(pos):
     return pygame.Vector2(pos.x % WORLD_WIDTH, pos.y % WORLD_HEIGHT)
 
@@ -326,6 +837,86 @@ def world_to_screen_parallax(world_pos, camera_pos, parallax):
     return pygame.Vector2(WIDTH / 2, HEIGHT / 2) + delta * parallax
 
 
+def view_rect(camera_pos):
+    half_w = WIDTH / (2 * CAMERA_ZOOM)
+    half_h = HEIGHT / (2 * CAMERA_ZOOM)
+    return (camera_pos.x - half_w, camera_pos.y - half_h, camera_pos.x + half_w, camera_pos.y + half_h)
+
+
+def in_view(view, pos, radius):
+    return view[0] - radius <= pos.x <= view[2] + radius and view[1] - radius <= pos.y <= view[3] + radius
+
+
+def queue_draw(display, kind, color, width, *args):
+    display.batches[display.layer, kind, color, width].append(args)
+
+
+def flush_display_list(surface, display):
+    # Layers are flushed in order. Within a layer, batches are submitted in
+    # the order their (kind, color, width) key was first queued, so draws
+    # only reorder across different keys of the same layer.
+    counts = {}
+    for (_, kind, color, width), batch in sorted(display.batches.items(), key=lambda item: item[0][0]):
+        if kind == "lines":
+            for closed, points in batch:
+                pygame.draw.lines(surface, color, closed, points, width)
+        elif kind == "outline":
+            # Shared vertex tables are offset only at submission, so the
+            # absolute point lists never outlive their draw call.
+            for vertices, x0, y0 in batch:
+                pygame.draw.lines(surface, color, True, [(x0 + x, y0 + y) for x, y in vertices], width)
+        elif kind == "line":
+            for start, end in batch:
+                pygame.draw.line(surface, color, start, end, width)
+        elif kind == "circle":
+            for center, radius in batch:
+                pygame.draw.circle(surface, color, center, radius, width)
+        elif kind == "polygon":
+            for (points,) in batch:
+                pygame.draw.polygon(surface, color, points, width)
+        elif kind == "rect":
+            for (rect,) in batch:
+                pygame.draw.rect(surface, color, rect, width)
+        elif kind == "point":
+            for (point,) in batch:
+                surface.set_at(point, color)
+        elif kind == "blit":
+            surface.blits(batch, doreturn=False)
+        counts[kind] = counts.get(kind, 0) + len(batch)
+    display.counts = counts
+    display.batch_count = len(display.batches)
+    display.batches.clear()
+    display.layer = LAYER_BACKGROUND
+
+
+def describe_display_list(display):
+    kinds = "  ".join(f"{kind} {count}" for kind, count in sorted(display.counts.items()))
+    return f"Draw List: {display.batch_count} batches  {kinds or '-'}"
+
+
+def draw_ring(display, center, radius, color, width):
+    # Rings that miss the display, or enclose all of it, are rejected
+    # outright. Visible rings go to pygame whole: at the radii any zoom
+    # reaches (up to 2880 px) a full circle is never slower than a clipped
+    # arc polyline.
+    cx, cy = center
+    pad = width + 1
+    x0 = -pad
+    y0 = -pad
+    x1 = WIDTH + pad
+    y1 = HEIGHT + pad
+    near_x = min(max(cx, x0), x1) - cx
+    near_y = min(max(cy, y0), y1) - cy
+    if near_x * near_x + near_y * near_y > (radius + width) ** 2:
+        return False
+    far_x = max(cx - x0, x1 - cx)
+    far_y = max(cy - y0, y1 - cy)
+    if far_x * far_x + far_y * far_y < (radius - width) ** 2:
+        return False
+    queue_draw(display, "circle", color, width, (int(cx), int(cy)), max(1, int(radius)))
+    return True
+
+
 def toroidal_delta_world(a, b):
     dx = b.x - a.x
     dy = b.y - a.y
@@ -358,23 +949,24 @@ def turn_towards(current, target, max_turn):
     return target
 
 
-def spawn_damage_popup(popups, pool, font, text, world_pos, color):
-    if len(popups) >= DAMAGE_POPUP_MAX:
+def spawn_damage_popup(popups, pool, text, world_pos, color, limit=DAMAGE_POPUP_MAX):
+    if len(popups) >= limit:
         return
-    surface = font.render(text, True, color)
     drift = pygame.Vector2(random.uniform(-20, 20), -DAMAGE_POPUP_SPEED)
     if pool:
         popup = pool.pop()
         popup["pos"].update(world_pos)
         popup["vel"].update(drift)
         popup["ttl"] = DAMAGE_POPUP_TTL
-        popup["surface"] = surface
+        popup["text"] = text
+        popup["color"] = color
     else:
         popup = {
             "pos": pygame.Vector2(world_pos),
             "vel": drift,
             "ttl": DAMAGE_POPUP_TTL,
-            "surface": surface,
+            "text": text,
+            "color": color,
         }
     popups.append(popup)
 
@@ -402,19 +994,19 @@ def scale_color(color, alpha):
     )
 
 
-def draw_beacon(surface, pos, color):
+def draw_beacon(display, pos, color):
     size = 12
     ring = []
     for i in range(6):
         angle = math.radians(60 * i + 30)
         ring.append((pos.x + math.cos(angle) * size, pos.y + math.sin(angle) * size))
-    pygame.draw.polygon(surface, color, ring, 2)
-    pygame.draw.circle(surface, color, (int(pos.x), int(pos.y)), 4, 1)
-    pygame.draw.line(surface, color, (pos.x, pos.y - size - 6), (pos.x, pos.y + size + 6), 1)
+    queue_draw(display, "polygon", color, 2, ring)
+    queue_draw(display, "circle", color, 1, (int(pos.x), int(pos.y)), 4)
+    queue_draw(display, "line", color, 1, (pos.x, pos.y - size - 6), (pos.x, pos.y + size + 6))
 
 
-def spawn_enemy_shards(shards, pool, pos, angle, color=COLORS["enemy"]):
-    if len(shards) >= ENEMY_SHARD_MAX:
+def spawn_enemy_shards(shards, pool, pos, angle, color=COLORS["enemy"], limit=ENEMY_SHARD_MAX):
+    if len(shards) >= limit:
         return
     base = [
         pygame.Vector2(10, 0).rotate(angle),
@@ -443,6 +1035,226 @@ def spawn_enemy_shards(shards, pool, pos, angle, color=COLORS["enemy"]):
         shards.append(shard)
 
 
+def update_quality(governor, work_ms, dt):
+    governor.frame_ms += (work_ms - governor.frame_ms) * QUALITY_SMOOTHING
+    if governor.pinned:
+        return False
+    budget_ms = 1000.0 / FPS
+    if governor.frame_ms > budget_ms * QUALITY_DEGRADE_RATIO:
+        governor.over_time += dt
+        governor.under_time = 0.0
+    elif governor.frame_ms < budget_ms * QUALITY_RESTORE_RATIO:
+        governor.under_time += dt
+        governor.over_time = 0.0
+    else:
+        governor.over_time = 0.0
+        governor.under_time = 0.0
+    if governor.over_time >= QUALITY_DEGRADE_HOLD and governor.level < len(QUALITY_LEVELS) - 1:
+        governor.level += 1
+        governor.over_time = 0.0
+        return True
+    if governor.under_time >= QUALITY_RESTORE_HOLD and governor.level > 0:
+        governor.level -= 1
+        governor.under_time = 0.0
+        return True
+    return False
+
+
+def describe_quality(knobs):
+    parts = []
+    if not knobs["starfield"]:
+        parts.append("stars off")
+    if knobs["popups"] < 1.0:
+        parts.append(f"popups {knobs['popups']:.0%}")
+    if knobs["shards"] < 1.0:
+        parts.append(f"shards {knobs['shards']:.0%}")
+    if knobs["asteroid_step"] > 1:
+        parts.append(f"asteroid outline 1/{knobs['asteroid_step']}")
+    if knobs["far_ai_interval"] > 0:
+        parts.append(f"far AI {1.0 / knobs['far_ai_interval']:.0f} Hz")
+    return ", ".join(parts) if parts else "full"
+
+
+def handle_quit_event(event):
+    return "quit"
+
+
+def handle_key_event(event):
+    return KEY_ACTIONS.get(event.key)
+
+
+def handle_joy_button_event(event):
+    return JOY_BUTTON_ACTIONS.get(event.button)
+
+
+def handle_window_event(event):
+    return "redraw"
+
+
+def handle_mouse_wheel_event(event):
+    if event.y > 0:
+        return "zoom_in"
+    if event.y < 0:
+        return "zoom_out"
+    return None
+
+
+EVENT_HANDLERS = {
+    pygame.QUIT: handle_quit_event,
+    pygame.KEYDOWN: handle_key_event,
+    pygame.JOYBUTTONDOWN: handle_joy_button_event,
+    pygame.MOUSEWHEEL: handle_mouse_wheel_event,
+    pygame.WINDOWEXPOSED: handle_window_event,
+    pygame.WINDOWRESTORED: handle_window_event,
+    pygame.WINDOWSIZECHANGED: handle_window_event,
+}
+
+
+def poll_actions(latency):
+    # Drain the whole SDL queue once per frame. Events carry no arrival time,
+    # so the oldest input in a batch is bounded by the previous drain.
+    drained_at = time.perf_counter()
+    actions = []
+    for event in pygame.event.get():
+        if event.type in INPUT_EVENT_TYPES and latency.pending_since is None:
+            latency.pending_since = latency.drained_at
+        handler = EVENT_HANDLERS.get(event.type)
+        if handler is not None:
+            action = handler(event)
+            if action:
+                actions.append(action)
+    latency.drained_at = drained_at
+    return actions
+
+
+def present_frame(latency, capture=None):
+    pygame.display.flip()
+    if latency.pending_since is not None:
+        latency.last_ms = (time.perf_counter() - latency.pending_since) * 1000.0
+        latency.avg_ms += (latency.last_ms - latency.avg_ms) * INPUT_LATENCY_SMOOTHING
+        latency.max_ms = max(latency.max_ms, latency.last_ms)
+        latency.pending_since = None
+    if capture:
+        capture_frame(capture, pygame.display.get_surface())
+
+
+def start_capture(screen, directory, capture_format):
+    # A fixed ring of screen-format surfaces: the frame loop only copies
+    # into a free one, the writer thread encodes and hands it back.
+    os.makedirs(directory, exist_ok=True)
+    width, height = screen.get_size()
+    capture = Capture(
+        directory=directory,
+        format=capture_format,
+        width=width,
+        height=height,
+        free=queue.Queue(),
+        filled=queue.Queue(),
+    )
+    for _ in range(CAPTURE_RING_SLOTS):
+        capture.free.put(pygame.Surface((width, height), 0, screen))
+    capture.worker = threading.Thread(target=run_capture_worker, args=(capture,), name="capture")
+    capture.worker.start()
+    return capture
+
+
+def capture_frame(capture, screen):
+    start = time.perf_counter()
+    capture.frame += 1
+    try:
+        slot = capture.free.get_nowait()
+    except queue.Empty:
+        # The writer is behind; dropping keeps the frame loop from stalling.
+        capture.dropped += 1
+        return
+    slot.blit(screen, (0, 0))
+    capture.filled.put((capture.frame, slot))
+    capture.copy_ms = (time.perf_counter() - start) * 1000.0
+    capture.copy_max_ms = max(capture.copy_max_ms, capture.copy_ms)
+    capture.copy_total_ms += capture.copy_ms
+
+
+def write_png(path, width, height, rgb):
+    # pygame.image.save holds the GIL for the whole encode; zlib releases it,
+    # so the frame loop keeps running while the writer compresses.
+    stride = width * 3
+    scanlines = b"".join(b"\0" + rgb[row:row + stride] for row in range(0, stride * height, stride))
+
+    def chunk(tag, body):
+        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(scanlines, CAPTURE_PNG_LEVEL)))
+        f.write(chunk(b"IEND", b""))
+
+
+def run_capture_worker(capture):
+    stream = None
+    if capture.format == "raw":
+        stream = open(os.path.join(capture.directory, "capture.rgb"), "wb")
+    try:
+        while True:
+            item = capture.filled.get()
+            if item is None:
+                break
+            frame, slot = item
+            start = time.perf_counter()
+            rgb = pygame.image.tobytes(slot, "RGB")
+            if stream:
+                stream.write(rgb)
+            else:
+                write_png(os.path.join(capture.directory, f"frame_{frame:06d}.png"), capture.width, capture.height, rgb)
+            capture.encode_total_ms += (time.perf_counter() - start) * 1000.0
+            capture.written += 1
+            capture.free.put(slot)
+    finally:
+        if stream:
+            stream.close()
+
+
+def stop_capture(capture):
+    capture.filled.put(None)
+    capture.worker.join()
+    info = {
+        "format": capture.format,
+        "width": capture.width,
+        "height": capture.height,
+        "fps": FPS,
+        "frames": capture.frame,
+        "written": capture.written,
+        "dropped": capture.dropped,
+        "copy_ms_avg": round(capture.copy_total_ms / max(1, capture.frame - capture.dropped), 3),
+        "copy_ms_max": round(capture.copy_max_ms, 3),
+        "encode_ms_avg": round(capture.encode_total_ms / max(1, capture.written), 3),
+    }
+    if capture.format == "raw":
+        info["pixel_format"] = "rgb24"
+    with open(os.path.join(capture.directory, "capture.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+
+
+def describe_capture(capture):
+    encode_avg = capture.encode_total_ms / capture.written if capture.written else 0.0
+    return (
+        f"Capture: {capture.format} written {capture.written}  dropped {capture.dropped}"
+        f"  queued {capture.filled.qsize()}  copy {capture.copy_ms:.2f} ms (max {capture.copy_max_ms:.2f})"
+        f"  encode {encode_avg:.1f} ms"
+    )
+
+
+def wait_for_input(clock, latency, timeout_ms=IDLE_WAIT_MS):
+    # Block instead of ticking while a static screen is up. The event is put
+    # back for the next drain, and the clock is reset so the next frame does
+    # not see the blocked time as one huge dt.
+    event = pygame.event.wait(timeout_ms)
+    if event.type != pygame.NOEVENT:
+        pygame.event.post(event)
+    latency.drained_at = time.perf_counter()
+    clock.tick()
+
+
 def seed_from_time():
     return int(time.time()) & 0xFFFFFFFF
 
@@ -452,21 +1264,21 @@ def make_asteroid_shape(rng, radius):
     count = rng.randint(8, 13)
     for i in range(count):
         angle = (math.tau / count) * i
-        jitter = rng.uniform(0.65, 1.2)
+        jitter = rng.uniform(0.65, ASTEROID_JITTER_MAX)
         r = radius * jitter
         points.append((math.cos(angle) * r, math.sin(angle) * r))
     return points
 
 
-def get_asteroid_shape(rng, radius):
-    cached = ASTEROID_SHAPE_CACHE.get(radius)
+def get_asteroid_shape(rng, radius, shapes=ASTEROID_SHAPE_CACHE):
+    cached = shapes.get(radius)
     if cached is None:
         cached = make_asteroid_shape(rng, radius)
-        ASTEROID_SHAPE_CACHE[radius] = cached
+        shapes[radius] = cached
     return cached
 
 
-def spawn_asteroid(rng, size, avoid_center=True):
+def spawn_asteroid(rng, size, avoid_center=True, shapes=ASTEROID_SHAPE_CACHE):
     radius = int(ASTEROID_SIZES[size] * rng.uniform(0.75, 1.35))
     if avoid_center:
         while True:
@@ -479,7 +1291,7 @@ def spawn_asteroid(rng, size, avoid_center=True):
     speed_min, speed_max = ASTEROID_SPEED[size]
     velocity = angle_to_vector(rng.uniform(0, 360)) * rng.uniform(speed_min, speed_max)
     spin = rng.uniform(-40, 40)
-    shape = get_asteroid_shape(rng, radius)
+    shape = get_asteroid_shape(rng, radius, shapes)
     return Asteroid(
         pos=pos,
         vel=velocity,
@@ -491,12 +1303,31 @@ def spawn_asteroid(rng, size, avoid_center=True):
     )
 
 
+def view_size():
+    return WIDTH / CAMERA_ZOOM, HEIGHT / CAMERA_ZOOM
+
+
+def reference_view_size():
+    zoom = CAMERA_ZOOM_LEVELS[CAMERA_ZOOM_DEFAULT_LEVEL]
+    return WORLD_REFERENCE_RESOLUTION[0] / zoom, WORLD_REFERENCE_RESOLUTION[1] / zoom
+
+
+def spawn_ring_radius(base_radius, margin, buffer, view=None):
+    # The spawn ring grows with the view so that, zoomed out, there is still
+    # room outside the exclusion rectangle to place things unseen.
+    view_w, view_h = view or view_size()
+    half_w = view_w / 2 + margin
+    half_h = view_h / 2 + margin
+    return max(base_radius, math.hypot(half_w, half_h) + buffer)
+
+
 def spawn_asteroid_near(rng, size, center):
     radius = ASTEROID_SIZES[size]
     view_half_w = WIDTH / (2 * CAMERA_ZOOM) + ASTEROID_OFFSCREEN_MARGIN
     view_half_h = HEIGHT / (2 * CAMERA_ZOOM) + ASTEROID_OFFSCREEN_MARGIN
+    spawn_radius = spawn_ring_radius(ASTEROID_SPAWN_RADIUS, ASTEROID_OFFSCREEN_MARGIN, ASTEROID_SPAWN_BUFFER)
     for _ in range(60):
-        offset = pygame.Vector2(rng.uniform(ASTEROID_SPAWN_BUFFER, ASTEROID_SPAWN_RADIUS), 0).rotate(
+        offset = pygame.Vector2(rng.uniform(ASTEROID_SPAWN_BUFFER, spawn_radius), 0).rotate(
             rng.uniform(0, 360)
         )
         pos = center + offset
@@ -508,7 +1339,7 @@ def spawn_asteroid_near(rng, size, center):
         asteroid.pos = pos
         return asteroid
     asteroid = spawn_asteroid(rng, size, avoid_center=False)
-    asteroid.pos = center + pygame.Vector2(ASTEROID_SPAWN_RADIUS, 0)
+    asteroid.pos = center + pygame.Vector2(spawn_radius, 0)
     return asteroid
 
 
@@ -544,19 +1375,34 @@ def enemy_spawn_clear(pos, landmarks, radius=ENEMY_RADIUS):
     return True
 
 
+def home_bounds():
+    # The classic world. In universe mode it sits in the middle of the
+    # universe and keeps the boss patrol and the elite bands.
+    width, height = UNIVERSE_HOME_SIZE
+    left = (WORLD_WIDTH - width) / 2
+    top = (WORLD_HEIGHT - height) / 2
+    return left, top, left + width, top + height
+
+
+def in_elite_band(x):
+    left, _, right, _ = home_bounds()
+    band = (right - left) * ELITE_ENEMY_OUTER_BAND_FRAC
+    return x <= left + band or x >= right - band
+
+
 def elite_spawn_chance(center_x):
-    band = WORLD_WIDTH * ELITE_ENEMY_OUTER_BAND_FRAC
-    if center_x <= band or center_x >= WORLD_WIDTH - band:
+    if in_elite_band(center_x):
         return ELITE_ENEMY_OUTER_CHANCE
     return 0.0
 
 
-def spawn_enemy_near(rng, center, landmarks, elite=False):
-    view_half_w = WIDTH / (2 * CAMERA_ZOOM) + ENEMY_OFFSCREEN_MARGIN
-    view_half_h = HEIGHT / (2 * CAMERA_ZOOM) + ENEMY_OFFSCREEN_MARGIN
-    band = WORLD_WIDTH * ELITE_ENEMY_OUTER_BAND_FRAC
+def spawn_enemy_near(rng, center, landmarks, elite=False, view=None):
+    view_w, view_h = view or view_size()
+    view_half_w = view_w / 2 + ENEMY_OFFSCREEN_MARGIN
+    view_half_h = view_h / 2 + ENEMY_OFFSCREEN_MARGIN
+    spawn_radius = spawn_ring_radius(ENEMY_SPAWN_RADIUS, ENEMY_OFFSCREEN_MARGIN, ENEMY_SPAWN_BUFFER, view)
     for _ in range(60):
-        offset = pygame.Vector2(rng.uniform(ENEMY_SPAWN_BUFFER, ENEMY_SPAWN_RADIUS), 0).rotate(
+        offset = pygame.Vector2(rng.uniform(ENEMY_SPAWN_BUFFER, spawn_radius), 0).rotate(
             rng.uniform(0, 360)
         )
         pos = center + offset
@@ -564,7 +1410,7 @@ def spawn_enemy_near(rng, center, landmarks, elite=False):
             continue
         if abs(pos.x - center.x) < view_half_w and abs(pos.y - center.y) < view_half_h:
             continue
-        if elite and not (pos.x <= band or pos.x >= WORLD_WIDTH - band):
+        if elite and not in_elite_band(pos.x):
             continue
         radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if elite else 1.0)
         if not enemy_spawn_clear(pos, landmarks, radius):
@@ -576,7 +1422,7 @@ def spawn_enemy_near(rng, center, landmarks, elite=False):
     for _ in range(60):
         pos = pygame.Vector2(rng.uniform(0, WORLD_WIDTH), rng.uniform(0, WORLD_HEIGHT))
         radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if elite else 1.0)
-        if elite and not (pos.x <= band or pos.x >= WORLD_WIDTH - band):
+        if elite and not in_elite_band(pos.x):
             continue
         if enemy_spawn_clear(pos, landmarks, radius):
             enemy.pos = pos
@@ -586,16 +1432,53 @@ def spawn_enemy_near(rng, center, landmarks, elite=False):
     return enemy
 
 
+def queue_spawns(queue, kind, count, priority, rng):
+    for _ in range(count):
+        heapq.heappush(queue.jobs, (priority, queue.order, kind, rng))
+        queue.order += 1
+
+
+def pending_spawns(queue, kind):
+    return sum(1 for job in queue.jobs if job[2] == kind)
+
+
+def run_spawn_queue(queue, center, landmarks, asteroids, enemies, budget_us=SPAWN_BUDGET_US):
+    # Always place at least one job so the queue drains even when a single
+    # placement overruns the budget; the rest spills into later frames.
+    deadline = time.perf_counter() + budget_us / 1_000_000
+    spawned = 0
+    while queue.jobs:
+        if spawned and time.perf_counter() >= deadline:
+            break
+        _, _, kind, rng = heapq.heappop(queue.jobs)
+        if kind == "enemy":
+            chance = elite_spawn_chance(center.x)
+            enemies.append(spawn_enemy_near(rng, center, landmarks, elite=rng.random() < chance))
+        else:
+            size = 4 if rng.random() < 0.12 else 3
+            asteroids.append(spawn_asteroid_near(rng, size, center))
+        spawned += 1
+    # Jobs queued since the last run have order >= spill_mark; only those
+    # are newly deferred, the rest were counted when they first spilled.
+    queue.spilled = len(queue.jobs)
+    queue.spill_total += sum(1 for job in queue.jobs if job[1] >= queue.spill_mark)
+    queue.spill_mark = queue.order
+    return spawned
+
+
 def boss_patrol_points(margin):
+    left, top, right, bottom = home_bounds()
+    mid_x = (left + right) * 0.5
+    mid_y = (top + bottom) * 0.5
     return [
-        pygame.Vector2(margin, margin),
-        pygame.Vector2(WORLD_WIDTH * 0.5, margin),
-        pygame.Vector2(WORLD_WIDTH - margin, margin),
-        pygame.Vector2(WORLD_WIDTH - margin, WORLD_HEIGHT * 0.5),
-        pygame.Vector2(WORLD_WIDTH - margin, WORLD_HEIGHT - margin),
-        pygame.Vector2(WORLD_WIDTH * 0.5, WORLD_HEIGHT - margin),
-        pygame.Vector2(margin, WORLD_HEIGHT - margin),
-        pygame.Vector2(margin, WORLD_HEIGHT * 0.5),
+        pygame.Vector2(left + margin, top + margin),
+        pygame.Vector2(mid_x, top + margin),
+        pygame.Vector2(right - margin, top + margin),
+        pygame.Vector2(right - margin, mid_y),
+        pygame.Vector2(right - margin, bottom - margin),
+        pygame.Vector2(mid_x, bottom - margin),
+        pygame.Vector2(left + margin, bottom - margin),
+        pygame.Vector2(left + margin, mid_y),
     ]
 
 
@@ -671,84 +1554,163 @@ def moving_circle_hit(prev_a, curr_a, prev_b, curr_b, radius):
     return segment_hits_circle(rel_prev, rel_curr, radius)
 
 
-def generate_landmarks(seed):
-    rng = random.Random(seed)
-    landmarks = []
-    planet_count = 12
+def nearby_landmarks(grid, pos):
+    cell_x = int(pos.x // LANDMARK_GRID_CELL)
+    cell_y = int(pos.y // LANDMARK_GRID_CELL)
+    for grid_x in (cell_x - 1, cell_x, cell_x + 1):
+        for grid_y in (cell_y - 1, cell_y, cell_y + 1):
+            yield from grid.get((grid_x, grid_y), ())
+
+
+def add_to_landmark_grid(grid, landmark):
+    grid[int(landmark.pos.x // LANDMARK_GRID_CELL), int(landmark.pos.y // LANDMARK_GRID_CELL)].append(landmark)
+
+
+def landmark_grid(state):
+    # Rebuilt whenever the landmark list is replaced (new seed, load).
+    if state.landmark_grid_source is not state.landmarks:
+        state.landmark_grid = defaultdict(list)
+        for landmark in state.landmarks:
+            add_to_landmark_grid(state.landmark_grid, landmark)
+        state.landmark_grid_source = state.landmarks
+    return state.landmark_grid
+
+
+def throw_planets(rng, planet_count, bounds, grid, id_base):
+    # Dart throwing against a uniform grid. A cell is at least the largest
+    # exclusion distance, so only the 3x3 cells around a candidate can
+    # reject it and every check is O(1); the RNG draws and accept/reject
+    # decisions match the old all-pairs scan, so existing seeds are unchanged.
+    left, top, right, bottom = bounds
     planets = []
-    planet_id = 0
     for _ in range(planet_count):
-        radius = rng.randint(1760, 2880)
-        placed = False
-        for _ in range(60):
+        radius = rng.randint(*PLANET_RADIUS_RANGE)
+        for _ in range(PLANET_PLACE_ATTEMPTS):
             pos = pygame.Vector2(
-                rng.uniform(radius, WORLD_WIDTH - radius),
-                rng.uniform(radius, WORLD_HEIGHT - radius),
+                rng.uniform(left + radius, right - radius),
+                rng.uniform(top + radius, bottom - radius),
             )
-            if all((pos - p.pos).length() >= p.radius + radius + 1000 for p in planets):
-                planets.append(
-                    Landmark(
-                        id=planet_id,
-                        kind="planet",
-                        pos=pos,
-                        radius=radius,
-                        color=COLORS["planet"],
-                    )
+            if all((pos - p.pos).length() >= p.radius + radius + PLANET_GAP for p in nearby_landmarks(grid, pos)):
+                planet = Landmark(
+                    id=id_base + len(planets),
+                    kind="planet",
+                    pos=pos,
+                    radius=radius,
+                    color=COLORS["planet"],
                 )
-                planet_id += 1
-                placed = True
+                planets.append(planet)
+                add_to_landmark_grid(grid, planet)
                 break
-        if not placed:
-            continue
-    landmarks.extend(planets)
-    moon_id = 0
-    moons = []
-    for parent in planets:
-        size = rng.randint(int(parent.radius * 0.16), int(parent.radius * 0.4))
-        min_orbit = parent.radius + size + 120
-        max_orbit = parent.radius + size + 520
-        placed = False
-        for _ in range(50):
-            offset = pygame.Vector2(rng.uniform(min_orbit, max_orbit), 0).rotate(rng.uniform(0, 360))
-            moon_pos = parent.pos + offset
-            if not (size <= moon_pos.x <= WORLD_WIDTH - size and size <= moon_pos.y <= WORLD_HEIGHT - size):
-                continue
-            if any((moon_pos - p.pos).length() < p.radius + size + 140 for p in planets):
-                continue
-            if any((moon_pos - m.pos).length() < m.radius + size + 80 for m in moons):
+    return planets
+
+
+def sample_planets(rng, planet_count, bounds, grid, id_base):
+    # Bridson's Poisson-disk sampling on the same grid. Candidates are drawn
+    # in a narrow annulus just outside an active planet's exclusion distance,
+    # so planets pack edge to edge instead of leaving the gaps independent
+    # darts keep missing once the world gets crowded. A planet that fails
+    # PLANET_POISSON_CANDIDATES times leaves the active list, and sampling
+    # ends when the list is empty.
+    left, top, right, bottom = bounds
+    planets = []
+    active = []
+    radius = rng.randint(*PLANET_RADIUS_RANGE)
+    while len(planets) < planet_count:
+        if active:
+            index = rng.randrange(len(active))
+            origin = active[index]
+            gap = origin.radius + radius + PLANET_GAP
+            for _ in range(PLANET_POISSON_CANDIDATES):
+                pos = origin.pos + pygame.Vector2(rng.uniform(gap, gap + PLANET_POISSON_SPREAD), 0).rotate(rng.uniform(0, 360))
+                if not (left + radius <= pos.x <= right - radius and top + radius <= pos.y <= bottom - radius):
+                    continue
+                if all((pos - p.pos).length() >= p.radius + radius + PLANET_GAP for p in nearby_landmarks(grid, pos)):
+                    break
+            else:
+                active[index] = active[-1]
+                active.pop()
                 continue
-            landmark = Landmark(
-                id=moon_id,
-                kind="moon",
-                pos=moon_pos,
-                radius=size,
-                color=COLORS["moon"],
-                parent_id=parent.id,
-            )
-            moons.append(landmark)
-            landmarks.append(landmark)
-            moon_id += 1
-            placed = True
+        elif planets:
             break
-        if not placed:
-            continue
+        else:
+            pos = pygame.Vector2(rng.uniform(left + radius, right - radius), rng.uniform(top + radius, bottom - radius))
+        planet = Landmark(id=id_base + len(planets), kind="planet", pos=pos, radius=radius, color=COLORS["planet"])
+        planets.append(planet)
+        active.append(planet)
+        add_to_landmark_grid(grid, planet)
+        radius = rng.randint(*PLANET_RADIUS_RANGE)
+    return planets
+
+
+def generate_landmarks(seed, planet_count=None, moons_per_planet=None, bounds=None, id_base=0):
+    # Up to LANDMARK_POISSON_MIN_PLANETS planets the darts place every one
+    # and keep existing seeds; past that they start to miss, so the layout
+    # switches to Poisson-disk sampling. landmark_placement reports how many
+    # of the requested planets and moons actually fit.
+    planet_count = PLANET_COUNT if planet_count is None else planet_count
+    moons_per_planet = MOONS_PER_PLANET if moons_per_planet is None else moons_per_planet
+    bounds = bounds or (0, 0, WORLD_WIDTH, WORLD_HEIGHT)
+    left, top, right, bottom = bounds
+    rng = random.Random(seed)
+    landmarks = []
+    grid = defaultdict(list)
+    place = sample_planets if planet_count >= LANDMARK_POISSON_MIN_PLANETS else throw_planets
+    planets = place(rng, planet_count, bounds, grid, id_base)
+    landmarks.extend(planets)
+    moon_id = id_base
+    for parent in planets:
+        for _ in range(moons_per_planet):
+            size = rng.randint(int(parent.radius * 0.16), int(parent.radius * 0.4))
+            min_orbit = parent.radius + size + 120
+            max_orbit = parent.radius + size + 520
+            for _ in range(MOON_PLACE_ATTEMPTS):
+                offset = pygame.Vector2(rng.uniform(min_orbit, max_orbit), 0).rotate(rng.uniform(0, 360))
+                moon_pos = parent.pos + offset
+                if not (left + size <= moon_pos.x <= right - size and top + size <= moon_pos.y <= bottom - size):
+                    continue
+                if any(
+                    (moon_pos - p.pos).length() < p.radius + size + (PLANET_MOON_GAP if p.kind == "planet" else MOON_GAP)
+                    for p in nearby_landmarks(grid, moon_pos)
+                ):
+                    continue
+                landmark = Landmark(
+                    id=moon_id,
+                    kind="moon",
+                    pos=moon_pos,
+                    radius=size,
+                    color=COLORS["moon"],
+                    parent_id=parent.id,
+                )
+                landmarks.append(landmark)
+                add_to_landmark_grid(grid, landmark)
+                moon_id += 1
+                break
     return landmarks
 
 
-def generate_pickups(seed):
+def landmark_placement(landmarks, planet_count=None, moons_per_planet=None):
+    # Placed and requested planets, then moons; moons are only requested
+    # around the planets that were placed.
+    planet_count = PLANET_COUNT if planet_count is None else planet_count
+    moons_per_planet = MOONS_PER_PLANET if moons_per_planet is None else moons_per_planet
+    planets = count_planets(landmarks)
+    return planets, planet_count, len(landmarks) - planets, planets * moons_per_planet
+
+
+def generate_pickups(seed, bounds=None):
+    left, top, right, bottom = bounds or (0, 0, WORLD_WIDTH, WORLD_HEIGHT)
     rng = random.Random(seed ^ 0x5F3759DF)
     pickups = []
-    screen_w = WIDTH / CAMERA_ZOOM
-    screen_h = HEIGHT / CAMERA_ZOOM
+    screen_w, screen_h = reference_view_size()
     cell_w = screen_w * PICKUP_GRID_SPACING
     cell_h = screen_h * PICKUP_GRID_SPACING
-    x = 0.0
-    while x < WORLD_WIDTH:
-        y = 0.0
-        while y < WORLD_HEIGHT:
+    x = float(left)
+    while x < right:
+        y = float(top)
+        while y < bottom:
             pos = pygame.Vector2(
-                min(WORLD_WIDTH - 1, x + rng.uniform(0, cell_w)),
-                min(WORLD_HEIGHT - 1, y + rng.uniform(0, cell_h)),
+                min(right - 1, x + rng.uniform(0, cell_w)),
+                min(bottom - 1, y + rng.uniform(0, cell_h)),
             )
             pickups.append(spawn_pickup(rng))
             pickups[-1].pos = pos
@@ -759,24 +1721,221 @@ def generate_pickups(seed):
 
 def generate_enemies(seed, center, landmarks):
     rng = random.Random(seed ^ 0x1EADBEEF)
+    view = reference_view_size()
     enemies = []
     for _ in range(ENEMY_NEARBY_TARGET):
         chance = elite_spawn_chance(center.x)
-        enemies.append(spawn_enemy_near(rng, center, landmarks, elite=rng.random() < chance))
+        enemies.append(spawn_enemy_near(rng, center, landmarks, elite=rng.random() < chance, view=view))
     return enemies
 
 
-def generate_starfield(seed):
+def starfield_stars(seed):
     rng = random.Random(seed ^ 0xA5A5A5A5)
-    surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    for _ in range(STAR_COUNT):
-        brightness = rng.randint(35, 95)
-        size = 1 if rng.random() < 0.9 else 2
-        x = rng.randrange(0, WIDTH)
-        y = rng.randrange(0, HEIGHT)
-        color = (brightness, brightness, brightness)
-        pygame.draw.circle(surface, color, (x, y), size)
-    return {"surface": surface, "width": WIDTH, "height": HEIGHT}
+    layers = []
+    for _, count, (low, high), small_chance in STAR_LAYERS:
+        stars = []
+        for _ in range(count):
+            brightness = rng.randint(low, high)
+            size = 1 if rng.random() < small_chance else 2
+            x = rng.randrange(0, WIDTH)
+            y = rng.randrange(0, HEIGHT)
+            stars.append((x, y, brightness, size))
+        layers.append(stars)
+    return layers
+
+
+def build_starfield(star_layers):
+    # Each layer is an opaque colorkeyed tile rather than a per-pixel alpha
+    # surface: with RLE acceleration a blit only touches the star pixels.
+    # Swaps build these on the main thread, so they are made in the
+    # display's format up front rather than drawn and then copied by convert.
+    display = pygame.display.get_surface()
+    layers = []
+    for (parallax, _, _, _), stars in zip(STAR_LAYERS, star_layers):
+        surface = pygame.Surface((WIDTH, HEIGHT), 0, display) if display else pygame.Surface((WIDTH, HEIGHT))
+        surface.fill(STAR_COLORKEY)
+        for x, y, brightness, size in stars:
+            pygame.draw.circle(surface, (brightness, brightness, brightness), (x, y), size)
+        surface.set_colorkey(STAR_COLORKEY, pygame.RLEACCEL)
+        layers.append((surface, parallax))
+    return {"layers": layers, "width": WIDTH, "height": HEIGHT}
+
+
+def generate_starfield(seed):
+    return build_starfield(starfield_stars(seed))
+
+
+def nebula_lattice(numpy, seed, ix, iy):
+    # Integer hash of lattice corners to [0, 1), so any tile can be built
+    # alone and still meet its neighbours seamlessly.
+    ix = ix.astype(numpy.uint64)
+    iy = iy.astype(numpy.uint64)
+    h = (ix * 374761393 + iy * 668265263 + numpy.uint64(seed) * 2246822519) & 0xFFFFFFFF
+    h = ((h ^ (h >> 13)) * 1274126177) & 0xFFFFFFFF
+    h ^= h >> 16
+    return (h & 0xFFFFFF).astype(numpy.float32) / 0x1000000
+
+
+def nebula_fbm(numpy, seed, xs, ys):
+    total = numpy.zeros((len(xs), len(ys)), dtype=numpy.float32)
+    amplitude = 0.5
+    weight = 0.0
+    for octave, cell in enumerate(NEBULA_OCTAVES):
+        gx = xs / cell
+        gy = ys / cell
+        ix = numpy.floor(gx).astype(numpy.int64)
+        iy = numpy.floor(gy).astype(numpy.int64)
+        fx = (gx - ix).astype(numpy.float32)
+        fy = (gy - iy).astype(numpy.float32)
+        fx = fx * fx * (3 - 2 * fx)
+        fy = fy * fy * (3 - 2 * fy)
+        lattice_x = numpy.arange(ix[0], ix[-1] + 2, dtype=numpy.int64)
+        lattice_y = numpy.arange(iy[0], iy[-1] + 2, dtype=numpy.int64)
+        lattice = nebula_lattice(numpy, (seed + octave * 101) & 0xFFFFFFFF, lattice_x[:, None], lattice_y[None, :])
+        cx = (ix - ix[0])[:, None]
+        cy = (iy - iy[0])[None, :]
+        top = lattice[cx, cy] + (lattice[cx + 1, cy] - lattice[cx, cy]) * fx[:, None]
+        bottom = lattice[cx, cy + 1] + (lattice[cx + 1, cy + 1] - lattice[cx, cy + 1]) * fx[:, None]
+        total += (top + (bottom - top) * fy[None, :]) * amplitude
+        weight += amplitude
+        amplitude *= 0.5
+    return total / weight
+
+
+def generate_nebula_tile(seed, tile_x, tile_y):
+    # One tile of the nebula plane as a (res, res, 3) uint8 array, x-major
+    # like surfarray. Gas density, a large-scale tint blend and dark dust
+    # lanes are three fBm fields over the same plane coordinates.
+    import numpy
+
+    rng = random.Random(seed ^ 0x4E42554C)
+    tints = []
+    for _ in range(2):
+        color = pygame.Color(0, 0, 0)
+        color.hsva = (rng.uniform(180, 340), rng.uniform(45, 80), rng.uniform(22, 32), 100)
+        tints.append(numpy.array((color.r, color.g, color.b), dtype=numpy.float32))
+    step = NEBULA_TILE_SIZE / NEBULA_TILE_RES
+    xs = tile_x * NEBULA_TILE_SIZE + (numpy.arange(NEBULA_TILE_RES) + 0.5) * step
+    ys = tile_y * NEBULA_TILE_SIZE + (numpy.arange(NEBULA_TILE_RES) + 0.5) * step
+    key = seed & 0xFFFFFFFF
+    density = numpy.clip((nebula_fbm(numpy, key, xs, ys) - 0.36) * 3.2, 0.0, 1.0)
+    density *= numpy.sqrt(density)
+    blend = numpy.clip((nebula_fbm(numpy, key ^ 0x5BD1E995, xs * 0.5, ys * 0.5) - 0.25) * 2.5, 0.0, 1.0)
+    dust = numpy.clip((nebula_fbm(numpy, key ^ 0x27D4EB2F, xs, ys) - 0.5) * 3.0, 0.0, 1.0)
+    glow = density * (1.0 - 0.7 * dust)
+    tint = tints[0] + (tints[1] - tints[0]) * blend[..., None]
+    rgb = numpy.array(COLORS["bg"], dtype=numpy.float32) + tint * glow[..., None]
+    return numpy.clip(rgb, 0, 255).astype(numpy.uint8)
+
+
+def nebula_tile_path(seed, tile_x, tile_y):
+    name = f"v{NEBULA_VERSION}_{seed}_{tile_x}_{tile_y}_{NEBULA_TILE_RES}.npy"
+    return os.path.join(NEBULA_CACHE_DIR, name)
+
+
+def load_nebula_tile(seed, tile_x, tile_y):
+    import numpy
+
+    path = nebula_tile_path(seed, tile_x, tile_y)
+    start = time.perf_counter()
+    try:
+        pixels = numpy.load(path)
+        if pixels.shape == (NEBULA_TILE_RES, NEBULA_TILE_RES, 3):
+            NEBULA_STATS.disk_hits += 1
+            NEBULA_STATS.disk_ms += (time.perf_counter() - start) * 1000.0
+            return pixels
+    except (OSError, ValueError):
+        pass
+    start = time.perf_counter()
+    pixels = generate_nebula_tile(seed, tile_x, tile_y)
+    NEBULA_STATS.generated += 1
+    NEBULA_STATS.generate_ms += (time.perf_counter() - start) * 1000.0
+    try:
+        os.makedirs(NEBULA_CACHE_DIR, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as f:
+            numpy.save(f, pixels)
+        os.replace(partial, path)
+    except OSError:
+        pass
+    return pixels
+
+
+def run_nebula_worker():
+    while True:
+        seed, tile_x, tile_y = NEBULA_REQUESTS.get()
+        pixels = load_nebula_tile(seed, tile_x, tile_y)
+        surface = pygame.transform.smoothscale(pygame.surfarray.make_surface(pixels), (NEBULA_TILE_SIZE, NEBULA_TILE_SIZE))
+        NEBULA_RESULTS.put(((seed, tile_x, tile_y), surface))
+
+
+def request_nebula_tile(key):
+    global NEBULA_WORKER
+    if key in NEBULA_PENDING:
+        return
+    if NEBULA_WORKER is None:
+        NEBULA_WORKER = threading.Thread(target=run_nebula_worker, name="nebula", daemon=True)
+        NEBULA_WORKER.start()
+    NEBULA_PENDING.add(key)
+    NEBULA_REQUESTS.put(key)
+
+
+def draw_nebula(screen, seed, ship_pos):
+    # Tiles are built on the worker thread and only converted here, a few
+    # per frame; a missing tile just shows the background until it lands.
+    # The tiles are opaque, so the background fill is only needed then.
+    # Offsets are in internal pixels, which are upscaled by 1 / RENDER_SCALE.
+    left = ship_pos.x * NEBULA_PARALLAX * RENDER_SCALE - WIDTH / 2
+    top = ship_pos.y * NEBULA_PARALLAX * RENDER_SCALE - HEIGHT / 2
+    first_x = math.floor(left / NEBULA_TILE_SIZE)
+    first_y = math.floor(top / NEBULA_TILE_SIZE)
+    last_x = math.floor((left + WIDTH) / NEBULA_TILE_SIZE)
+    last_y = math.floor((top + HEIGHT) / NEBULA_TILE_SIZE)
+    # Never evict below the prefetch window, or large screens would thrash.
+    capacity = max(NEBULA_TILE_CACHE_MAX, (last_x - first_x + 3) * (last_y - first_y + 3))
+
+    start = time.perf_counter()
+    display_ready = pygame.display.get_surface() is not None
+    for _ in range(NEBULA_UPLOADS_PER_FRAME):
+        try:
+            key, surface = NEBULA_RESULTS.get_nowait()
+        except queue.Empty:
+            break
+        NEBULA_PENDING.discard(key)
+        NEBULA_TILES[key] = surface.convert() if display_ready else surface
+        if len(NEBULA_TILES) > capacity:
+            NEBULA_TILES.popitem(last=False)
+        NEBULA_STATS.uploads += 1
+    NEBULA_STATS.upload_ms = (time.perf_counter() - start) * 1000.0
+
+    blits = []
+    covered = True
+    for tile_y in range(first_y - 1, last_y + 2):
+        for tile_x in range(first_x - 1, last_x + 2):
+            key = (seed, tile_x, tile_y)
+            tile = NEBULA_TILES.get(key)
+            if tile is None:
+                request_nebula_tile(key)
+                if first_x <= tile_x <= last_x and first_y <= tile_y <= last_y:
+                    covered = False
+                continue
+            NEBULA_TILES.move_to_end(key)
+            if first_x <= tile_x <= last_x and first_y <= tile_y <= last_y:
+                blits.append((tile, (round(tile_x * NEBULA_TILE_SIZE - left), round(tile_y * NEBULA_TILE_SIZE - top))))
+    if not covered:
+        screen.fill(COLORS["bg"])
+    screen.blits(blits, doreturn=False)
+
+
+def describe_nebula():
+    stats = NEBULA_STATS
+    generate_avg = stats.generate_ms / stats.generated if stats.generated else 0.0
+    disk_avg = stats.disk_ms / stats.disk_hits if stats.disk_hits else 0.0
+    return (
+        f"Nebula: {len(NEBULA_TILES)} tiles  pending {len(NEBULA_PENDING)}"
+        f"  generated {stats.generated} ({generate_avg:.1f} ms)  disk {stats.disk_hits} ({disk_avg:.1f} ms)"
+        f"  upload {stats.upload_ms:.2f} ms"
+    )
 
 
 def pick_nearest_moon(planet, moons):
@@ -811,96 +1970,763 @@ def generate_freighters(seed, landmarks):
         if pair in used_pairs:
             continue
         used_pairs.add(pair)
-        pos = pygame.Vector2(origin_moon.pos)
-        speed = rng.uniform(*FREIGHTER_SPEED)
-        freighters.append(
-            {
-                "pos": pos,
-                "vel": pygame.Vector2(0, 0),
-                "angle": rng.uniform(0, 360),
-                "from": pygame.Vector2(origin_moon.pos),
-                "to": pygame.Vector2(dest_moon.pos),
-                "target": pygame.Vector2(dest_moon.pos),
-                "speed": speed,
-            }
-        )
+        freighters.append(make_freighter(rng, origin_moon, dest_moon))
     return freighters
 
 
-def new_world(seed):
-    rng = random.Random(seed)
-    asteroids = []
-    for _ in range(120):
-        size = 4 if rng.random() < 0.12 else 3
-        asteroids.append(spawn_asteroid(rng, size))
-    pickups = generate_pickups(seed)
-    center = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-    landmarks = generate_landmarks(seed)
-    enemies = generate_enemies(seed, center, landmarks)
-    boss, boss_escorts = spawn_boss_with_escorts(seed)
-    enemies.extend(boss_escorts)
-    stars = generate_starfield(seed)
-    freighters = generate_freighters(seed, landmarks)
-    return asteroids, pickups, enemies, landmarks, stars, freighters, boss, boss_escorts
+def make_freighter(rng, origin_moon, dest_moon):
+    pos = pygame.Vector2(origin_moon.pos)
+    speed = rng.uniform(*FREIGHTER_SPEED)
+    return {
+        "pos": pos,
+        "vel": pygame.Vector2(0, 0),
+        "angle": rng.uniform(0, 360),
+        "from": pygame.Vector2(origin_moon.pos),
+        "to": pygame.Vector2(dest_moon.pos),
+        "target": pygame.Vector2(dest_moon.pos),
+        "speed": speed,
+    }
 
 
-def load_state():
-    if not os.path.exists(SAVE_PATH):
-        return None
-    with open(SAVE_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+def enable_universe():
+    global USE_UNIVERSE, WORLD_WIDTH, WORLD_HEIGHT
+    USE_UNIVERSE = True
+    WORLD_WIDTH = WORLD_HEIGHT = UNIVERSE_SECTORS * SECTOR_SIZE
 
 
-def save_state(state):
-    with open(SAVE_PATH, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
+def sector_of(pos):
+    return int(pos.x // SECTOR_SIZE), int(pos.y // SECTOR_SIZE)
 
 
-def serialize_vec(vec):
-    return [vec.x, vec.y]
+def sectors_around(center, radius):
+    cx, cy = center
+    sectors = [
+        (cx + dx, cy + dy)
+        for dy in range(-radius, radius + 1)
+        for dx in range(-radius, radius + 1)
+        if 0 <= cx + dx < UNIVERSE_SECTORS and 0 <= cy + dy < UNIVERSE_SECTORS
+    ]
+    return sorted(sectors, key=lambda sector: max(abs(sector[0] - cx), abs(sector[1] - cy)))
 
 
-def deserialize_vec(value):
-    return pygame.Vector2(value[0], value[1])
+def sector_seed(seed, sector):
+    sx, sy = sector
+    return (seed * 0x9E3779B97F4A7C15 ^ sx * 0xBF58476D1CE4E5B9 ^ sy * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
 
 
-def serialize_asteroid(asteroid):
-    return {
-        "pos": serialize_vec(asteroid.pos),
-        "vel": serialize_vec(asteroid.vel),
-        "size": asteroid.size,
-        "radius": asteroid.radius,
-        "spin": asteroid.spin,
-        "angle": asteroid.angle,
-        "shape": asteroid.shape,
-    }
+def sector_bounds(sector, inset=0):
+    sx, sy = sector
+    return (
+        sx * SECTOR_SIZE + inset,
+        sy * SECTOR_SIZE + inset,
+        (sx + 1) * SECTOR_SIZE - inset,
+        (sy + 1) * SECTOR_SIZE - inset,
+    )
 
 
-def deserialize_asteroid(data):
-    radius = data["radius"]
-    cached = ASTEROID_SHAPE_CACHE.get(radius)
-    if cached is None:
-        rng = random.Random(radius * 9176)
-        cached = make_asteroid_shape(rng, radius)
-        ASTEROID_SHAPE_CACHE[radius] = cached
-    return Asteroid(
-        pos=deserialize_vec(data["pos"]),
-        vel=deserialize_vec(data["vel"]),
-        size=data["size"],
-        radius=radius,
-        spin=data["spin"],
-        angle=data["angle"],
-        shape=cached,
+def sector_overlaps(sector, view):
+    left, top, right, bottom = sector_bounds(sector)
+    return left < view[2] and view[0] < right and top < view[3] and view[1] < bottom
+
+
+def sector_landmarks(seed, sector):
+    # Same planet density as the classic world. Landmarks stay PLANET_GAP / 2
+    # inside the sector edge, so sectors placed independently never crowd
+    # each other, and ids are unique per sector.
+    sx, sy = sector
+    rng = random.Random(sector_seed(seed, sector))
+    home_w, home_h = UNIVERSE_HOME_SIZE
+    expected = PLANET_COUNT * SECTOR_SIZE * SECTOR_SIZE / (home_w * home_h)
+    planets = int(expected) + (rng.random() < expected - int(expected))
+    return generate_landmarks(
+        rng.getrandbits(32),
+        planets,
+        MOONS_PER_PLANET,
+        sector_bounds(sector, PLANET_GAP / 2),
+        (sy * UNIVERSE_SECTORS + sx) * SECTOR_ID_STRIDE,
     )
 
 
-def serialize_pickup(pickup):
-    return {
-        "kind": pickup.kind,
-        "pos": serialize_vec(pickup.pos),
-        "ttl": pickup.ttl,
-        "shell_hp": pickup.shell_hp,
-    }
+def sector_freighters(seed, sector, landmarks):
+    # Each planet runs one route to a planet in this or a neighbouring
+    # sector; the neighbours' landmarks are cheap to regenerate.
+    nearby = []
+    for other in sectors_around(sector, 1):
+        nearby.extend(landmarks if other == sector else sector_landmarks(seed, other))
+    planets = [l for l in nearby if l.kind == "planet"]
+    moons = [l for l in nearby if l.kind == "moon"]
+    rng = random.Random(sector_seed(seed, sector) ^ 0x7F4A7C15)
+    freighters = []
+    for origin in landmarks:
+        if origin.kind != "planet":
+            continue
+        dest = rng.choice(planets)
+        origin_moon = pick_nearest_moon(origin, moons)
+        dest_moon = pick_nearest_moon(dest, moons)
+        if dest is origin or not origin_moon or not dest_moon or origin_moon is dest_moon:
+            continue
+        freighters.append(make_freighter(rng, origin_moon, dest_moon))
+    return freighters
+
+
+def load_sector(state, sector):
+    universe = state.universe
+    generated = generate_pickups(sector_seed(state.seed, sector), sector_bounds(sector))
+    original = [(p.kind, p.shell_hp) for p in generated]
+    # Diffs are by index into the generated list. One recorded against a
+    # list of another length (a save from a different layout) is dropped
+    # rather than applied to the wrong pickups.
+    diff = universe.diffs.get(sector, {})
+    if diff.get("count", len(generated)) != len(generated):
+        diff = {}
+    taken = {index for index in diff.get("taken", ()) if 0 <= index < len(generated)}
+    for index, (kind, shell_hp) in diff.get("changed", {}).items():
+        if 0 <= index < len(generated):
+            generated[index].kind = kind
+            generated[index].shell_hp = shell_hp
+    landmarks = sector_landmarks(state.seed, sector)
+    universe.planets_seen.update(l.id for l in landmarks if l.kind == "planet")
+    universe.sectors[sector] = {
+        "generated": generated,
+        "original": original,
+        "pickups": [p for index, p in enumerate(generated) if index not in taken],
+        "landmarks": landmarks,
+        "freighters": sector_freighters(state.seed, sector, landmarks),
+    }
+    universe.loaded += 1
+
+
+def sector_diff(sector):
+    present = {id(p) for p in sector["pickups"]}
+    taken = [index for index, p in enumerate(sector["generated"]) if id(p) not in present]
+    changed = {
+        index: (p.kind, p.shell_hp)
+        for index, p in enumerate(sector["generated"])
+        if id(p) in present and (p.kind, p.shell_hp) != sector["original"][index]
+    }
+    return {"count": len(sector["generated"]), "taken": taken, "changed": changed} if taken or changed else None
+
+
+def sync_sector_pickups(state):
+    # Pickups are collected straight out of state.pickups; fold that back
+    # into the sectors before their lists are used again.
+    live = {id(p) for p in state.pickups}
+    for sector in state.universe.sectors.values():
+        sector["pickups"] = [p for p in sector["pickups"] if id(p) in live]
+
+
+def update_universe(state):
+    # Sectors within SECTOR_LOAD_RADIUS of the ship's are generated the first
+    # time they come near, SECTOR_LOADS_PER_STEP per step; on a fresh universe
+    # every sector the view touches is generated at once. Sectors beyond
+    # SECTOR_KEEP_RADIUS are dropped and only their pickup diffs are kept.
+    universe = state.universe
+    center = sector_of(state.ship_pos)
+    first = universe.center is None
+    stale = []
+    if center != universe.center:
+        universe.center = center
+        universe.pending = [sector for sector in sectors_around(center, SECTOR_LOAD_RADIUS) if sector not in universe.sectors]
+        stale = [
+            sector
+            for sector in universe.sectors
+            if max(abs(sector[0] - center[0]), abs(sector[1] - center[1])) > SECTOR_KEEP_RADIUS
+        ]
+    if not universe.pending and not stale:
+        return
+    start = time.perf_counter()
+    sync_sector_pickups(state)
+    for sector in stale:
+        diff = sector_diff(universe.sectors.pop(sector))
+        if diff:
+            universe.diffs[sector] = diff
+        else:
+            universe.diffs.pop(sector, None)
+        universe.evicted += 1
+    if first:
+        view = view_rect(state.ship_pos)
+        loads = [sector for sector in universe.pending if sector_overlaps(sector, view)]
+    else:
+        loads = universe.pending[:SECTOR_LOADS_PER_STEP]
+    for sector in loads:
+        load_sector(state, sector)
+    universe.pending = [sector for sector in universe.pending if sector not in loads]
+    sectors = universe.sectors.values()
+    state.pickups = [p for sector in sectors for p in sector["pickups"]]
+    state.landmarks = [l for sector in sectors for l in sector["landmarks"]]
+    state.freighters = [f for sector in sectors for f in sector["freighters"]]
+    state.planet_total = len(universe.planets_seen)
+    universe.load_ms = (time.perf_counter() - start) * 1000.0
+
+
+def universe_diffs(state):
+    # Stored diffs plus those of the loaded sectors, in save file form.
+    universe = state.universe
+    sync_sector_pickups(state)
+    diffs = dict(universe.diffs)
+    for key, sector in universe.sectors.items():
+        diff = sector_diff(sector)
+        if diff:
+            diffs[key] = diff
+        else:
+            diffs.pop(key, None)
+    return [
+        {
+            "sector": list(key),
+            "count": diff["count"],
+            "taken": sorted(diff["taken"]),
+            "changed": [[index, kind, shell_hp] for index, (kind, shell_hp) in diff["changed"].items()],
+        }
+        for key, diff in diffs.items()
+    ]
+
+
+def load_universe_diffs(entries):
+    return {
+        tuple(entry["sector"]): {
+            "count": entry.get("count"),
+            "taken": entry["taken"],
+            "changed": {index: (kind, shell_hp) for index, kind, shell_hp in entry["changed"]},
+        }
+        for entry in entries
+    }
+
+
+def describe_universe(universe):
+    return (
+        f"Universe: sector {universe.center}  loaded {len(universe.sectors)}  pending {len(universe.pending)}"
+        f"  generated {universe.loaded}  evicted {universe.evicted}  diffs {len(universe.diffs)}"
+        f"  last {universe.load_ms:.1f} ms"
+    )
+
+
+def seed_asteroids(seed, shapes=ASTEROID_SHAPE_CACHE):
+    rng = random.Random(seed)
+    asteroids = []
+    for _ in range(WORLD_ASTEROID_COUNT):
+        size = 4 if rng.random() < 0.12 else 3
+        asteroids.append(spawn_asteroid(rng, size, shapes=shapes))
+    return asteroids
+
+
+def world_static_data(seed):
+    # The part of a world a save does not carry: landmarks, enemies, the
+    # boss and its escorts, the starfield as star lists and the freighters.
+    # This is what the world cache holds. A cache hit also returns the
+    # starfield built when it was remembered, or the blob read from disk for
+    # finish_static to remember.
+    if USE_UNIVERSE:
+        # Pickups, landmarks and freighters stream in per sector through
+        # update_universe; asteroids and enemies come from the spawners
+        # around the ship, as they do everywhere else.
+        boss, boss_escorts = spawn_boss_with_escorts(seed)
+        return "universe", (list(boss_escorts), [], starfield_stars(seed), [], boss, boss_escorts), None, None
+    found = read_cached_world(seed) if USE_WORLD_CACHE else None
+    if found:
+        return ("cached",) + found
+    center = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+    landmarks = generate_landmarks(seed)
+    enemies = generate_enemies(seed, center, landmarks)
+    boss, boss_escorts = spawn_boss_with_escorts(seed)
+    enemies.extend(boss_escorts)
+    star_layers = starfield_stars(seed)
+    freighters = generate_freighters(seed, landmarks)
+    return "serial", (enemies, landmarks, star_layers, freighters, boss, boss_escorts), None, None
+
+
+def world_data(seed, shapes):
+    # Everything new_world makes short of pygame surfaces; asteroid shapes
+    # are drawn from, and added to, `shapes`. The prefetch thread runs this
+    # with its own copy of the shape cache, so it touches neither the
+    # display nor the shared cache.
+    if WORLD_POOL and not USE_UNIVERSE:
+        return new_world_parallel(seed, WORLD_POOL, shapes)
+    mode, static, stars, blob = world_static_data(seed)
+    if USE_UNIVERSE:
+        return mode, ([], []) + static, stars, blob
+    return mode, (seed_asteroids(seed, shapes), generate_pickups(seed)) + static, stars, blob
+
+
+def finish_static(seed, mode, static, stars, blob):
+    # The main thread half: builds the star surfaces and remembers or stores
+    # the static part.
+    enemies, landmarks, star_layers, freighters, boss, boss_escorts = static
+    if stars is None:
+        stars = build_starfield(star_layers)
+    static = enemies, landmarks, stars, freighters, boss, boss_escorts
+    if blob:
+        remember_world((seed, world_cache_digest()), blob, stars)
+    elif USE_WORLD_CACHE and mode in ("serial", "parallel"):
+        store_world(seed, static)
+    return static
+
+
+def finish_world(seed, mode, world, stars, blob):
+    # Also moves the asteroids onto the shared shape cache.
+    asteroids, pickups, *static = world
+    for asteroid in asteroids:
+        asteroid.shape = ASTEROID_SHAPE_CACHE.setdefault(asteroid.radius, asteroid.shape)
+    return (asteroids, pickups) + finish_static(seed, mode, static, stars, blob)
+
+
+def new_world_static(seed):
+    # F6 takes asteroids and pickups from the save, so a load only needs the
+    # rest of the seed's world. It is not a new world, so WORLD_GEN_STATS is
+    # left alone.
+    return finish_static(seed, *world_static_data(seed))
+
+
+def record_world_gen(mode, ms, landmarks):
+    WORLD_GEN_STATS.mode = mode
+    WORLD_GEN_STATS.last_ms = ms
+    WORLD_GEN_STATS.worlds += 1
+    WORLD_GEN_STATS.placement = landmark_placement(landmarks)
+
+
+def new_world(seed):
+    start = time.perf_counter()
+    mode, *data = world_data(seed, ASTEROID_SHAPE_CACHE)
+    world = finish_world(seed, mode, *data)
+    record_world_gen(mode, (time.perf_counter() - start) * 1000.0, world[3])
+    return world
+
+
+def world_settings():
+    # Only the starfield still depends on the screen size; the zoom no longer
+    # shapes a world, so it stays out of cache digests and prefetch checks.
+    return WIDTH, HEIGHT, PLANET_COUNT, MOONS_PER_PLANET
+
+
+def apply_world_settings(settings):
+    global WIDTH, HEIGHT, PLANET_COUNT, MOONS_PER_PLANET
+    WIDTH, HEIGHT, PLANET_COUNT, MOONS_PER_PLANET = settings
+
+
+def world_stage_asteroids(settings, seed, shapes):
+    # Shapes are only drawn from the RNG for radii not cached yet, so the
+    # worker starts from the caller's cache and returns just the new ones.
+    apply_world_settings(settings)
+    ASTEROID_SHAPE_CACHE.clear()
+    ASTEROID_SHAPE_CACHE.update(shapes)
+    packed = [
+        (a.pos.x, a.pos.y, a.vel.x, a.vel.y, a.size, a.radius, a.spin, a.angle)
+        for a in seed_asteroids(seed)
+    ]
+    new_shapes = {radius: shape for radius, shape in ASTEROID_SHAPE_CACHE.items() if radius not in shapes}
+    return packed, new_shapes
+
+
+def world_stage_pickups(settings, seed):
+    apply_world_settings(settings)
+    return [(p.kind, p.pos.x, p.pos.y, p.ttl, p.shell_hp) for p in generate_pickups(seed)]
+
+
+def world_stage_landmarks(settings, seed):
+    apply_world_settings(settings)
+    landmarks = generate_landmarks(seed)
+    enemies = generate_enemies(seed, pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2), landmarks)
+    return landmarks, enemies, generate_freighters(seed, landmarks)
+
+
+def world_stage_boss(settings, seed):
+    apply_world_settings(settings)
+    return spawn_boss_with_escorts(seed)
+
+
+def new_world_parallel(seed, pool, shapes):
+    # Same stages and derived seeds as the serial path, fanned out to the
+    # pool; landmarks, enemies and freighters stay in one stage because the
+    # latter two depend on the first. Those and the boss are only generated
+    # when the cache does not have them, and the star lists are made here
+    # while the workers run.
+    settings = world_settings()
+    asteroid_job = pool.submit(world_stage_asteroids, settings, seed, dict(shapes))
+    pickup_job = pool.submit(world_stage_pickups, settings, seed)
+    found = read_cached_world(seed) if USE_WORLD_CACHE else None
+    if not found:
+        landmark_job = pool.submit(world_stage_landmarks, settings, seed)
+        boss_job = pool.submit(world_stage_boss, settings, seed)
+        star_layers = starfield_stars(seed)
+
+    packed, new_shapes = asteroid_job.result()
+    for radius, shape in new_shapes.items():
+        shapes.setdefault(radius, shape)
+    asteroids = [
+        Asteroid(
+            pos=pygame.Vector2(x, y),
+            vel=pygame.Vector2(vel_x, vel_y),
+            size=size,
+            radius=radius,
+            spin=spin,
+            angle=angle,
+            shape=shapes[radius],
+        )
+        for x, y, vel_x, vel_y, size, radius, spin, angle in packed
+    ]
+    pickups = [
+        Pickup(kind=kind, pos=pygame.Vector2(x, y), ttl=ttl, shell_hp=shell_hp)
+        for kind, x, y, ttl, shell_hp in pickup_job.result()
+    ]
+    if found:
+        static, stars, blob = found
+        return "cached", (asteroids, pickups) + static, stars, blob
+    landmarks, enemies, freighters = landmark_job.result()
+    boss, boss_escorts = boss_job.result()
+    enemies.extend(boss_escorts)
+    return "parallel", (asteroids, pickups, enemies, landmarks, star_layers, freighters, boss, boss_escorts), None, None
+
+
+def start_world_pool(workers=WORLD_POOL_WORKERS):
+    pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    # Workers import the game on start; pay for that now, not on the first seed.
+    for job in [pool.submit(apply_world_settings, world_settings()) for _ in range(workers)]:
+        job.result()
+    return pool
+
+
+def next_world_seed(current):
+    # Time seeds only tick once a second; never prepare the world in play.
+    seed = seed_from_time()
+    return seed if seed != current else (current + 1) & 0xFFFFFFFF
+
+
+def prepare_world(prefetch):
+    # Runs on the prefetch thread. Its stats wait on the WorldPrefetch until
+    # the world is swapped in, so F1 keeps describing the world in play.
+    start = time.perf_counter()
+    prefetch.mode, *data = world_data(prefetch.seed, prefetch.shapes)
+    prefetch.gen_ms = (time.perf_counter() - start) * 1000.0
+    return data
+
+
+def start_prefetch(executor, seed):
+    # The shape cache is copied as the job is queued, so the shapes (and
+    # with them the RNG draws) of the world do not depend on what the main
+    # thread caches while it runs.
+    prefetch = WorldPrefetch(seed, world_settings(), dict(ASTEROID_SHAPE_CACHE))
+    prefetch.job = executor.submit(prepare_world, prefetch)
+    return prefetch
+
+
+def prefetch_world(executor, current_seed):
+    return start_prefetch(executor, next_world_seed(current_seed))
+
+
+def refresh_prefetch(executor, prefetch):
+    # A resize or a landmark count change since the prefetch started changes
+    # the starfield or the layout, so that world would no longer match.
+    if prefetch.settings == world_settings():
+        return prefetch
+    prefetch.job.cancel()
+    return start_prefetch(executor, prefetch.seed)
+
+
+def swap_world(state, executor, prefetch):
+    # Takes the prepared world (waiting only if N came before it finished),
+    # builds its star surfaces and starts preparing the one after it.
+    start = time.perf_counter()
+    prefetch = refresh_prefetch(executor, prefetch)
+    if not prefetch.job.done():
+        WORLD_GEN_STATS.swap_waits += 1
+    world = finish_world(prefetch.seed, prefetch.mode, *prefetch.job.result())
+    record_world_gen(prefetch.mode, prefetch.gen_ms, world[3])
+    stars = reset_world(state, prefetch.seed, world)
+    WORLD_GEN_STATS.swap_ms = (time.perf_counter() - start) * 1000.0
+    WORLD_GEN_STATS.swap_max_ms = max(WORLD_GEN_STATS.swap_max_ms, WORLD_GEN_STATS.swap_ms)
+    WORLD_GEN_STATS.swaps += 1
+    return stars, prefetch_world(executor, state.seed)
+
+
+def world_cache_digest():
+    constants = (WORLD_WIDTH, WORLD_HEIGHT) + world_settings()
+    return zlib.crc32(repr(constants).encode())
+
+
+def world_cache_path(seed, digest):
+    return os.path.join(WORLD_CACHE_DIR, f"world_{seed}_{digest:08x}.bin")
+
+
+def encode_world(seed, digest, static):
+    enemies, landmarks, _, freighters, boss, boss_escorts = static
+    sections = {name: array("d") for name, _ in WORLD_BLOB_SECTIONS}
+    for l in landmarks:
+        parent_id = -1 if l.parent_id is None else l.parent_id
+        kind = 0 if l.kind == "planet" else 1
+        sections["landmarks"].extend((l.id, kind, l.pos.x, l.pos.y, l.radius, pack_color(l.color), parent_id))
+    for e in enemies:
+        flags = e.pursuing | (e.elite << 1) | (e.escort << 2)
+        sections["enemies"].extend(
+            (
+                e.pos.x, e.pos.y, e.vel.x, e.vel.y, e.angle, e.shield, e.fire_timer, e.wander_timer,
+                e.wander_angle, flags, e.escort_offset.x, e.escort_offset.y, e.ai_timer,
+            )
+        )
+    if boss:
+        sections["boss"].extend(
+            (boss.pos.x, boss.pos.y, boss.vel.x, boss.vel.y, boss.angle, boss.hp, boss.fire_timer, boss.patrol_index)
+        )
+        for point in boss.patrol_points:
+            sections["patrol"].extend((point.x, point.y))
+    for f in freighters:
+        sections["freighters"].extend(
+            (
+                f["pos"].x, f["pos"].y, f["vel"].x, f["vel"].y, f["angle"], f["from"].x, f["from"].y,
+                f["to"].x, f["to"].y, f["target"].x, f["target"].y, f["speed"],
+            )
+        )
+    # Surfaces are rebuilt from the star list, which is a few kilobytes.
+    for layer, stars in enumerate(starfield_stars(seed)):
+        for x, y, brightness, size in stars:
+            sections["stars"].extend((layer, x, y, brightness, size))
+    counts = [len(sections[name]) // width for name, width in WORLD_BLOB_SECTIONS]
+    header = WORLD_BLOB_HEADER.pack(
+        WORLD_BLOB_MAGIC, WORLD_CACHE_VERSION, digest, seed, len(boss_escorts), *counts
+    )
+    return header + b"".join(sections[name].tobytes() for name, _ in WORLD_BLOB_SECTIONS)
+
+
+def decode_world(blob, seed, digest):
+    # Builds fresh objects every time: the cached world is only a template
+    # and the game mutates whatever it is handed. Raises ValueError for a
+    # blob of another version, settings or seed, or a truncated one.
+    magic, version, blob_digest, blob_seed, escort_count, *counts = WORLD_BLOB_HEADER.unpack_from(blob)
+    if (magic, version, blob_digest, blob_seed) != (WORLD_BLOB_MAGIC, WORLD_CACHE_VERSION, digest, seed):
+        raise ValueError("stale world blob")
+    with memoryview(blob) as view:
+        if (len(view) - WORLD_BLOB_HEADER.size) % 8:
+            raise ValueError("truncated world blob")
+        with view[WORLD_BLOB_HEADER.size:].cast("d") as values:
+            flat = values.tolist()
+    if len(flat) != sum(count * width for count, (_, width) in zip(counts, WORLD_BLOB_SECTIONS)):
+        raise ValueError("truncated world blob")
+    records = {}
+    offset = 0
+    for count, (name, width) in zip(counts, WORLD_BLOB_SECTIONS):
+        records[name] = [flat[i:i + width] for i in range(offset, offset + count * width, width)]
+        offset += count * width
+    landmarks = [
+        Landmark(
+            id=int(landmark_id),
+            kind="planet" if kind == 0 else "moon",
+            pos=pygame.Vector2(x, y),
+            radius=int(radius),
+            color=unpack_color(color),
+            parent_id=None if parent_id < 0 else int(parent_id),
+        )
+        for landmark_id, kind, x, y, radius, color, parent_id in records["landmarks"]
+    ]
+    enemies = [
+        Enemy(
+            pos=pygame.Vector2(x, y),
+            vel=pygame.Vector2(vel_x, vel_y),
+            angle=angle,
+            shield=int(shield),
+            fire_timer=fire_timer,
+            wander_timer=wander_timer,
+            wander_angle=wander_angle,
+            pursuing=bool(int(flags) & 1),
+            elite=bool(int(flags) & 2),
+            escort=bool(int(flags) & 4),
+            escort_offset=pygame.Vector2(offset_x, offset_y),
+            ai_timer=ai_timer,
+        )
+        for (
+            x, y, vel_x, vel_y, angle, shield, fire_timer, wander_timer,
+            wander_angle, flags, offset_x, offset_y, ai_timer,
+        ) in records["enemies"]
+    ]
+    boss = None
+    for x, y, vel_x, vel_y, angle, hp, fire_timer, patrol_index in records["boss"]:
+        boss = Boss(
+            pos=pygame.Vector2(x, y),
+            vel=pygame.Vector2(vel_x, vel_y),
+            angle=angle,
+            hp=int(hp),
+            fire_timer=fire_timer,
+            patrol_index=int(patrol_index),
+            patrol_points=[pygame.Vector2(x, y) for x, y in records["patrol"]],
+        )
+    freighters = [
+        {
+            "pos": pygame.Vector2(x, y),
+            "vel": pygame.Vector2(vel_x, vel_y),
+            "angle": angle,
+            "from": pygame.Vector2(from_x, from_y),
+            "to": pygame.Vector2(to_x, to_y),
+            "target": pygame.Vector2(target_x, target_y),
+            "speed": speed,
+        }
+        for x, y, vel_x, vel_y, angle, from_x, from_y, to_x, to_y, target_x, target_y, speed in records["freighters"]
+    ]
+    star_layers = [[] for _ in STAR_LAYERS]
+    for layer, x, y, brightness, size in records["stars"]:
+        star_layers[int(layer)].append((int(x), int(y), int(brightness), int(size)))
+    # Escorts are stored last among the enemies, as world_static_data appends them.
+    boss_escorts = enemies[len(enemies) - escort_count:] if escort_count else []
+    return enemies, landmarks, star_layers, freighters, boss, boss_escorts
+
+
+def starfield_bytes(stars):
+    return sum(surface.get_width() * surface.get_height() * surface.get_bytesize() for surface, _ in stars["layers"])
+
+
+def remember_world(key, blob, stars):
+    # The built starfield is kept alongside the blob: its surfaces are the
+    # expensive part to rebuild and the game never draws into them.
+    with WORLD_CACHE_LOCK:
+        previous = WORLD_CACHE.pop(key, None)
+        if previous:
+            WORLD_CACHE_STATS.bytes -= len(previous[0]) + starfield_bytes(previous[1])
+        WORLD_CACHE[key] = blob, stars
+        WORLD_CACHE_STATS.bytes += len(blob) + starfield_bytes(stars)
+        while WORLD_CACHE_STATS.bytes > WORLD_CACHE_BUDGET and len(WORLD_CACHE) > 1:
+            _, (evicted_blob, evicted_stars) = WORLD_CACHE.popitem(last=False)
+            WORLD_CACHE_STATS.bytes -= len(evicted_blob) + starfield_bytes(evicted_stars)
+            WORLD_CACHE_STATS.evictions += 1
+
+
+def read_cached_world(seed):
+    # Safe off the main thread: a disk hit comes back with its star lists
+    # and blob, and finish_static builds the surfaces and remembers it.
+    import mmap
+
+    digest = world_cache_digest()
+    key = (seed, digest)
+    start = time.perf_counter()
+    with WORLD_CACHE_LOCK:
+        entry = WORLD_CACHE.get(key)
+        if entry:
+            WORLD_CACHE.move_to_end(key)
+    if entry:
+        _, stars = entry
+        static = decode_world(entry[0], seed, digest)
+        blob = None
+        WORLD_CACHE_STATS.memory_hits += 1
+    else:
+        path = world_cache_path(seed, digest)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                static = decode_world(mapped, seed, digest)
+                blob = bytes(mapped)
+        except FileNotFoundError:
+            WORLD_CACHE_STATS.misses += 1
+            return None
+        except (OSError, ValueError, struct.error):
+            # Written by another generator version or cut short: drop it.
+            WORLD_CACHE_STATS.stale += 1
+            WORLD_CACHE_STATS.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        stars = None
+        WORLD_CACHE_STATS.disk_hits += 1
+    WORLD_CACHE_STATS.load_ms = (time.perf_counter() - start) * 1000.0
+    return static, stars, blob
+
+
+def store_world(seed, static):
+    digest = world_cache_digest()
+    blob = encode_world(seed, digest, static)
+    remember_world((seed, digest), blob, static[2])
+    path = world_cache_path(seed, digest)
+    try:
+        os.makedirs(WORLD_CACHE_DIR, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(partial, "wb") as f:
+            f.write(blob)
+        os.replace(partial, path)
+        names = [name for name in os.listdir(WORLD_CACHE_DIR) if name.endswith(".bin")]
+        if len(names) > WORLD_CACHE_DISK_MAX:
+            paths = sorted((os.path.join(WORLD_CACHE_DIR, name) for name in names), key=os.path.getmtime)
+            for old in paths[: len(paths) - WORLD_CACHE_DISK_MAX]:
+                os.remove(old)
+    except OSError:
+        pass
+
+
+def describe_world_cache():
+    stats = WORLD_CACHE_STATS
+    return (
+        f"World Cache: {len(WORLD_CACHE)} in memory {stats.bytes / (1024 * 1024):.1f} MB"
+        f"  hits {stats.memory_hits} mem {stats.disk_hits} disk  misses {stats.misses}"
+        f"  stale {stats.stale}  last load {stats.load_ms:.1f} ms"
+    )
+
+
+def describe_world_gen():
+    stats = WORLD_GEN_STATS
+    line = (
+        f"World Gen: {stats.mode} {stats.last_ms:.1f} ms  worlds {stats.worlds}"
+        f"  swap {stats.swap_ms:.2f} ms (max {stats.swap_max_ms:.2f})  swaps {stats.swaps}  waited {stats.swap_waits}"
+    )
+    if USE_UNIVERSE:
+        return line
+    planets, planets_requested, moons, moons_requested = stats.placement
+    return f"{line}  planets {planets}/{planets_requested}  moons {moons}/{moons_requested}"
+
+
+def load_state():
+    if not os.path.exists(SAVE_PATH):
+        return None
+    with open(SAVE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    with open(SAVE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def serialize_vec(vec):
+    return [vec.x, vec.y]
+
+
+def deserialize_vec(value):
+    return pygame.Vector2(value[0], value[1])
+
+
+def serialize_asteroid(asteroid):
+    return {
+        "pos": serialize_vec(asteroid.pos),
+        "vel": serialize_vec(asteroid.vel),
+        "size": asteroid.size,
+        "radius": asteroid.radius,
+        "spin": asteroid.spin,
+        "angle": asteroid.angle,
+        "shape": asteroid.shape,
+    }
+
+
+def deserialize_asteroid(data):
+    radius = data["radius"]
+    cached = ASTEROID_SHAPE_CACHE.get(radius)
+    if cached is None:
+        rng = random.Random(radius * 9176)
+        cached = make_asteroid_shape(rng, radius)
+        ASTEROID_SHAPE_CACHE[radius] = cached
+    return Asteroid(
+        pos=deserialize_vec(data["pos"]),
+        vel=deserialize_vec(data["vel"]),
+        size=data["size"],
+        radius=radius,
+        spin=data["spin"],
+        angle=data["angle"],
+        shape=cached,
+    )
+
+
+def serialize_pickup(pickup):
+    return {
+        "kind": pickup.kind,
+        "pos": serialize_vec(pickup.pos),
+        "ttl": pickup.ttl,
+        "shell_hp": pickup.shell_hp,
+    }
 
 
 def deserialize_pickup(data):
@@ -913,15 +2739,46 @@ def count_planets(landmarks):
     return sum(1 for landmark in landmarks if landmark.kind == "planet")
 
 
-def draw_vector_shape(surface, pos, angle, points, color, width=2):
+def draw_vector_shape(display, pos, angle, points, color, width=2, step=1):
     rotated = []
-    for x, y in points:
+    for x, y in points[::step]:
         vec = pygame.Vector2(x, y).rotate(angle) * CAMERA_ZOOM
         rotated.append((pos.x + vec.x, pos.y + vec.y))
-    pygame.draw.lines(surface, color, True, rotated, width)
+    queue_draw(display, "lines", color, width, True, rotated)
+
+
+def rotated_vertices(points, angle, step_deg, stride=1):
+    # Vertex lists rotated to the nearest step_deg and scaled by CAMERA_ZOOM,
+    # keyed by shape identity and zoom. The shape list is stored alongside so a
+    # recycled id() can never alias a different shape.
+    # Buckets are 360 / buckets degrees wide, which is not step_deg when the
+    # step does not divide 360; pick and render with the same width.
+    buckets = max(1, round(360 / step_deg))
+    bucket = round(angle * buckets / 360) % buckets
+    key = (id(points), bucket, stride, CAMERA_ZOOM)
+    entry = ASTEROID_ROTATION_CACHE.get(key)
+    if entry is not None and entry[0] is points:
+        ASTEROID_ROTATION_CACHE.move_to_end(key)
+        return entry[1]
+    radians = math.radians(bucket * 360 / buckets)
+    cos_a = math.cos(radians) * CAMERA_ZOOM
+    sin_a = math.sin(radians) * CAMERA_ZOOM
+    vertices = tuple((x * cos_a - y * sin_a, x * sin_a + y * cos_a) for x, y in points[::stride])
+    ASTEROID_ROTATION_CACHE[key] = (points, vertices)
+    if len(ASTEROID_ROTATION_CACHE) > ASTEROID_ROTATION_CACHE_MAX:
+        ASTEROID_ROTATION_CACHE.popitem(last=False)
+    return vertices
+
+
+def draw_asteroid(display, pos, angle, points, color, step=1):
+    if ASTEROID_ROTATION_STEP <= 0:
+        draw_vector_shape(display, pos, angle, points, color, 2, step)
+        return
+    vertices = rotated_vertices(points, angle, ASTEROID_ROTATION_STEP, step)
+    queue_draw(display, "outline", color, 2, vertices, pos.x, pos.y)
 
 
-def draw_ship(surface, pos, angle, color, scale=1.0):
+def draw_ship_lines(display, pos, angle, color, scale=1.0):
     render_radius = SHIP_RADIUS * CAMERA_ZOOM * scale
     nose = pygame.Vector2(render_radius * 1.2, 0).rotate(angle)
     left = pygame.Vector2(-render_radius, -render_radius * 0.7).rotate(angle)
@@ -931,10 +2788,10 @@ def draw_ship(surface, pos, angle, color, scale=1.0):
         (pos.x + left.x, pos.y + left.y),
         (pos.x + right.x, pos.y + right.y),
     ]
-    pygame.draw.lines(surface, color, True, points, 2)
+    queue_draw(display, "lines", color, 2, True, points)
 
 
-def draw_boss(surface, pos, angle, color, scale=1.0):
+def draw_boss_lines(display, pos, angle, color, scale=1.0):
     render_radius = SHIP_RADIUS * CAMERA_ZOOM * scale
     front = render_radius * 1.4
     rear = render_radius * 1.05
@@ -949,10 +2806,10 @@ def draw_boss(surface, pos, angle, color, scale=1.0):
         (-rear * 0.7, 0),
         (-rear, -wing),
     ]
-    draw_vector_shape(surface, pos, angle, points, color, 3)
+    draw_vector_shape(display, pos, angle, points, color, 3)
 
 
-def draw_freighter(surface, pos, angle, color):
+def draw_freighter_lines(display, pos, angle, color):
     length = FREIGHTER_RADIUS * CAMERA_ZOOM * 2.2
     half_w = FREIGHTER_RADIUS * CAMERA_ZOOM * 0.8
     nose = FREIGHTER_RADIUS * CAMERA_ZOOM * 0.5
@@ -965,7 +2822,7 @@ def draw_freighter(surface, pos, angle, color):
         (-tail, -half_w * 0.8),
         (nose, -half_w),
     ]
-    draw_vector_shape(surface, pos, angle, points, color, 4)
+    draw_vector_shape(display, pos, angle, points, color, 4)
     cargo_radius = max(2, int(FREIGHTER_RADIUS * CAMERA_ZOOM * 0.18))
     cargo_x = [-tail * 0.3, 0.0]
     cargo_y = [-half_w * 0.25, half_w * 0.25]
@@ -973,27 +2830,274 @@ def draw_freighter(surface, pos, angle, color):
     for x in cargo_x:
         for y in cargo_y:
             cargo_pos = pos + pygame.Vector2(x, y).rotate(angle)
-            pygame.draw.circle(surface, cargo_color, (int(cargo_pos.x), int(cargo_pos.y)), cargo_radius, 1)
+            queue_draw(display, "circle", cargo_color, 1, (int(cargo_pos.x), int(cargo_pos.y)), cargo_radius)
+
+
+def render_text(font, text, color):
+    key = (font, text, color)
+    surface = TEXT_CACHE.get(key)
+    if surface is not None:
+        TEXT_CACHE.move_to_end(key)
+        TEXT_CACHE_STATS.hits += 1
+        return surface
+    TEXT_CACHE_STATS.misses += 1
+    surface = font.render(text, True, color)
+    TEXT_CACHE[key] = surface
+    if len(TEXT_CACHE) > TEXT_CACHE_MAX:
+        TEXT_CACHE.popitem(last=False)
+        TEXT_CACHE_STATS.evictions += 1
+    return surface
+
+
+def render_text_faded(font, text, color, alpha):
+    # Faded copies are cached next to the glyph surface they come from, at a
+    # quantized alpha, so the shared surface itself is never modified.
+    level = max(0, min(TEXT_ALPHA_LEVELS, round(alpha * TEXT_ALPHA_LEVELS / 255)))
+    if level == TEXT_ALPHA_LEVELS:
+        return render_text(font, text, color)
+    key = (font, text, color, level)
+    surface = TEXT_CACHE.get(key)
+    if surface is not None:
+        TEXT_CACHE.move_to_end(key)
+        TEXT_CACHE_STATS.hits += 1
+        return surface
+    surface = render_text(font, text, color).copy()
+    surface.set_alpha(level * 255 // TEXT_ALPHA_LEVELS)
+    TEXT_CACHE[key] = surface
+    if len(TEXT_CACHE) > TEXT_CACHE_MAX:
+        TEXT_CACHE.popitem(last=False)
+        TEXT_CACHE_STATS.evictions += 1
+    return surface
+
+
+def describe_text_cache():
+    lookups = TEXT_CACHE_STATS.hits + TEXT_CACHE_STATS.misses
+    rate = 100.0 * TEXT_CACHE_STATS.hits / lookups if lookups else 0.0
+    return (
+        f"Text Cache: {rate:.1f}% hits  {len(TEXT_CACHE)}/{TEXT_CACHE_MAX}"
+        f"  evicted {TEXT_CACHE_STATS.evictions}"
+    )
+
+
+def render_impostor(seed, landmark, diameter):
+    # Shaded body for a planet or moon: Lambert lighting with limb darkening
+    # over seeded latitude bands, drawn on an opaque colorkeyed square.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    rng = random.Random(seed * 31 + landmark.id * 7919)
+    base = pygame.Color(*landmark.color)
+    hue, sat, val, _ = base.hsva
+    palette = []
+    for _ in range(2):
+        color = pygame.Color(0, 0, 0)
+        color.hsva = (
+            (hue + rng.uniform(-25, 25)) % 360,
+            min(100, max(0, sat * rng.uniform(0.5, 1.0))),
+            min(100, max(20, val * rng.uniform(0.45, 0.9))),
+            100,
+        )
+        palette.append((color.r, color.g, color.b))
+    tilt = math.radians(rng.uniform(-35, 35))
+    bands = [(rng.uniform(2, 11), rng.uniform(0, math.tau), rng.uniform(0.15, 0.5)) for _ in range(3)]
+
+    coords = (numpy.arange(diameter, dtype=numpy.float32) + 0.5) / (diameter / 2) - 1
+    x = coords[:, None]
+    y = coords[None, :]
+    r_sq = x * x + y * y
+    inside = r_sq <= 1.0
+    z = numpy.sqrt(numpy.clip(1.0 - r_sq, 0.0, 1.0))
+    light_x, light_y, light_z = IMPOSTOR_LIGHT
+    norm = math.sqrt(light_x * light_x + light_y * light_y + light_z * light_z)
+    lambert = numpy.clip((x * light_x + y * light_y + z * light_z) / norm, 0.0, 1.0)
+    limb = 1.0 - IMPOSTOR_LIMB_DARKENING * (1.0 - z)
+    shade = (IMPOSTOR_AMBIENT + (1.0 - IMPOSTOR_AMBIENT) * lambert) * limb
+    latitude = (y * math.cos(tilt) - x * math.sin(tilt)) / numpy.maximum(z, 0.05) * 0.35
+    band = numpy.zeros_like(r_sq)
+    for frequency, phase, weight in bands:
+        band += numpy.sin(latitude * frequency + phase) * weight
+    mix = numpy.clip(0.5 + band * 0.5, 0.0, 1.0)
+    shade *= inside
+    # Body pixels never hit the colorkey, even on the dark limb.
+    floor = inside.astype(numpy.float32)
+    rgb = numpy.empty((diameter, diameter, 3), dtype=numpy.uint8)
+    for channel in range(3):
+        low = palette[0][channel]
+        high = palette[1][channel]
+        rgb[..., channel] = numpy.clip((low + (high - low) * mix) * shade, floor, 255)
+    surface = pygame.Surface((diameter, diameter))
+    pygame.surfarray.blit_array(surface, rgb)
+    return surface
+
+
+def cache_impostor(key, surface):
+    IMPOSTOR_CACHE[key] = surface
+    IMPOSTOR_CACHE_STATS.bytes += surface.get_width() * surface.get_height() * surface.get_bytesize()
+    while IMPOSTOR_CACHE_STATS.bytes > IMPOSTOR_CACHE_BUDGET and len(IMPOSTOR_CACHE) > 1:
+        _, evicted = IMPOSTOR_CACHE.popitem(last=False)
+        IMPOSTOR_CACHE_STATS.bytes -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+        IMPOSTOR_CACHE_STATS.evictions += 1
+
+
+def run_impostor_worker():
+    # Bases are rendered and scaled copies smoothscaled here, never in the
+    # frame. A body that cannot be rendered (no numpy) stays pending, so it
+    # is not asked for again.
+    while True:
+        key, seed, landmark, diameter, base, size = IMPOSTOR_REQUESTS.get()
+        if base is None:
+            start = time.perf_counter()
+            surface = render_impostor(seed, landmark, diameter)
+            if surface is None:
+                continue
+            IMPOSTOR_CACHE_STATS.renders += 1
+            IMPOSTOR_CACHE_STATS.render_ms += (time.perf_counter() - start) * 1000.0
+        else:
+            surface = pygame.transform.smoothscale(base, size or (diameter, diameter))
+        IMPOSTOR_RESULTS.put((key, surface, base is None))
+
+
+def request_impostor(key, seed, landmark, diameter, base, size=None):
+    global IMPOSTOR_WORKER
+    if key in IMPOSTOR_PENDING:
+        return
+    if IMPOSTOR_WORKER is None:
+        IMPOSTOR_WORKER = threading.Thread(target=run_impostor_worker, name="impostors", daemon=True)
+        IMPOSTOR_WORKER.start()
+    IMPOSTOR_PENDING.add(key)
+    IMPOSTOR_CACHE_STATS.misses += 1
+    IMPOSTOR_REQUESTS.put((key, seed, landmark, diameter, base, size))
+
+
+def upload_impostors():
+    # Scaled copies inherit the converted base's format; only fresh bases
+    # need converting, and at most IMPOSTOR_UPLOADS_PER_FRAME land a frame.
+    display_ready = pygame.display.get_surface() is not None
+    for _ in range(IMPOSTOR_UPLOADS_PER_FRAME):
+        try:
+            key, surface, rendered = IMPOSTOR_RESULTS.get_nowait()
+        except queue.Empty:
+            break
+        IMPOSTOR_PENDING.discard(key)
+        if rendered and display_ready:
+            surface = surface.convert()
+        surface.set_colorkey(IMPOSTOR_COLORKEY)
+        if len(key) == 5:
+            # A close-up part; one the view has already moved past is dropped.
+            closeup = IMPOSTOR_CLOSEUPS.get(key[:3])
+            if closeup and closeup["want"] == key:
+                closeup["key"] = key
+                closeup["surface"] = surface
+            continue
+        cache_impostor(key, surface)
+
+
+def impostor_for(seed, landmark, diameter):
+    # Bodies are rendered once per seed at a few base sizes; each on-screen
+    # size is a smoothscaled copy of the next base up. Both live in one LRU
+    # bounded by IMPOSTOR_CACHE_BUDGET bytes. Either is made on the worker:
+    # until it lands this returns None and the body is not drawn.
+    # Planets and moons are numbered from the same base, so ids alone collide.
+    key = (seed, landmark.kind, landmark.id, diameter)
+    surface = IMPOSTOR_CACHE.get(key)
+    if surface is not None:
+        IMPOSTOR_CACHE.move_to_end(key)
+        IMPOSTOR_CACHE_STATS.hits += 1
+        return surface
+    base_diameter = next((size for size in IMPOSTOR_BASE_DIAMETERS if size >= diameter), IMPOSTOR_BASE_DIAMETERS[-1])
+    base_key = (seed, landmark.kind, landmark.id, base_diameter)
+    base = IMPOSTOR_CACHE.get(base_key)
+    if base is None:
+        request_impostor(base_key, seed, landmark, base_diameter, None)
+        return None
+    IMPOSTOR_CACHE.move_to_end(base_key)
+    request_impostor(key, seed, landmark, diameter, base)
+    return None
+
+
+def draw_impostor_closeup(surface, seed, landmark, dest, visible):
+    # Too big to keep whole, so only the part on screen is smoothscaled up
+    # from the largest base, on the worker like any other copy. The part is
+    # snapped out to IMPOSTOR_CLOSEUP_TILE base pixels so it stays valid while
+    # the view moves inside it, and the last one is drawn until the next
+    # lands. Only the IMPOSTOR_CLOSEUP_MAX most recent bodies keep theirs.
+    base_diameter = IMPOSTOR_BASE_DIAMETERS[-1]
+    base = impostor_for(seed, landmark, base_diameter)
+    if base is None:
+        return
+    diameter = dest.width
+    scale = diameter / base_diameter
+    tile = IMPOSTOR_CLOSEUP_TILE
+    left = int((visible.left - dest.left) / scale) // tile * tile
+    top = int((visible.top - dest.top) / scale) // tile * tile
+    right = min(base_diameter, math.ceil((visible.right - dest.left) / scale / tile) * tile)
+    bottom = min(base_diameter, math.ceil((visible.bottom - dest.top) / scale / tile) * tile)
+    body = (seed, landmark.kind, landmark.id)
+    key = body + (diameter, (left, top, right, bottom))
+    closeup = IMPOSTOR_CLOSEUPS.get(body)
+    if closeup is None:
+        closeup = IMPOSTOR_CLOSEUPS[body] = {"want": None, "key": None, "surface": None}
+        while len(IMPOSTOR_CLOSEUPS) > IMPOSTOR_CLOSEUP_MAX:
+            IMPOSTOR_CLOSEUPS.popitem(last=False)
+    IMPOSTOR_CLOSEUPS.move_to_end(body)
+    if closeup["key"] != key and key not in IMPOSTOR_PENDING:
+        closeup["want"] = key
+        part = base.subsurface((left, top, right - left, bottom - top))
+        size = (round((right - left) * scale), round((bottom - top) * scale))
+        request_impostor(key, seed, landmark, diameter, part, size)
+    if closeup["surface"] is None or closeup["key"][3] != diameter:
+        return
+    left, top, _, _ = closeup["key"][4]
+    surface.blit(closeup["surface"], (dest.left + round(left * scale), dest.top + round(top * scale)))
+
+
+def draw_impostor(surface, seed, landmark, center, radius):
+    diameter = int(radius * 2)
+    if diameter < IMPOSTOR_MIN_DIAMETER:
+        return
+    dest = pygame.Rect(0, 0, diameter, diameter)
+    dest.center = (int(center.x), int(center.y))
+    visible = dest.clip(surface.get_rect())
+    if diameter > IMPOSTOR_MAX_DIAMETER:
+        if visible.width and visible.height:
+            draw_impostor_closeup(surface, seed, landmark, dest, visible)
+        return
+    body = impostor_for(seed, landmark, diameter)
+    if body is None:
+        return
+    if visible.width and visible.height:
+        surface.blit(body, visible.topleft, visible.move(-dest.x, -dest.y))
+
+
+def describe_impostor_cache():
+    stats = IMPOSTOR_CACHE_STATS
+    return (
+        f"Impostors: {len(IMPOSTOR_CACHE)} cached  {stats.bytes / (1024 * 1024):.0f}/"
+        f"{IMPOSTOR_CACHE_BUDGET // (1024 * 1024)} MB  renders {stats.renders} ({stats.render_ms:.0f} ms)"
+        f"  pending {len(IMPOSTOR_PENDING)}  evicted {stats.evictions}"
+    )
 
 
 def draw_edge_arrow(surface, direction, color):
+    width, height = surface.get_size()
     if direction.length_squared() == 0:
         return
     dir_norm = direction.normalize()
     margin = 18
-    half_w = WIDTH / 2 - margin
-    half_h = HEIGHT / 2 - margin
+    half_w = width / 2 - margin
+    half_h = height / 2 - margin
     tx = float("inf") if dir_norm.x == 0 else half_w / abs(dir_norm.x)
     ty = float("inf") if dir_norm.y == 0 else half_h / abs(dir_norm.y)
     t = min(tx, ty)
-    tip = pygame.Vector2(WIDTH / 2, HEIGHT / 2) + dir_norm * t
+    tip = pygame.Vector2(width / 2, height / 2) + dir_norm * t
     size = 14
     left = tip - dir_norm * size + dir_norm.rotate(90) * (size * 0.6)
     right = tip - dir_norm * size + dir_norm.rotate(-90) * (size * 0.6)
     pygame.draw.polygon(surface, color, [(tip.x, tip.y), (left.x, left.y), (right.x, right.y)], 2)
 
 
-def draw_thruster(surface, pos, angle, color, scale=1.0, back_mult=1.7):
+def draw_thruster_lines(display, pos, angle, color, scale=1.0, back_mult=1.7):
     render_radius = SHIP_RADIUS * CAMERA_ZOOM
     back = pygame.Vector2(-render_radius * back_mult, 0).rotate(angle)
     perp = pygame.Vector2(0, render_radius * 0.35).rotate(angle)
@@ -1003,51 +3107,2373 @@ def draw_thruster(surface, pos, angle, color, scale=1.0, back_mult=1.7):
     for length, offset in zip(lengths, offsets):
         start = base + perp * offset
         end = start + pygame.Vector2(-length, 0).rotate(angle)
-        pygame.draw.line(surface, color, start, end, 2)
+        queue_draw(display, "line", color, 2, start, end)
+
+
+def sprite_for(draw_lines, extent, angle, color, params):
+    # Pre-rendered line art at a quantized heading. The sprite is drawn by the
+    # same *_lines function onto a small transparent surface, so the two
+    # paths only differ by heading snapping and whole-pixel placement.
+    buckets = max(1, round(360 / SPRITE_HEADING_STEP))
+    bucket = round(angle / SPRITE_HEADING_STEP) % buckets
+    key = (draw_lines, bucket, color, params, CAMERA_ZOOM)
+    sprite = SPRITE_CACHE.get(key)
+    if sprite is not None:
+        SPRITE_CACHE.move_to_end(key)
+        return sprite
+    half = math.ceil(extent) + 3
+    sprite = pygame.Surface((half * 2, half * 2))
+    sprite.fill(SPRITE_COLORKEY)
+    sketch = DisplayList()
+    draw_lines(sketch, pygame.Vector2(half, half), bucket * 360 / buckets, color, *params)
+    flush_display_list(sprite, sketch)
+    sprite.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+    SPRITE_CACHE[key] = sprite
+    if len(SPRITE_CACHE) > SPRITE_CACHE_MAX:
+        SPRITE_CACHE.popitem(last=False)
+    return sprite
+
+
+def blit_sprite(display, pos, draw_lines, extent, angle, color, *params):
+    sprite = sprite_for(draw_lines, extent, angle, color, params)
+    half = sprite.get_width() // 2
+    queue_draw(display, "blit", None, 0, sprite, (round(pos.x) - half, round(pos.y) - half))
+
+
+def draw_ship(display, pos, angle, color, scale=1.0):
+    if USE_SPRITES:
+        blit_sprite(display, pos, draw_ship_lines, SHIP_RADIUS * CAMERA_ZOOM * scale * 1.25, angle, color, scale)
+    else:
+        draw_ship_lines(display, pos, angle, color, scale)
+
+
+def draw_boss(display, pos, angle, color, scale=1.0):
+    if USE_SPRITES:
+        extent = SHIP_RADIUS * CAMERA_ZOOM * scale * 1.5 * CAMERA_ZOOM
+        blit_sprite(display, pos, draw_boss_lines, extent, angle, color, scale)
+    else:
+        draw_boss_lines(display, pos, angle, color, scale)
+
+
+def draw_freighter(display, pos, angle, color):
+    if USE_SPRITES:
+        # The hull goes through draw_vector_shape and so is scaled by the zoom
+        # twice, like the boss; its farthest vertex is about 1.27 radii out.
+        # The cargo pods are scaled once and reach 0.57 radii.
+        extent = FREIGHTER_RADIUS * CAMERA_ZOOM * max(1.3 * CAMERA_ZOOM, 0.6)
+        blit_sprite(display, pos, draw_freighter_lines, extent, angle, color)
+    else:
+        draw_freighter_lines(display, pos, angle, color)
+
+
+def draw_thruster(display, pos, angle, color, scale=1.0, back_mult=1.7):
+    if USE_SPRITES:
+        extent = SHIP_RADIUS * CAMERA_ZOOM * (back_mult + 1.8 * scale + 0.5)
+        blit_sprite(display, pos, draw_thruster_lines, extent, angle, color, scale, back_mult)
+    else:
+        draw_thruster_lines(display, pos, angle, color, scale, back_mult)
+
+
+def draw_stop_thruster(display, pos, angle, color, side="both"):
+    render_radius = SHIP_RADIUS * CAMERA_ZOOM
+    side_vec = pygame.Vector2(0, render_radius * 1.35).rotate(angle)
+    forward = pygame.Vector2(render_radius * 1.1, 0).rotate(angle)
+    lengths = [render_radius * 0.75, render_radius * 0.5]
+    offsets = [0.0, render_radius * 0.2]
+    for length, offset in zip(lengths, offsets):
+        left_start = pos - side_vec + forward * offset
+        right_start = pos + side_vec + forward * offset
+        left_end = left_start - side_vec.normalize() * length
+        right_end = right_start + side_vec.normalize() * length
+        if side in ("left", "both"):
+            queue_draw(display, "line", color, 2, left_start, left_end)
+        if side in ("right", "both"):
+            queue_draw(display, "line", color, 2, right_start, right_end)
+
+
+def draw_mine(display, pos, radius, color, core_color):
+    points = []
+    for i in range(5):
+        angle = math.radians(72 * i - 90)
+        points.append((pos.x + math.cos(angle) * radius, pos.y + math.sin(angle) * radius))
+    queue_draw(display, "polygon", color, 2, points)
+    queue_draw(display, "circle", core_color, 0, (int(pos.x), int(pos.y)), max(2, int(radius * 0.35)))
+
+
+def new_game_state(seed):
+    asteroids, pickups, enemies, landmarks, stars, freighters, boss, boss_escorts = new_world(seed)
+    state = GameState(
+        seed=seed,
+        asteroids=asteroids,
+        pickups=pickups,
+        enemies=enemies,
+        landmarks=landmarks,
+        freighters=freighters,
+        boss=boss,
+        boss_escorts=boss_escorts,
+        planet_total=count_planets(landmarks),
+        universe=Universe() if USE_UNIVERSE else None,
+    )
+    return state, stars
+
+
+def reset_world(state, seed, world=None):
+    if world is None:
+        world = new_world(seed)
+    asteroids, pickups, enemies, landmarks, stars, freighters, boss, boss_escorts = world
+    state.seed = seed
+    state.asteroids = asteroids
+    state.pickups = pickups
+    state.enemies = enemies
+    state.landmarks = landmarks
+    state.freighters = freighters
+    state.boss = boss
+    state.boss_escorts = boss_escorts
+    state.universe = Universe() if USE_UNIVERSE else None
+    state.bullets = []
+    state.enemy_bullets = []
+    state.bullet_pool = []
+    state.enemy_bullet_pool = []
+    state.damage_popups = []
+    state.damage_popup_pool = []
+    state.beacons = {}
+    state.enemy_shards = []
+    state.enemy_shard_pool = []
+    state.mines = []
+    state.spawn_queue = SpawnQueue()
+    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+    state.ship_vel = pygame.Vector2(0, 0)
+    state.ship_angle = -90
+    state.planet_total = count_planets(landmarks)
+    state.score = 0
+    state.lives = 3
+    state.shield_time = 10.0
+    state.shield_size_mult = 3.0
+    state.shield_stock = 0
+    state.rapid_time = 0.0
+    state.rapid_stock = 0
+    state.spread_time = 0.0
+    state.spread_stock = 0
+    state.mine_stock = 0
+    state.boost_time = 0.0
+    state.boost_stock = 0
+    state.mine_cooldown = 0.0
+    state.game_over = False
+    state.last_death_cause = None
+    state.discovered_planets = set()
+    state.enemies_destroyed = 0
+    state.boosts_used = 0
+    state.boss_defeated = False
+    return stars
+
+
+def build_save_state(state):
+    data = {
+        "seed": state.seed,
+        "player": {
+            "pos": serialize_vec(state.ship_pos),
+            "vel": serialize_vec(state.ship_vel),
+            "angle": state.ship_angle,
+            "score": state.score,
+            "lives": state.lives,
+            "shield_time": state.shield_time,
+            "shield_stock": state.shield_stock,
+            "rapid_time": state.rapid_time,
+            "rapid_stock": state.rapid_stock,
+            "spread_time": state.spread_time,
+            "spread_stock": state.spread_stock,
+            "mine_stock": state.mine_stock,
+            "boost_time": state.boost_time,
+            "boost_stock": state.boost_stock,
+        },
+        "asteroids": [serialize_asteroid(a) for a in state.asteroids],
+        # Universe pickups are rebuilt from their sectors and diffs.
+        "pickups": [] if state.universe else [serialize_pickup(p) for p in state.pickups],
+        "discovered_planets": sorted(state.discovered_planets),
+        "objectives": {
+            "boss_defeated": state.boss_defeated,
+            "enemies_destroyed": state.enemies_destroyed,
+            "boosts_used": state.boosts_used,
+        },
+    }
+    if state.universe:
+        data["universe"] = universe_diffs(state)
+    return data
+
+
+def load_world(state, data):
+    seed = data["seed"]
+    state.seed = seed
+    state.asteroids = [deserialize_asteroid(a) for a in data["asteroids"]]
+    state.pickups = [deserialize_pickup(p) for p in data["pickups"]]
+    state.bullet_pool = []
+    state.enemy_bullet_pool = []
+    state.damage_popups = []
+    state.damage_popup_pool = []
+    state.beacons = {}
+    state.enemy_shards = []
+    state.enemy_shard_pool = []
+    state.mines = []
+    state.spawn_queue = SpawnQueue()
+    # Asteroids and pickups come from the save; the rest of the seed's world
+    # is the same as a fresh start, so take it from the cache when it is there.
+    state.enemies, state.landmarks, stars, state.freighters, state.boss, state.boss_escorts = new_world_static(seed)
+    state.planet_total = count_planets(state.landmarks)
+    WORLD_GEN_STATS.placement = landmark_placement(state.landmarks)
+    state.universe = None
+    if USE_UNIVERSE:
+        state.universe = Universe(diffs=load_universe_diffs(data.get("universe", [])))
+        state.pickups = []
+    player = data["player"]
+    state.ship_pos = deserialize_vec(player["pos"])
+    state.ship_vel = deserialize_vec(player["vel"])
+    state.ship_angle = player["angle"]
+    state.score = player["score"]
+    state.lives = player["lives"]
+    state.shield_time = player["shield_time"]
+    state.shield_stock = player.get("shield_stock", 0)
+    state.rapid_time = player["rapid_time"]
+    state.rapid_stock = player.get("rapid_stock", 0)
+    state.spread_time = player.get("spread_time", 0.0)
+    state.spread_stock = player.get("spread_stock", 0)
+    state.mine_stock = player.get("mine_stock", 0)
+    state.boost_time = player.get("boost_time", 0.0)
+    state.boost_stock = player.get("boost_stock", 0)
+    state.mine_cooldown = 0.0
+    state.shield_size_mult = 1.0
+    state.game_over = False
+    state.last_death_cause = None
+    state.discovered_planets = set(data.get("discovered_planets", []))
+    objectives = data.get("objectives", {})
+    state.boss_defeated = objectives.get("boss_defeated", False)
+    state.enemies_destroyed = objectives.get("enemies_destroyed", 0)
+    state.boosts_used = objectives.get("boosts_used", 0)
+    return stars
+
+
+def sound_volume(world_pos, listener_pos, base_volume=1.0):
+    if world_pos is None:
+        return base_volume
+    dist = (world_pos - listener_pos).length()
+    if dist <= SOUND_NEAR_RADIUS:
+        return base_volume
+    if dist >= SOUND_FAR_RADIUS:
+        return 0.0
+    t = (SOUND_FAR_RADIUS - dist) / (SOUND_FAR_RADIUS - SOUND_NEAR_RADIUS)
+    return base_volume * t
+
+
+def emit_sound(state, name, world_pos=None):
+    # The simulation only records sounds; whoever presents the frame plays
+    # them. Volume is resolved here, against the ship position at the moment
+    # of the event, which may be reset by a death later in the same step.
+    state.sound_events.append((name, sound_volume(world_pos, state.ship_pos)))
+
+
+def make_beacon(seed, landmark):
+    rng = random.Random(seed + landmark.id * 7919)
+    offset = pygame.Vector2(
+        rng.uniform(landmark.radius + BEACON_OFFSET_MIN, landmark.radius + BEACON_OFFSET_MAX), 0
+    ).rotate(rng.uniform(0, 360))
+    beacon_pos = clamp_position(landmark.pos + offset)
+    return {
+        "pos": beacon_pos,
+        "code": make_beacon_id(rng),
+    }
+
+
+def apply_game_action(state, action):
+    if action == "toggle_god":
+        state.god_mode = not state.god_mode
+        if state.god_mode:
+            state.shield_stock += 4
+            state.rapid_stock += 4
+            state.spread_stock += 4
+            state.mine_stock += 4
+            state.boost_stock += 4
+    elif state.game_over:
+        return
+    elif action == "shield":
+        if state.shield_stock > 0 and state.shield_time <= 0:
+            state.shield_stock -= 1
+            state.shield_time = POWERUP_TIME
+            state.shield_size_mult = 1.0
+            emit_sound(state, "shield")
+    elif action == "spread":
+        if state.spread_stock > 0 and state.spread_time <= 0:
+            state.spread_stock -= 1
+            state.spread_time = SPREAD_TIME
+    elif action == "mine":
+        if state.mine_stock > 0 and state.mine_cooldown <= 0:
+            state.mines.append({"pos": pygame.Vector2(state.ship_pos), "ttl": MINE_TTL})
+            state.mine_stock -= 1
+            state.mine_cooldown = MINE_DROP_COOLDOWN
+    elif action == "rapid":
+        if state.rapid_stock > 0 and state.rapid_time <= 0:
+            state.rapid_stock -= 1
+            state.rapid_time = POWERUP_TIME
+    elif action == "boost":
+        if state.boost_stock > 0 and state.boost_time <= 0:
+            state.boost_stock -= 1
+            state.boost_time = BOOST_TIME
+            state.boosts_used += 1
+
+
+def read_controls(keys, joystick):
+    controls = Controls()
+    hat_x = 0
+    hat_y = 0
+    fire_button = False
+    stop_button = False
+    thrust_button = False
+    axis_x = 0.0
+    axis_y = 0.0
+    axis_lt = -1.0
+    axis_rt = -1.0
+    axis_values = []
+    if joystick:
+        button_count = joystick.get_numbuttons()
+        if button_count > D_PAD_RIGHT:
+            dpad_left = joystick.get_button(D_PAD_LEFT)
+            dpad_right = joystick.get_button(D_PAD_RIGHT)
+            dpad_up = joystick.get_button(D_PAD_UP)
+            dpad_down = joystick.get_button(D_PAD_DOWN)
+            hat_x = -1 if dpad_left else (1 if dpad_right else 0)
+            hat_y = 1 if dpad_up else (-1 if dpad_down else 0)
+        elif joystick.get_numhats() > 0:
+            hat = joystick.get_hat(0)
+            hat_x, hat_y = hat[0], hat[1]
+        if joystick.get_numaxes() > 0:
+            axis_values = [joystick.get_axis(i) for i in range(joystick.get_numaxes())]
+            if len(axis_values) > JOY_AXIS_LX:
+                axis_x = axis_values[JOY_AXIS_LX]
+            if len(axis_values) > JOY_AXIS_LY:
+                axis_y = axis_values[JOY_AXIS_LY]
+            if len(axis_values) > JOY_AXIS_LT:
+                axis_lt = axis_values[JOY_AXIS_LT]
+            if len(axis_values) > JOY_AXIS_RT:
+                axis_rt = axis_values[JOY_AXIS_RT]
+        fire_button = joystick.get_button(BTN_X) if button_count > BTN_X else False
+        stop_button = joystick.get_button(BTN_L1) if button_count > BTN_L1 else False
+        thrust_button = joystick.get_button(BTN_R1) if button_count > BTN_R1 else False
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        controls.turn -= 1
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        controls.turn += 1
+    if keys[pygame.K_UP] or keys[pygame.K_w]:
+        controls.thrusting = True
+    if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        controls.reversing = True
+    if keys[pygame.K_q]:
+        controls.strafe_left = True
+    if keys[pygame.K_e]:
+        controls.strafe_right = True
+    if keys[pygame.K_LSHIFT]:
+        controls.stopping = True
+    if joystick and thrust_button:
+        controls.thrusting = True
+    if hat_x < 0:
+        controls.turn -= 1
+    if hat_x > 0:
+        controls.turn += 1
+    if hat_y > 0:
+        controls.thrusting = True
+    if hat_y < 0:
+        controls.reversing = True
+    if hat_x == 0 and hat_y == 0:
+        if axis_x < -JOY_AXIS_DEADZONE:
+            controls.turn -= 1
+        if axis_x > JOY_AXIS_DEADZONE:
+            controls.turn += 1
+        if axis_y > JOY_AXIS_DEADZONE:
+            controls.reversing = True
+    if axis_lt > JOY_AXIS_DEADZONE:
+        controls.strafe_left = True
+    if axis_rt > JOY_AXIS_DEADZONE:
+        controls.strafe_right = True
+    if stop_button:
+        controls.stopping = True
+    controls.firing = bool(keys[pygame.K_SPACE] or fire_button)
+    return controls
+
+
+def step_game(state, controls, dt, quality):
+    if state.universe:
+        update_universe(state)
+    ship_prev = pygame.Vector2(state.ship_pos)
+    shield_prev = state.shield_time
+    popup_limit = max(1, int(DAMAGE_POPUP_MAX * quality["popups"]))
+    shard_limit = max(3, int(ENEMY_SHARD_MAX * quality["shards"]))
+    state.strafe_left = False
+    state.strafe_right = False
+    if not state.game_over:
+        turn = controls.turn
+        thrusting = controls.thrusting
+        reversing = controls.reversing
+        stopping = controls.stopping
+        state.strafe_left = controls.strafe_left
+        state.strafe_right = controls.strafe_right
+        state.thrusting_render = thrusting
+        state.stopping_render = stopping
+        if state.stopping_render and not state.stop_thruster_held:
+            state.stop_thruster_timer = STOP_THRUSTER_TTL
+        state.stop_thruster_held = state.stopping_render
+
+        boost_multiplier = BOOST_MULTIPLIER if state.boost_time > 0 else 1.0
+        state.ship_angle += turn * SHIP_TURN_SPEED * dt
+        if thrusting:
+            state.ship_vel += angle_to_vector(state.ship_angle) * (SHIP_THRUST * boost_multiplier) * dt
+        if reversing:
+            forward = angle_to_vector(state.ship_angle)
+            forward_speed = state.ship_vel.dot(forward)
+            if forward_speed > 10:
+                state.ship_vel -= state.ship_vel.normalize() * SHIP_BRAKE * dt
+            else:
+                state.ship_vel -= forward * SHIP_REVERSE_THRUST * dt
+        if state.strafe_left:
+            state.ship_vel += angle_to_vector(state.ship_angle - 90) * (SHIP_THRUST * boost_multiplier) * dt
+        if state.strafe_right:
+            state.ship_vel += angle_to_vector(state.ship_angle + 90) * (SHIP_THRUST * boost_multiplier) * dt
+        if stopping:
+            state.ship_vel *= max(0.0, 1.0 - SHIP_STOP_DAMP * dt)
+
+        max_speed = SHIP_MAX_SPEED * boost_multiplier
+        if state.ship_vel.length() > max_speed:
+            state.ship_vel.scale_to_length(max_speed)
+
+        new_pos = state.ship_pos + state.ship_vel * dt
+        state.ship_pos = clamp_position(new_pos, SHIP_RADIUS)
+        ship_prev = pygame.Vector2(state.ship_pos)
+
+        state.fire_timer = max(0.0, state.fire_timer - dt)
+        state.player_attack_timer = max(0.0, state.player_attack_timer - dt)
+        rapid_multiplier = 0.55 if state.rapid_time > 0 else 1.0
+        cooldown = FIRE_COOLDOWN * rapid_multiplier
+        if controls.firing and state.fire_timer <= 0.0:
+            angles = [state.ship_angle]
+            if state.spread_time > 0:
+                angles = [state.ship_angle - SPREAD_ANGLE, state.ship_angle, state.ship_angle + SPREAD_ANGLE]
+            for angle in angles:
+                bullet_vel = angle_to_vector(angle) * BULLET_SPEED + state.ship_vel * 0.35
+                if state.bullet_pool:
+                    bullet = state.bullet_pool.pop()
+                    bullet["pos"].update(state.ship_pos)
+                    bullet["vel"].update(bullet_vel)
+                    bullet["ttl"] = BULLET_TTL
+                else:
+                    bullet = {"pos": pygame.Vector2(state.ship_pos), "vel": bullet_vel, "ttl": BULLET_TTL}
+                state.bullets.append(bullet)
+            emit_sound(state, "shoot")
+            state.player_attack_timer = PLAYER_ATTACK_MEMORY
+            state.fire_timer = cooldown
+
+    if state.god_mode:
+        state.shield_time = 10.0
+        state.shield_size_mult = 3.0
+    else:
+        state.shield_time = max(0.0, state.shield_time - dt)
+        if state.shield_time <= 0 and state.shield_size_mult != 1.0:
+            state.shield_size_mult = 1.0
+    state.rapid_time = max(0.0, state.rapid_time - dt)
+    state.spread_time = max(0.0, state.spread_time - dt)
+    state.boost_time = max(0.0, state.boost_time - dt)
+    state.mine_cooldown = max(0.0, state.mine_cooldown - dt)
+    state.stop_thruster_timer = max(0.0, state.stop_thruster_timer - dt)
+
+    for i in range(len(state.bullets) - 1, -1, -1):
+        bullet = state.bullets[i]
+        bullet["pos"] += bullet["vel"] * dt
+        bullet["ttl"] -= dt
+        if bullet["ttl"] <= 0:
+            state.bullets.pop(i)
+            state.bullet_pool.append(bullet)
+
+    for i in range(len(state.enemy_bullets) - 1, -1, -1):
+        bullet = state.enemy_bullets[i]
+        bullet["pos"] += bullet["vel"] * dt
+        bullet["ttl"] -= dt
+        if bullet["ttl"] <= 0:
+            state.enemy_bullets.pop(i)
+            state.enemy_bullet_pool.append(bullet)
+
+    for i in range(len(state.enemy_shards) - 1, -1, -1):
+        shard = state.enemy_shards[i]
+        shard["start"] += shard["vel"] * dt
+        shard["end"] += shard["vel"] * dt
+        shard["ttl"] -= dt
+        if shard["ttl"] <= 0:
+            state.enemy_shards.pop(i)
+            state.enemy_shard_pool.append(shard)
+
+    for asteroid in state.asteroids:
+        asteroid.pos += asteroid.vel * dt
+        asteroid.angle += asteroid.spin * dt
+        if asteroid.pos.x < asteroid.radius:
+            asteroid.pos.x = asteroid.radius
+            asteroid.vel.x = abs(asteroid.vel.x)
+        elif asteroid.pos.x > WORLD_WIDTH - asteroid.radius:
+            asteroid.pos.x = WORLD_WIDTH - asteroid.radius
+            asteroid.vel.x = -abs(asteroid.vel.x)
+        if asteroid.pos.y < asteroid.radius:
+            asteroid.pos.y = asteroid.radius
+            asteroid.vel.y = abs(asteroid.vel.y)
+        elif asteroid.pos.y > WORLD_HEIGHT - asteroid.radius:
+            asteroid.pos.y = WORLD_HEIGHT - asteroid.radius
+            asteroid.vel.y = -abs(asteroid.vel.y)
+
+    for i in range(len(state.damage_popups) - 1, -1, -1):
+        popup = state.damage_popups[i]
+        popup["pos"] += popup["vel"] * dt
+        popup["ttl"] -= dt
+        if popup["ttl"] <= 0:
+            state.damage_popups.pop(i)
+            state.damage_popup_pool.append(popup)
+
+    # Counting and despawn radii stretch by as much as the spawn rings do,
+    # so a zoomed-out view does not keep topping up the same neighbourhood.
+    enemy_reach = spawn_ring_radius(ENEMY_SPAWN_RADIUS, ENEMY_OFFSCREEN_MARGIN, ENEMY_SPAWN_BUFFER) - ENEMY_SPAWN_RADIUS
+    asteroid_reach = (
+        spawn_ring_radius(ASTEROID_SPAWN_RADIUS, ASTEROID_OFFSCREEN_MARGIN, ASTEROID_SPAWN_BUFFER) - ASTEROID_SPAWN_RADIUS
+    )
+    state.enemy_spawn_timer -= dt
+    if state.enemy_spawn_timer <= 0:
+        state.enemy_spawn_timer = ENEMY_SPAWN_INTERVAL
+        radius_sq = (ENEMY_NEARBY_RADIUS + enemy_reach) ** 2
+        nearby = 0
+        for enemy in state.enemies:
+            if (enemy.pos - state.ship_pos).length_squared() <= radius_sq:
+                nearby += 1
+        deficit = ENEMY_NEARBY_TARGET - nearby - pending_spawns(state.spawn_queue, "enemy")
+        if deficit > 0:
+            rng = random.Random(state.seed + state.score + int(time.time()))
+            queue_spawns(state.spawn_queue, "enemy", min(SPAWN_BURST_MAX, deficit), ENEMY_NEARBY_RADIUS, rng)
+    despawn_sq = (ENEMY_DESPAWN_RADIUS + enemy_reach) ** 2
+    for enemy in state.enemies[:]:
+        if enemy.escort:
+            continue
+        if (enemy.pos - state.ship_pos).length_squared() > despawn_sq:
+            remove_enemy(state.enemies, enemy, state.boss_escorts)
+
+    state.asteroid_spawn_timer -= dt
+    if state.asteroid_spawn_timer <= 0:
+        state.asteroid_spawn_timer = ASTEROID_SPAWN_INTERVAL
+        nearby = 0
+        radius_sq = (ASTEROID_NEARBY_RADIUS + asteroid_reach) ** 2
+        for asteroid in state.asteroids:
+            if (asteroid.pos - state.ship_pos).length_squared() <= radius_sq:
+                nearby += 1
+        deficit = ASTEROID_NEARBY_TARGET - nearby - pending_spawns(state.spawn_queue, "asteroid")
+        if deficit > 0:
+            rng = random.Random(state.seed + state.score + int(time.time()))
+            queue_spawns(state.spawn_queue, "asteroid", min(SPAWN_BURST_MAX, deficit), ASTEROID_NEARBY_RADIUS, rng)
+    run_spawn_queue(state.spawn_queue, state.ship_pos, state.landmarks, state.asteroids, state.enemies)
+
+    state.boss_escorts = [enemy for enemy in state.enemies if enemy.escort]
+    state.escorts_alive = len(state.boss_escorts) > 0
+    formation_active = False
+    escorts_pursuing = False
+    if state.boss and state.escorts_alive:
+        within_pursue_radius = False
+        for escort in state.boss_escorts:
+            if (state.ship_pos - escort.pos).length_squared() <= ENEMY_PURSUE_RADIUS * ENEMY_PURSUE_RADIUS:
+                within_pursue_radius = True
+                break
+        if not within_pursue_radius:
+            state.escorts_alerted = False
+        escorts_pursuing = state.escorts_alerted
+    if state.boss:
+        to_player = state.ship_pos - state.boss.pos
+        formation_active = state.escorts_alive and not escorts_pursuing
+        if state.escorts_alive and escorts_pursuing:
+            state.boss.vel = pygame.Vector2(0, 0)
+            if to_player.length_squared() > 0:
+                state.boss.angle = turn_towards(state.boss.angle, vector_to_angle(to_player), BOSS_TURN_SPEED * dt)
+        elif state.escorts_alive:
+            target = state.boss.patrol_points[state.boss.patrol_index]
+            to_target = target - state.boss.pos
+            if to_target.length_squared() <= BOSS_PATROL_NODE_RADIUS * BOSS_PATROL_NODE_RADIUS:
+                state.boss.patrol_index = (state.boss.patrol_index + 1) % len(state.boss.patrol_points)
+                target = state.boss.patrol_points[state.boss.patrol_index]
+                to_target = target - state.boss.pos
+            if to_target.length_squared() > 0:
+                target_angle = vector_to_angle(to_target)
+                state.boss.angle = turn_towards(state.boss.angle, target_angle, BOSS_TURN_SPEED * dt)
+                state.boss.vel = angle_to_vector(state.boss.angle) * BOSS_PATROL_SPEED
+            else:
+                state.boss.vel = pygame.Vector2(0, 0)
+            state.boss.pos += state.boss.vel * dt
+        else:
+            if to_player.length_squared() > 0:
+                target_angle = vector_to_angle(to_player)
+                state.boss.angle = turn_towards(state.boss.angle, target_angle, BOSS_TURN_SPEED * dt)
+            if to_player.length_squared() <= BOSS_HOLD_RADIUS * BOSS_HOLD_RADIUS:
+                state.boss.vel = pygame.Vector2(0, 0)
+            else:
+                state.boss.vel = angle_to_vector(state.boss.angle) * (SHIP_MAX_SPEED * 0.5)
+            state.boss.pos += state.boss.vel * dt
+            state.boss.fire_timer = max(0.0, state.boss.fire_timer - dt)
+            if state.boss.fire_timer <= 0.0:
+                bullet_vel = angle_to_vector(state.boss.angle) * BOSS_BULLET_SPEED + state.boss.vel * 0.2
+                if state.enemy_bullet_pool:
+                    bullet = state.enemy_bullet_pool.pop()
+                    bullet["pos"].update(state.boss.pos)
+                    bullet["vel"].update(bullet_vel)
+                    bullet["ttl"] = ENEMY_BULLET_TTL
+                    bullet["radius"] = BOSS_BULLET_RADIUS
+                else:
+                    bullet = {
+                        "pos": pygame.Vector2(state.boss.pos),
+                        "vel": bullet_vel,
+                        "ttl": ENEMY_BULLET_TTL,
+                        "radius": BOSS_BULLET_RADIUS,
+                    }
+                state.enemy_bullets.append(bullet)
+                state.boss.fire_timer = BOSS_FIRE_COOLDOWN
+        state.boss.pos = clamp_position(state.boss.pos, BOSS_RADIUS)
+
+    far_ai_interval = quality["far_ai_interval"]
+    for enemy in state.enemies[:]:
+        escort_override = False
+        dist_sq = 0.0
+        if state.boss and formation_active and enemy.escort:
+            desired_pos = state.boss.pos + enemy.escort_offset.rotate(state.boss.angle)
+            to_desired = desired_pos - enemy.pos
+            dist = to_desired.length()
+            if dist > 1:
+                return_speed = ENEMY_PURSUE_SPEED * 2.0
+                max_step = return_speed * dt
+                if dist <= max_step:
+                    enemy.pos = pygame.Vector2(desired_pos)
+                    enemy.vel = pygame.Vector2(0, 0)
+                    enemy.angle = state.boss.angle
+                else:
+                    target_angle = vector_to_angle(to_desired)
+                    enemy.angle = turn_towards(enemy.angle, target_angle, ENEMY_TURN_SPEED * dt * 1.5)
+                    enemy.vel = angle_to_vector(enemy.angle) * return_speed
+                    enemy.pos = enemy.pos + enemy.vel * dt
+            else:
+                enemy.pos = pygame.Vector2(desired_pos)
+                enemy.vel = pygame.Vector2(0, 0)
+                enemy.angle = state.boss.angle
+            enemy.pursuing = False
+            continue
+        if state.boss and enemy.escort and escorts_pursuing:
+            escort_override = True
+            to_player = state.ship_pos - enemy.pos
+            dist_sq = to_player.length_squared()
+            if dist_sq > 0:
+                target_angle = vector_to_angle(to_player)
+                enemy.angle = turn_towards(enemy.angle, target_angle, ENEMY_TURN_SPEED * dt)
+            speed_mult = ELITE_ENEMY_SPEED_MULT if enemy.elite else 1.0
+            enemy.vel = angle_to_vector(enemy.angle) * (ENEMY_PURSUE_SPEED * speed_mult)
+            enemy.pos = enemy.pos + enemy.vel * dt
+            enemy.pursuing = True
+        if not escort_override:
+            enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+            to_player = state.ship_pos - enemy.pos
+            dist_sq = to_player.length_squared()
+            far_ai = far_ai_interval > 0 and dist_sq > ENEMY_AI_FAR_RADIUS * ENEMY_AI_FAR_RADIUS
+            ai_dt = dt
+            if far_ai:
+                enemy.ai_timer += dt
+                ai_dt = enemy.ai_timer
+            if far_ai and enemy.ai_timer < far_ai_interval:
+                enemy.pos = enemy.pos + enemy.vel * dt
+            else:
+                enemy.ai_timer = 0.0
+                pursuing = dist_sq <= ENEMY_PURSUE_RADIUS * ENEMY_PURSUE_RADIUS
+                enemy.pursuing = pursuing
+                speed_mult = ELITE_ENEMY_SPEED_MULT if enemy.elite else 1.0
+                if pursuing and dist_sq > 0:
+                    target_angle = vector_to_angle(to_player)
+                    enemy.angle = turn_towards(enemy.angle, target_angle, ENEMY_TURN_SPEED * dt)
+                    if dist_sq <= ENEMY_HOLD_RADIUS * ENEMY_HOLD_RADIUS and state.ship_vel.length() <= ENEMY_HOLD_PLAYER_SPEED:
+                        speed = 0.0
+                    else:
+                        speed = ENEMY_PURSUE_SPEED * speed_mult
+                else:
+                    enemy.wander_timer -= ai_dt
+                    if enemy.wander_timer <= 0:
+                        enemy.wander_timer = random.uniform(0.8, 2.2)
+                        enemy.wander_angle = (enemy.angle + random.uniform(-120, 120)) % 360
+                    enemy.angle = turn_towards(enemy.angle, enemy.wander_angle, ENEMY_TURN_SPEED * ai_dt * 0.6)
+                    speed = ENEMY_SCOUT_SPEED * speed_mult
+
+                enemy.vel = angle_to_vector(enemy.angle) * speed
+                enemy.pos = enemy.pos + enemy.vel * dt
+            enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+        else:
+            enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+        if (
+            enemy.pos.x < -enemy_radius
+            or enemy.pos.x > WORLD_WIDTH + enemy_radius
+            or enemy.pos.y < -enemy_radius
+            or enemy.pos.y > WORLD_HEIGHT + enemy_radius
+        ):
+            if enemy.escort:
+                enemy.pos = clamp_position(enemy.pos, enemy_radius)
+                enemy.vel = pygame.Vector2(0, 0)
+            else:
+                remove_enemy(state.enemies, enemy, state.boss_escorts)
+                continue
+        fire_rate_mult = ELITE_ENEMY_FIRE_RATE_MULT if enemy.elite else 1.0
+        bullet_speed_mult = ELITE_ENEMY_BULLET_SPEED_MULT if enemy.elite else 1.0
+        enemy.fire_timer = max(0.0, enemy.fire_timer - dt)
+        if (
+            enemy.pursuing
+            and dist_sq <= ENEMY_FIRE_RANGE * ENEMY_FIRE_RANGE
+            and enemy.fire_timer <= 0.0
+        ):
+            bullet_vel = angle_to_vector(enemy.angle) * (ENEMY_BULLET_SPEED * bullet_speed_mult) + enemy.vel * 0.2
+            if state.enemy_bullet_pool:
+                bullet = state.enemy_bullet_pool.pop()
+                bullet["pos"].update(enemy.pos)
+                bullet["vel"].update(bullet_vel)
+                bullet["ttl"] = ENEMY_BULLET_TTL
+                bullet["radius"] = 2
+            else:
+                bullet = {"pos": pygame.Vector2(enemy.pos), "vel": bullet_vel, "ttl": ENEMY_BULLET_TTL, "radius": 2}
+            state.enemy_bullets.append(bullet)
+            enemy.fire_timer = ENEMY_FIRE_COOLDOWN / fire_rate_mult
+
+    for freighter in state.freighters:
+        to_target = freighter["target"] - freighter["pos"]
+        dist_sq = to_target.length_squared()
+        if dist_sq <= 160 * 160:
+            if freighter["target"] == freighter["to"]:
+                freighter["target"] = pygame.Vector2(freighter["from"])
+            else:
+                freighter["target"] = pygame.Vector2(freighter["to"])
+            to_target = freighter["target"] - freighter["pos"]
+        if to_target.length_squared() > 0:
+            freighter["angle"] = vector_to_angle(to_target)
+            freighter["vel"] = to_target.normalize() * freighter["speed"]
+        else:
+            freighter["vel"] = pygame.Vector2(0, 0)
+        freighter["pos"] = freighter["pos"] + freighter["vel"] * dt
+
+    # Pickups persist until collected.
+
+    if not state.game_over:
+        if shield_prev > 0 and state.shield_time <= 0:
+            for asteroid in state.asteroids:
+                hit_radius = asteroid.radius + SHIP_RADIUS
+                if moving_circle_hit(state.ship_pos, state.ship_pos, asteroid.pos, asteroid.pos, hit_radius):
+                    emit_sound(state, "explode", state.ship_pos)
+                    state.lives -= 1
+                    state.last_death_cause = "asteroid"
+                    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                    state.ship_vel = pygame.Vector2(0, 0)
+                    state.shield_time = 10.0
+                    state.shield_size_mult = 3.0
+                    state.rapid_time = 0.0
+                    state.spread_time = 0.0
+                    state.boost_time = 0.0
+                    if state.lives <= 0:
+                        state.game_over = True
+                    break
+            if not state.game_over:
+                for landmark in nearby_landmarks(landmark_grid(state), state.ship_pos):
+                    hit_radius = landmark.radius + SHIP_RADIUS
+                    if moving_circle_hit(state.ship_pos, state.ship_pos, landmark.pos, landmark.pos, hit_radius):
+                        emit_sound(state, "explode", state.ship_pos)
+                        state.lives -= 1
+                        if landmark.kind == "moon":
+                            state.last_death_cause = "moon"
+                        else:
+                            state.last_death_cause = "planet"
+                        state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                        state.ship_vel = pygame.Vector2(0, 0)
+                        state.shield_time = 10.0
+                        state.shield_size_mult = 3.0
+                        state.rapid_time = 0.0
+                        state.spread_time = 0.0
+                        state.boost_time = 0.0
+                        if state.lives <= 0:
+                            state.game_over = True
+                            break
+
+        for pickup in state.pickups:
+            pickup_hit_radius = SHIP_RADIUS + PICKUP_RADIUS * 0.8
+            if moving_circle_hit(ship_prev, state.ship_pos, pickup.pos, pickup.pos, pickup_hit_radius):
+                if pickup.kind == "boost_canister":
+                    continue
+                if pickup.kind == "shield":
+                    state.shield_stock += 3
+                elif pickup.kind == "spread":
+                    state.spread_stock += 3
+                elif pickup.kind == "mine":
+                    state.mine_stock += 3
+                elif pickup.kind == "boost":
+                    state.boost_stock += 3
+                else:
+                    state.rapid_stock += 3
+                state.pickups.remove(pickup)
+                break
+
+        for bullet in state.enemy_bullets[:]:
+            bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
+            bullet_radius = bullet.get("radius", 2)
+            if moving_circle_hit(bullet_prev, bullet["pos"], ship_prev, state.ship_pos, SHIP_RADIUS + bullet_radius + 2):
+                state.enemy_bullets.remove(bullet)
+                state.enemy_bullet_pool.append(bullet)
+                if state.shield_time <= 0:
+                    emit_sound(state, "explode", state.ship_pos)
+                    state.lives -= 1
+                    state.last_death_cause = "enemy bullet"
+                    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                    state.ship_vel = pygame.Vector2(0, 0)
+                    state.shield_time = 10.0
+                    state.shield_size_mult = 3.0
+                    state.rapid_time = 0.0
+                    state.spread_time = 0.0
+                    state.boost_time = 0.0
+                    if state.lives <= 0:
+                        state.game_over = True
+                break
+
+        for bullet in state.enemy_bullets[:]:
+            bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
+            hit = None
+            for asteroid in state.asteroids:
+                asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
+                radius = asteroid.radius + BULLET_HIT_SLOP
+                if moving_circle_hit(bullet_prev, bullet["pos"], asteroid_prev, asteroid.pos, radius):
+                    hit = asteroid
+                    break
+            if hit:
+                state.enemy_bullets.remove(bullet)
+                state.enemy_bullet_pool.append(bullet)
+                state.asteroids.remove(hit)
+                if hit.size > 1:
+                    emit_sound(state, "asteroid_explode")
+                    rng = random.Random(state.seed + int(hit.pos.x) + int(hit.pos.y))
+                    for _ in range(2):
+                        child = spawn_asteroid(rng, hit.size - 1, avoid_center=False)
+                        child.pos = pygame.Vector2(hit.pos)
+                        child.vel = hit.vel.rotate(rng.uniform(-50, 50)) * 1.2
+                        state.asteroids.append(child)
+
+        for enemy in state.enemies:
+            enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+            enemy_prev = prev_pos(enemy.pos, enemy.vel, dt)
+            hit_radius = enemy_radius + SHIP_RADIUS
+            if moving_circle_hit(enemy_prev, enemy.pos, ship_prev, state.ship_pos, hit_radius):
+                if state.shield_time <= 0:
+                    emit_sound(state, "explode", state.ship_pos)
+                    state.lives -= 1
+                    state.last_death_cause = "enemy ship"
+                    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                    state.ship_vel = pygame.Vector2(0, 0)
+                    state.shield_time = 10.0
+                    state.shield_size_mult = 3.0
+                    state.rapid_time = 0.0
+                    state.spread_time = 0.0
+                    state.boost_time = 0.0
+                    if state.lives <= 0:
+                        state.game_over = True
+                break
+
+        if state.boss:
+            boss_prev = prev_pos(state.boss.pos, state.boss.vel, dt)
+            hit_radius = BOSS_RADIUS + SHIP_RADIUS
+            if moving_circle_hit(boss_prev, state.boss.pos, ship_prev, state.ship_pos, hit_radius):
+                if state.shield_time <= 0:
+                    emit_sound(state, "explode", state.ship_pos)
+                    state.lives -= 1
+                    state.last_death_cause = "boss ship"
+                    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                    state.ship_vel = pygame.Vector2(0, 0)
+                    state.shield_time = 10.0
+                    state.shield_size_mult = 3.0
+                    state.rapid_time = 0.0
+                    state.spread_time = 0.0
+                    state.boost_time = 0.0
+                    if state.lives <= 0:
+                        state.game_over = True
+
+        for asteroid in state.asteroids[:]:
+            asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
+            hit_radius = asteroid.radius + SHIP_RADIUS
+            if moving_circle_hit(ship_prev, state.ship_pos, asteroid_prev, asteroid.pos, hit_radius):
+                if state.shield_time <= 0:
+                    emit_sound(state, "explode", state.ship_pos)
+                    state.lives -= 1
+                    state.last_death_cause = "asteroid"
+                    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                    state.ship_vel = pygame.Vector2(0, 0)
+                    state.shield_time = 10.0
+                    state.shield_size_mult = 3.0
+                    state.rapid_time = 0.0
+                    state.spread_time = 0.0
+                    state.boost_time = 0.0
+                    if state.lives <= 0:
+                        state.game_over = True
+                break
+
+        for bullet in state.bullets[:]:
+            if state.boss:
+                bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
+                boss_prev = prev_pos(state.boss.pos, state.boss.vel, dt)
+                radius = BOSS_RADIUS + BULLET_HIT_SLOP
+                if moving_circle_hit(bullet_prev, bullet["pos"], boss_prev, state.boss.pos, radius):
+                    state.bullets.remove(bullet)
+                    state.bullet_pool.append(bullet)
+                    if not state.escorts_alive:
+                        state.boss.hp = max(0, state.boss.hp - BOSS_HIT_DAMAGE)
+                        state.score += BOSS_HIT_DAMAGE
+                        spawn_damage_popup(
+                            state.damage_popups,
+                            state.damage_popup_pool,
+                            str(BOSS_HIT_DAMAGE),
+                            state.boss.pos,
+                            COLORS["boss"],
+                            limit=popup_limit,
+                        )
+                        if state.boss.hp <= 0:
+                            emit_sound(state, "explode", state.boss.pos)
+                            state.score += BOSS_SCORE_BONUS
+                            for _ in range(6):
+                                spawn_enemy_shards(
+                                    state.enemy_shards, state.enemy_shard_pool, state.boss.pos, state.boss.angle, COLORS["boss"], limit=shard_limit
+                                )
+                            state.boss_defeated = True
+                            state.boss = None
+                    continue
+            hit_enemy = None
+            for enemy in state.enemies:
+                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+                enemy_prev = prev_pos(enemy.pos, enemy.vel, dt)
+                bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
+                radius = enemy_radius + BULLET_HIT_SLOP
+                if moving_circle_hit(bullet_prev, bullet["pos"], enemy_prev, enemy.pos, radius):
+                    hit_enemy = enemy
+                    break
+            if hit_enemy:
+                state.bullets.remove(bullet)
+                state.bullet_pool.append(bullet)
+                if hit_enemy.escort:
+                    state.escorts_alerted = True
+                if hit_enemy.shield > 0:
+                    hit_enemy.shield -= 1
+                    state.score += 20
+                    if hit_enemy.escort:
+                        hit_color = COLORS["boss_shield"]
+                    else:
+                        hit_color = COLORS["elite_enemy"] if hit_enemy.elite else COLORS["enemy_shield"]
+                    spawn_damage_popup(
+                        state.damage_popups,
+                        state.damage_popup_pool,
+                        "20",
+                        hit_enemy.pos,
+                        hit_color,
+                        limit=popup_limit,
+                    )
+                else:
+                    state.enemies_destroyed += 1
+                    remove_enemy(state.enemies, hit_enemy, state.boss_escorts)
+                    emit_sound(state, "explode", hit_enemy.pos)
+                    state.score += 80 + (ELITE_ENEMY_SCORE_BONUS if hit_enemy.elite else 0)
+                    shard_color = COLORS["elite_enemy"] if hit_enemy.elite else COLORS["enemy"]
+                    spawn_enemy_shards(
+                        state.enemy_shards, state.enemy_shard_pool, hit_enemy.pos, hit_enemy.angle, shard_color, limit=shard_limit
+                    )
+                    spawn_damage_popup(
+                        state.damage_popups,
+                        state.damage_popup_pool,
+                        "80",
+                        hit_enemy.pos,
+                        COLORS["elite_enemy"] if hit_enemy.elite else COLORS["enemy"],
+                        limit=popup_limit,
+                    )
+                continue
+
+            hit_canister = None
+            for pickup in state.pickups:
+                if pickup.kind != "boost_canister":
+                    continue
+                bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
+                radius = CANISTER_RADIUS + BULLET_HIT_SLOP
+                if moving_circle_hit(bullet_prev, bullet["pos"], pickup.pos, pickup.pos, radius):
+                    hit_canister = pickup
+                    break
+            if hit_canister:
+                state.bullets.remove(bullet)
+                state.bullet_pool.append(bullet)
+                hit_canister.shell_hp = max(0, hit_canister.shell_hp - 1)
+                if hit_canister.shell_hp <= 0:
+                    hit_canister.kind = "boost"
+                    hit_canister.shell_hp = 0
+                    spawn_damage_popup(
+                        state.damage_popups,
+                        state.damage_popup_pool,
+                        "BOOST",
+                        hit_canister.pos,
+                        COLORS["pickup_boost"],
+                        limit=popup_limit,
+                    )
+                else:
+                    spawn_damage_popup(
+                        state.damage_popups,
+                        state.damage_popup_pool,
+                        "1",
+                        hit_canister.pos,
+                        COLORS["pickup_canister"],
+                        limit=popup_limit,
+                    )
+                continue
+
+            hit = None
+            for asteroid in state.asteroids:
+                asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
+                bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
+                radius = asteroid.radius + BULLET_HIT_SLOP
+                if moving_circle_hit(bullet_prev, bullet["pos"], asteroid_prev, asteroid.pos, radius):
+                    hit = asteroid
+                    break
+            if hit:
+                state.bullets.remove(bullet)
+                state.bullet_pool.append(bullet)
+                state.asteroids.remove(hit)
+                state.score += 10 * (5 - hit.size)
+                spawn_damage_popup(
+                    state.damage_popups,
+                    state.damage_popup_pool,
+                    str(10 * (5 - hit.size)),
+                    hit.pos,
+                    COLORS["bullet"],
+                    limit=popup_limit,
+                )
+                if hit.size > 1:
+                    emit_sound(state, "asteroid_explode")
+                    rng = random.Random(state.seed + state.score + int(hit.pos.x))
+                    for _ in range(2):
+                        child = spawn_asteroid(rng, hit.size - 1, avoid_center=False)
+                        child.pos = pygame.Vector2(hit.pos)
+                        child.vel = hit.vel.rotate(rng.uniform(-50, 50)) * 1.2
+                        state.asteroids.append(child)
+                break
+
+        for mine in state.mines[:]:
+            mine["ttl"] -= dt
+            if mine["ttl"] <= 0:
+                state.mines.remove(mine)
+                continue
+            trigger_enemy = None
+            for enemy in state.enemies:
+                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+                if (enemy.pos - mine["pos"]).length() <= enemy_radius + MINE_RADIUS:
+                    trigger_enemy = enemy
+                    break
+            trigger_boss = False
+            if not trigger_enemy and state.boss and not state.escorts_alive:
+                if (state.boss.pos - mine["pos"]).length() <= BOSS_RADIUS + MINE_RADIUS:
+                    trigger_boss = True
+            if not trigger_enemy and not trigger_boss:
+                continue
+
+            state.mines.remove(mine)
+            to_kill = [trigger_enemy] if trigger_enemy else []
+            for enemy in state.enemies:
+                if enemy is trigger_enemy:
+                    continue
+                if (enemy.pos - mine["pos"]).length() <= MINE_BLAST_RADIUS:
+                    to_kill.append(enemy)
+            for enemy in to_kill:
+                if enemy in state.enemies:
+                    state.enemies_destroyed += 1
+                    remove_enemy(state.enemies, enemy, state.boss_escorts)
+                    emit_sound(state, "explode", enemy.pos)
+                    state.score += 80 + (ELITE_ENEMY_SCORE_BONUS if enemy.elite else 0)
+                    shard_color = COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"]
+                    spawn_enemy_shards(
+                        state.enemy_shards, state.enemy_shard_pool, enemy.pos, enemy.angle, shard_color, limit=shard_limit
+                    )
+                    spawn_damage_popup(
+                        state.damage_popups,
+                        state.damage_popup_pool,
+                        "80",
+                        enemy.pos,
+                        COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"],
+                        limit=popup_limit,
+                    )
+            if state.boss and not state.escorts_alive and state.boss is not None:
+                if (state.boss.pos - mine["pos"]).length() <= MINE_BLAST_RADIUS + BOSS_RADIUS:
+                    state.boss.hp = max(0, state.boss.hp - BOSS_HIT_DAMAGE)
+                    state.score += BOSS_HIT_DAMAGE
+                    spawn_damage_popup(
+                        state.damage_popups,
+                        state.damage_popup_pool,
+                        str(BOSS_HIT_DAMAGE),
+                        state.boss.pos,
+                        COLORS["boss"],
+                        limit=popup_limit,
+                    )
+                    if state.boss.hp <= 0:
+                        emit_sound(state, "explode", state.boss.pos)
+                        state.score += BOSS_SCORE_BONUS
+                        for _ in range(6):
+                            spawn_enemy_shards(
+                                state.enemy_shards, state.enemy_shard_pool, state.boss.pos, state.boss.angle, COLORS["boss"], limit=shard_limit
+                            )
+                        state.boss_defeated = True
+                        state.boss = None
+
+        for enemy in state.enemies[:]:
+            if enemy.shield > 0:
+                continue
+            enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+            enemy_prev = prev_pos(enemy.pos, enemy.vel, dt)
+            for asteroid in state.asteroids:
+                asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
+                hit_radius = asteroid.radius + enemy_radius
+                if moving_circle_hit(enemy_prev, enemy.pos, asteroid_prev, asteroid.pos, hit_radius):
+                    remove_enemy(state.enemies, enemy, state.boss_escorts)
+                    emit_sound(state, "explode", enemy.pos)
+                    state.score += 100
+                    break
+
+        for landmark in nearby_landmarks(landmark_grid(state), state.ship_pos):
+            hit_radius = landmark.radius + SHIP_RADIUS
+            if moving_circle_hit(ship_prev, state.ship_pos, landmark.pos, landmark.pos, hit_radius):
+                if state.shield_time <= 0:
+                    emit_sound(state, "explode", state.ship_pos)
+                    state.lives -= 1
+                    if landmark.kind == "moon":
+                        state.last_death_cause = "moon"
+                    else:
+                        state.last_death_cause = "planet"
+                    state.ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
+                    state.ship_vel = pygame.Vector2(0, 0)
+                    state.shield_time = 10.0
+                    state.shield_size_mult = 3.0
+                    state.rapid_time = 0.0
+                    state.spread_time = 0.0
+                    state.boost_time = 0.0
+                    if state.lives <= 0:
+                        state.game_over = True
+                break
+
+    if not state.asteroids:
+        rng = random.Random(state.seed + state.score)
+        for _ in range(120):
+            size = 4 if rng.random() < 0.12 else 3
+            state.asteroids.append(spawn_asteroid(rng, size))
+
+    grid = landmark_grid(state)
+    for asteroid in state.asteroids[:]:
+        for landmark in nearby_landmarks(grid, asteroid.pos):
+            asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
+            hit_radius = asteroid.radius + landmark.radius
+            if moving_circle_hit(asteroid_prev, asteroid.pos, landmark.pos, landmark.pos, hit_radius):
+                state.asteroids.remove(asteroid)
+                if asteroid.size > 1:
+                    rng = random.Random(state.seed + int(asteroid.pos.x) + int(asteroid.pos.y))
+                    for _ in range(2):
+                        child = spawn_asteroid(rng, asteroid.size - 1, avoid_center=False)
+                        child.pos = pygame.Vector2(asteroid.pos)
+                        child.vel = asteroid.vel.rotate(rng.uniform(-60, 60)) * 1.2
+                        state.asteroids.append(child)
+                break
+
+    for landmark in state.landmarks:
+        if landmark.kind != "planet":
+            continue
+        screen_pos = world_to_screen(landmark.pos, state.ship_pos)
+        draw_radius = landmark.radius * CAMERA_ZOOM
+        on_screen = (
+            -draw_radius <= screen_pos.x <= WIDTH + draw_radius
+            and -draw_radius <= screen_pos.y <= HEIGHT + draw_radius
+        )
+        if on_screen:
+            if landmark.id not in state.beacons:
+                state.beacons[landmark.id] = make_beacon(state.seed, landmark)
+            if landmark.id not in state.discovered_planets:
+                emit_sound(state, "discover")
+            state.discovered_planets.add(landmark.id)
+
+
+def pickup_color(kind):
+    if kind == "shield":
+        return COLORS["pickup_shield"]
+    if kind == "spread":
+        return COLORS["pickup_spread"]
+    if kind == "mine":
+        return COLORS["pickup_mine"]
+    if kind == "boost":
+        return COLORS["pickup_boost"]
+    return COLORS["pickup_rapid"]
+
+
+def draw_world(screen, state, stars, quality, display):
+    if quality["starfield"] and USE_NEBULA:
+        draw_nebula(screen, state.seed, state.ship_pos)
+    else:
+        screen.fill(COLORS["bg"])
+
+    display.layer = LAYER_BACKGROUND
+    # Debug: universe bounds
+    top_left = world_to_screen(pygame.Vector2(0, 0), state.ship_pos)
+    bottom_right = world_to_screen(pygame.Vector2(WORLD_WIDTH, WORLD_HEIGHT), state.ship_pos)
+    rect_left = min(top_left.x, bottom_right.x)
+    rect_top = min(top_left.y, bottom_right.y)
+    rect_w = abs(bottom_right.x - top_left.x)
+    rect_h = abs(bottom_right.y - top_left.y)
+    # Edges past the screen are pulled in to just off-screen; outlining the
+    # full rect costs time proportional to its size, which a universe makes huge.
+    border = pygame.Rect(rect_left, rect_top, rect_w, rect_h).clip(pygame.Rect(-8, -8, WIDTH + 16, HEIGHT + 16))
+    if border.width and border.height:
+        queue_draw(display, "rect", COLORS["warning"], 4, border)
+
+    view = view_rect(state.ship_pos)
+    culled = 0
+
+    if quality["starfield"]:
+        tile_w = stars["width"]
+        tile_h = stars["height"]
+        # Scaled like the nebula, so layers scroll at the same on-screen speed
+        # at any render scale.
+        for star_surface, parallax in stars["layers"]:
+            offset_x = int((-state.ship_pos.x * parallax * RENDER_SCALE) % tile_w)
+            offset_y = int((-state.ship_pos.y * parallax * RENDER_SCALE) % tile_h)
+            for draw_x in (offset_x - tile_w, offset_x):
+                for draw_y in (offset_y - tile_h, offset_y):
+                    screen.blit(star_surface, (draw_x, draw_y))
+
+    if USE_IMPOSTORS:
+        upload_impostors()
+    for landmark in state.landmarks:
+        if not in_view(view, landmark.pos, landmark.radius):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(landmark.pos, state.ship_pos)
+        if USE_IMPOSTORS:
+            draw_impostor(screen, state.seed, landmark, screen_pos, landmark.radius * CAMERA_ZOOM)
+        if not draw_ring(display, screen_pos, landmark.radius * CAMERA_ZOOM, landmark.color, 2):
+            culled += 1
+
+    for planet_id, beacon in state.beacons.items():
+        if not in_view(view, beacon["pos"], CULL_LABEL_MARGIN):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(beacon["pos"], state.ship_pos)
+        draw_beacon(display, screen_pos, COLORS["pickup_shield"])
+
+    display.layer = LAYER_ENTITIES
+    for asteroid in state.asteroids:
+        if not in_view(view, asteroid.pos, asteroid.radius * ASTEROID_JITTER_MAX):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(asteroid.pos, state.ship_pos)
+        radius_px = asteroid.radius * CAMERA_ZOOM
+        if radius_px < LOD_POINT_PX:
+            queue_draw(display, "point", COLORS["asteroid"], 0, (int(screen_pos.x), int(screen_pos.y)))
+            continue
+        step = quality["asteroid_step"]
+        if radius_px < LOD_SIMPLE_PX:
+            step = max(step, len(asteroid.shape) // LOD_SIMPLE_VERTICES)
+        draw_asteroid(display, screen_pos, asteroid.angle, asteroid.shape, COLORS["asteroid"], step)
+
+    for bullet in state.bullets:
+        if not in_view(view, bullet["pos"], 2):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(bullet["pos"], state.ship_pos)
+        bullet_radius = max(1, int(2 * CAMERA_ZOOM))
+        queue_draw(display, "circle", COLORS["bullet"], 1, (int(screen_pos.x), int(screen_pos.y)), bullet_radius)
+
+    for bullet in state.enemy_bullets:
+        if not in_view(view, bullet["pos"], bullet.get("radius", 2)):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(bullet["pos"], state.ship_pos)
+        bullet_radius = max(1, int(bullet.get("radius", 2) * CAMERA_ZOOM))
+        queue_draw(display, "circle", COLORS["enemy"], 1, (int(screen_pos.x), int(screen_pos.y)), bullet_radius)
+
+    for mine in state.mines:
+        if not in_view(view, mine["pos"], MINE_RADIUS):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(mine["pos"], state.ship_pos)
+        draw_mine(
+            display,
+            screen_pos,
+            max(2, int(MINE_RADIUS * CAMERA_ZOOM)),
+            COLORS["pickup_mine"],
+            COLORS["mine_core"],
+        )
+
+    boss_visible = state.boss is not None and in_view(view, state.boss.pos, BOSS_RADIUS * 1.4)
+    if state.boss and not boss_visible:
+        culled += 1
+    if boss_visible:
+        screen_pos = world_to_screen(state.boss.pos, state.ship_pos)
+        if state.escorts_alive:
+            shield_radius = (BOSS_RADIUS + 16) * CAMERA_ZOOM
+            queue_draw(
+                display,
+                "circle",
+                COLORS["boss_shield"],
+                2,
+                (int(screen_pos.x), int(screen_pos.y)),
+                max(1, int(shield_radius)),
+            )
+        if state.boss.vel.length_squared() > 0:
+            draw_thruster(
+                display,
+                screen_pos,
+                state.boss.angle,
+                COLORS["pickup_rapid"],
+                2.2,
+                3.0,
+            )
+        draw_boss(display, screen_pos, state.boss.angle, COLORS["boss"], BOSS_SCALE)
+
+    for enemy in state.enemies:
+        if not in_view(view, enemy.pos, ENEMY_CULL_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(enemy.pos, state.ship_pos)
+        if SHIP_RADIUS * CAMERA_ZOOM * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0) < LOD_POINT_PX:
+            color = COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"]
+            queue_draw(display, "point", color, 0, (int(screen_pos.x), int(screen_pos.y)))
+            continue
+        if enemy.shield > 0:
+            shield_mult = ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0
+            if not enemy.elite and not enemy.escort:
+                shield_radius = (SHIP_RADIUS + 10) * CAMERA_ZOOM
+            else:
+                shield_radius = (ENEMY_RADIUS + 8) * CAMERA_ZOOM * shield_mult
+            queue_draw(
+                display,
+                "circle",
+                COLORS["boss_shield"] if enemy.escort else (COLORS["elite_enemy_shield"] if enemy.elite else COLORS["enemy_shield"]),
+                2 if enemy.elite or enemy.escort else 1,
+                (int(screen_pos.x), int(screen_pos.y)),
+                max(1, int(shield_radius)),
+            )
+        if enemy.pursuing:
+            back_mult = 2.0 * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
+            draw_thruster(
+                display,
+                screen_pos,
+                enemy.angle,
+                COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"],
+                0.7 * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0),
+                back_mult,
+            )
+        if enemy.elite:
+            draw_ship(display, screen_pos, enemy.angle, COLORS["elite_enemy"], ELITE_ENEMY_SIZE_MULT)
+        else:
+            draw_ship(display, screen_pos, enemy.angle, COLORS["enemy"])
+
+    for freighter in state.freighters:
+        if not in_view(view, freighter["pos"], FREIGHTER_RADIUS + 14):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(freighter["pos"], state.ship_pos)
+        shield_radius = (FREIGHTER_RADIUS + 14) * CAMERA_ZOOM
+        queue_draw(
+            display,
+            "circle",
+            COLORS["freighter_shield"],
+            1,
+            (int(screen_pos.x), int(screen_pos.y)),
+            max(1, int(shield_radius)),
+        )
+        draw_thruster(display, screen_pos, freighter["angle"], COLORS["pickup_rapid"], 0.9, 2.8)
+        draw_freighter(display, screen_pos, freighter["angle"], COLORS["freighter"])
+
+    pickup_cells = {} if PICKUP_RADIUS * CAMERA_ZOOM < LOD_PICKUP_PX else None
+    for pickup in state.pickups:
+        if not in_view(view, pickup.pos, CANISTER_RADIUS):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(pickup.pos, state.ship_pos)
+        if pickup_cells is not None:
+            cell = (int(screen_pos.x) // LOD_PICKUP_CELL, int(screen_pos.y) // LOD_PICKUP_CELL)
+            marker = pickup_cells.get(cell)
+            if marker is None:
+                pickup_cells[cell] = [screen_pos, pickup.kind, 1]
+            else:
+                marker[2] += 1
+            continue
+        if pickup.kind == "boost_canister":
+            shell_radius = max(2, int(CANISTER_RADIUS * CAMERA_ZOOM))
+            core_radius = max(1, int((PICKUP_RADIUS * 0.45) * CAMERA_ZOOM))
+            shell_rect = pygame.Rect(0, 0, shell_radius * 2, shell_radius * 2)
+            shell_rect.center = (int(screen_pos.x), int(screen_pos.y))
+            core_rect = pygame.Rect(0, 0, core_radius * 2, core_radius * 2)
+            core_rect.center = (int(screen_pos.x), int(screen_pos.y))
+            queue_draw(display, "rect", COLORS["pickup_canister"], 2, shell_rect)
+            queue_draw(display, "rect", COLORS["pickup_canister"], 1, core_rect)
+            continue
+
+        color = pickup_color(pickup.kind)
+        pickup_radius = max(2, int(PICKUP_RADIUS * CAMERA_ZOOM))
+        core_radius = max(1, int((PICKUP_RADIUS * 0.25) * CAMERA_ZOOM))
+        queue_draw(display, "circle", color, 2, (int(screen_pos.x), int(screen_pos.y)), pickup_radius)
+        queue_draw(display, "circle", color, 0, (int(screen_pos.x), int(screen_pos.y)), core_radius)
+    if pickup_cells:
+        # One marker per screen cell, sized by how many pickups it holds and
+        # colored after the first one found there.
+        for screen_pos, kind, count in pickup_cells.values():
+            color = COLORS["pickup_canister"] if kind == "boost_canister" else pickup_color(kind)
+            queue_draw(display, "circle", color, 1, (int(screen_pos.x), int(screen_pos.y)), 1 + count.bit_length())
+
+    display.layer = LAYER_PLAYER
+    if state.shield_time > 0 and not state.game_over:
+        shield_screen_pos = pygame.Vector2(WIDTH / 2, HEIGHT / 2)
+        shield_radius = (SHIP_RADIUS * CAMERA_ZOOM + 10 * CAMERA_ZOOM) * state.shield_size_mult * 1.2
+        queue_draw(
+            display,
+            "circle",
+            COLORS["god_shield"] if state.god_mode else COLORS["pickup_shield"],
+            1,
+            (int(shield_screen_pos.x), int(shield_screen_pos.y)),
+            max(1, int(shield_radius)),
+        )
+
+    ship_color = COLORS["warning"] if state.game_over else COLORS["ship"]
+    if state.thrusting_render and not state.game_over:
+        thruster_scale = 2.0 if state.boost_time > 0 else 1.0
+        draw_thruster(
+            display,
+            pygame.Vector2(WIDTH / 2, HEIGHT / 2),
+            state.ship_angle,
+            COLORS["pickup_rapid"],
+            thruster_scale,
+        )
+    if state.stop_thruster_timer > 0 and not state.game_over:
+        alpha = state.stop_thruster_timer / STOP_THRUSTER_TTL
+        draw_stop_thruster(
+            display,
+            pygame.Vector2(WIDTH / 2, HEIGHT / 2),
+            state.ship_angle,
+            scale_color(COLORS["pickup_boost"], alpha),
+            state.stop_thruster_side,
+        )
+    if (state.strafe_left or state.strafe_right) and not state.game_over:
+        strafe_side = "right" if state.strafe_left and not state.strafe_right else "left"
+        draw_stop_thruster(
+            display,
+            pygame.Vector2(WIDTH / 2, HEIGHT / 2),
+            state.ship_angle,
+            scale_color(COLORS["pickup_boost"], 0.7),
+            strafe_side,
+        )
+    draw_ship(display, pygame.Vector2(WIDTH / 2, HEIGHT / 2), state.ship_angle, ship_color)
+
+    display.layer = LAYER_EFFECTS
+    for shard in state.enemy_shards:
+        if not in_view(view, shard["start"], (shard["end"] - shard["start"]).length()):
+            culled += 1
+            continue
+        alpha = shard["ttl"] / ENEMY_SHARD_TTL
+        color = scale_color(shard.get("color", COLORS["enemy"]), alpha)
+        start = world_to_screen(shard["start"], state.ship_pos)
+        end = world_to_screen(shard["end"], state.ship_pos)
+        queue_draw(display, "line", color, 2, start, end)
+
+    flush_display_list(screen, display)
+
+    total = (
+        len(state.landmarks)
+        + len(state.beacons)
+        + len(state.asteroids)
+        + len(state.bullets)
+        + len(state.enemy_bullets)
+        + len(state.mines)
+        + len(state.enemies)
+        + len(state.freighters)
+        + len(state.pickups)
+        + len(state.enemy_shards)
+        + (1 if state.boss else 0)
+    )
+    return total - culled, culled
+
+
+def draw_world_text(screen, state, fonts):
+    # Beacon codes and damage popups are drawn straight onto the native
+    # screen after the world, so they stay sharp at any render scale.
+    view = view_rect(state.ship_pos)
+    culled = 0
+    for beacon in state.beacons.values():
+        if not in_view(view, beacon["pos"], CULL_LABEL_MARGIN):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(beacon["pos"], state.ship_pos) / RENDER_SCALE
+        label = render_text(fonts["main"], beacon["code"], COLORS["ui"])
+        screen.blit(label, (screen_pos.x + 18, screen_pos.y - 10))
+    for popup in state.damage_popups:
+        if not in_view(view, popup["pos"], CULL_LABEL_MARGIN):
+            culled += 1
+            continue
+        screen_pos = world_to_screen(popup["pos"], state.ship_pos) / RENDER_SCALE
+        alpha = int(255 * (popup["ttl"] / DAMAGE_POPUP_TTL))
+        surface = render_text_faded(fonts["popup"], popup["text"], popup["color"], alpha)
+        screen.blit(surface, (screen_pos.x - surface.get_width() / 2, screen_pos.y - surface.get_height() / 2))
+    return len(state.beacons) + len(state.damage_popups) - culled, culled
+
+
+def nearest_planet_bearing(state):
+    nearest_planet = None
+    nearest_dist_sq = None
+    for landmark in state.landmarks:
+        if landmark.kind != "planet":
+            continue
+        if landmark.id not in state.discovered_planets:
+            continue
+        delta = landmark.pos - state.ship_pos
+        dist_sq = delta.length_squared()
+        if nearest_dist_sq is None or dist_sq < nearest_dist_sq:
+            nearest_dist_sq = dist_sq
+            nearest_planet = delta
+    if nearest_planet is None or nearest_planet.length_squared() == 0:
+        return None
+    return round(vector_to_angle(nearest_planet)) % 360
+
+
+def hud_debug_lines(state, status_lines):
+    ram_mb = get_process_ram_mb()
+    lines = [
+        f"Seed: {state.seed}",
+        f"Shield: {state.shield_time:.1f}s" if state.shield_time > 0 else "Shield: -",
+        f"Shield Stock: {state.shield_stock}",
+        f"Spread: {state.spread_time:.1f}s" if state.spread_time > 0 else "Spread: -",
+        f"Spread Stock: {state.spread_stock}",
+        f"Mine Stock: {state.mine_stock}",
+        f"Boost: {state.boost_time:.1f}s" if state.boost_time > 0 else "Boost: -",
+        f"Boost Stock: {state.boost_stock}",
+    ]
+    lines.append(f"RAM: {ram_mb:.1f} MB" if ram_mb is not None else "RAM: n/a")
+    lines.extend(status_lines)
+    lines.append(
+        f"Spawn Queue: {len(state.spawn_queue.jobs)}  Spill: {state.spawn_queue.spilled} ({state.spawn_queue.spill_total})"
+    )
+    lines.append(f"Last Death: {state.last_death_cause}" if state.last_death_cause else "Last Death: -")
+    return lines
+
+
+def draw_hud(screen, hud, state, fonts, show_debug, gamepad_lines, status_lines):
+    # The pickup column and the lives and score line share one strip along
+    # the top, kept on a colorkeyed display-format layer that is re-rendered
+    # only when what it shows changes (timers at 0.1 s steps). With RLE a
+    # blit of it only touches the drawn pixels. The edge arrow moves with the
+    # ship, and the F1 and game over text only shows now and then, so those
+    # are drawn directly.
+    start = time.perf_counter()
+    width = screen.get_width()
+    size = (width, UI_PICKUP_TOP_Y + UI_PICKUP_RADIUS + 6 + fonts["debug"].get_height())
+    timers = tuple(f"{timer:.1f}" if timer > 0 else None for timer in (state.shield_time, state.boost_time, state.spread_time))
+    key = (
+        state.lives,
+        state.score,
+        state.god_mode,
+        state.shield_stock,
+        state.boost_stock,
+        state.spread_stock,
+        state.mine_stock,
+        timers,
+        show_debug,
+    )
+    if hud.surface is None or hud.surface.get_size() != size:
+        hud.surface = pygame.Surface(size, 0, screen)
+        hud.surface.set_colorkey(HUD_COLORKEY, pygame.RLEACCEL)
+        hud.key = None
+    if key != hud.key:
+        hud.surface.fill(HUD_COLORKEY)
+        render_hud_strip(hud.surface, state, fonts, show_debug)
+        hud.key = key
+        hud.redraws += 1
+    screen.blit(hud.surface, (0, 0))
+    arrow_angle = nearest_planet_bearing(state)
+    debug_lines = hud_debug_lines(state, status_lines) if show_debug else []
+    render_hud(screen, state, fonts, show_debug, gamepad_lines, debug_lines, arrow_angle)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    hud.ms += (elapsed_ms - hud.ms) * HUD_TIME_SMOOTHING
+
+
+def render_hud_strip(surface, state, fonts, show_debug):
+    width = surface.get_width()
+    ui_pickups = [
+        ("shield", COLORS["god_shield"] if state.god_mode else COLORS["pickup_shield"], state.shield_stock, state.shield_time, "1"),
+        ("boost", COLORS["pickup_boost"], state.boost_stock, state.boost_time, "2"),
+        ("spread", COLORS["pickup_spread"], state.spread_stock, state.spread_time, "3"),
+        ("mine", COLORS["pickup_mine"], state.mine_stock, 0.0, "4"),
+    ]
+    start_x = width / 2 - UI_PICKUP_SPACING * ((len(ui_pickups) - 1) / 2)
+    for index, (kind, color, count, timer, key_label) in enumerate(ui_pickups):
+        center = pygame.Vector2(start_x + index * UI_PICKUP_SPACING, UI_PICKUP_TOP_Y)
+        active = count > 0 or timer > 0
+        draw_color = color if active else scale_color(color, 0.35)
+        pickup_radius = UI_PICKUP_RADIUS
+        core_radius = max(2, int(pickup_radius * 0.4))
+        pygame.draw.circle(surface, draw_color, (int(center.x), int(center.y)), pickup_radius, 2)
+        pygame.draw.circle(surface, draw_color, (int(center.x), int(center.y)), core_radius, 0)
+
+        count_text = str(count)
+        count_surface = render_text(fonts["main"], count_text, COLORS["ui"])
+        surface.blit(
+            count_surface,
+            (center.x + pickup_radius + 8, center.y - count_surface.get_height() / 2),
+        )
+        if show_debug:
+            key_surface = render_text(fonts["debug"], key_label, COLORS["ui"])
+            surface.blit(
+                key_surface,
+                (center.x - key_surface.get_width() / 2, center.y - pickup_radius - 18),
+            )
+        if timer > 0:
+            timer_text = f"{timer:.1f}s"
+            timer_surface = render_text(fonts["debug"], timer_text, COLORS["ui"])
+            surface.blit(
+                timer_surface,
+                (center.x - timer_surface.get_width() / 2, center.y + pickup_radius + 6),
+            )
 
+    lives_text = render_text(fonts["main"], f"Lives: {state.lives}", COLORS["ui"])
+    surface.blit(lives_text, (10, 10))
+
+    score_text = render_text(fonts["main"], f"Score: {state.score}", COLORS["ui"])
+    surface.blit(score_text, (width - score_text.get_width() - 10, 10))
+
+
+def render_hud(screen, state, fonts, show_debug, gamepad_lines, debug_lines, arrow_angle):
+    width, height = screen.get_size()
+    if arrow_angle is not None:
+        draw_edge_arrow(screen, angle_to_vector(arrow_angle), COLORS["planet"])
+
+    if show_debug:
+        for i, line in enumerate(gamepad_lines):
+            text = render_text(fonts["debug"], line, COLORS["ui"])
+            screen.blit(text, (10, height - 120 + i * 18))
+
+    if show_debug:
+        for i, line in enumerate(debug_lines):
+            text = render_text(fonts["main"], line, COLORS["ui"])
+            screen.blit(text, (10, 10 + (i + 1) * 20))
+
+    if show_debug:
+        help_text = "Arrows/WASD move  Q/E strafe  LShift stop  L-stick aim  R1 thrust  L1 brake  Space shoot  1 shield  2 boost  3 spread  4 mine  M map  O objectives  F5 save  F6 load  F2 god shield  N new seed"
+        text = render_text(fonts["main"], help_text, COLORS["ui"])
+        screen.blit(text, (10, height - 28))
+
+    if state.game_over:
+        title = "Game Over"
+        reason = f"{(state.last_death_cause or 'Unknown').title()} Killed You"
+        prompt = "Press N key for New Map"
+        title_surface = render_text(fonts["big"], title, COLORS["warning"])
+        reason_surface = render_text(fonts["med"], reason, COLORS["warning"])
+        prompt_surface = render_text(fonts["small"], prompt, COLORS["warning"])
+        total_h = title_surface.get_height() + reason_surface.get_height() + prompt_surface.get_height() + 18
+        start_y = height / 2 - total_h / 2
+        screen.blit(title_surface, (width / 2 - title_surface.get_width() / 2, start_y))
+        screen.blit(
+            reason_surface,
+            (width / 2 - reason_surface.get_width() / 2, start_y + title_surface.get_height() + 8),
+        )
+        screen.blit(
+            prompt_surface,
+            (
+                width / 2 - prompt_surface.get_width() / 2,
+                start_y + title_surface.get_height() + reason_surface.get_height() + 16,
+            ),
+        )
 
-def draw_stop_thruster(surface, pos, angle, color, side="both"):
-    render_radius = SHIP_RADIUS * CAMERA_ZOOM
-    side_vec = pygame.Vector2(0, render_radius * 1.35).rotate(angle)
-    forward = pygame.Vector2(render_radius * 1.1, 0).rotate(angle)
-    lengths = [render_radius * 0.75, render_radius * 0.5]
-    offsets = [0.0, render_radius * 0.2]
-    for length, offset in zip(lengths, offsets):
-        left_start = pos - side_vec + forward * offset
-        right_start = pos + side_vec + forward * offset
-        left_end = left_start - side_vec.normalize() * length
-        right_end = right_start + side_vec.normalize() * length
-        if side in ("left", "both"):
-            pygame.draw.line(surface, color, left_start, left_end, 2)
-        if side in ("right", "both"):
-            pygame.draw.line(surface, color, right_start, right_end, 2)
 
+def map_rect(surface):
+    margin = 80
+    width, height = surface.get_size()
+    return pygame.Rect(margin, margin, width - margin * 2, height - margin * 2)
+
+
+def map_bounds(state):
+    # Left, top, width and height of the area the map shows: the whole
+    # world, or in universe mode the block of sectors around the ship.
+    if not state.universe or state.universe.center is None:
+        return 0, 0, WORLD_WIDTH, WORLD_HEIGHT
+    cx, cy = state.universe.center
+    span = (2 * SECTOR_LOAD_RADIUS + 1) * SECTOR_SIZE
+    return (cx - SECTOR_LOAD_RADIUS) * SECTOR_SIZE, (cy - SECTOR_LOAD_RADIUS) * SECTOR_SIZE, span, span
+
+
+def map_point(rect, bounds, pos):
+    left, top, width, height = bounds
+    return rect.x + ((pos.x - left) / width) * rect.width, rect.y + ((pos.y - top) / height) * rect.height
+
+
+def render_map_base(surface, state, font):
+    width = surface.get_width()
+    surface.fill(COLORS["bg"])
+    rect = map_rect(surface)
+    pygame.draw.rect(surface, COLORS["ui"], rect, 2)
+    bounds = map_bounds(state)
+    map_scale_x = rect.width / bounds[2]
+    map_scale_y = rect.height / bounds[3]
+    map_scale = min(map_scale_x, map_scale_y)
+    surface.set_clip(rect)
+    for landmark in state.landmarks:
+        kind = landmark.kind
+        if kind == "planet":
+            color = COLORS["planet"]
+        elif kind == "moon":
+            if landmark.parent_id not in state.discovered_planets:
+                continue
+            color = COLORS["moon"]
+        else:
+            continue
+        map_x, map_y = map_point(rect, bounds, landmark.pos)
+        map_radius = max(1, int(landmark.radius * map_scale))
+        pygame.draw.circle(surface, color, (int(map_x), int(map_y)), map_radius, 1)
+        if kind == "planet" and landmark.id in state.beacons:
+            beacon = state.beacons[landmark.id]
+            label = render_text(font, beacon["code"], COLORS["ui"])
+            surface.blit(label, (map_x + 6, map_y - 6))
+    surface.set_clip(None)
+    title = render_text(font, "Map - press M to close", COLORS["ui"])
+    surface.blit(title, (width / 2 - title.get_width() / 2, 24))
+
+
+def draw_map_screen(screen, map_layer, state, font):
+    # Planets, discovered moons, beacon labels and the frame only change on
+    # discovery, so they are kept on a base surface; the moving markers are
+    # drawn over it.
+    bounds = map_bounds(state)
+    # Sectors still streaming in under the same center change the landmarks
+    # without moving the bounds; the load count catches those.
+    loads = state.universe.loaded if state.universe else 0
+    key = (state.seed, frozenset(state.discovered_planets), frozenset(state.beacons), bounds, loads)
+    if map_layer.surface is None or map_layer.surface.get_size() != screen.get_size():
+        map_layer.surface = pygame.Surface(screen.get_size()).convert(screen)
+        map_layer.key = None
+    if key != map_layer.key:
+        render_map_base(map_layer.surface, state, font)
+        map_layer.key = key
+        map_layer.redraws += 1
+    screen.blit(map_layer.surface, (0, 0))
+    rect = map_rect(screen)
+    screen.set_clip(rect)
+    for freighter in state.freighters:
+        map_x, map_y = map_point(rect, bounds, freighter["pos"])
+        pygame.draw.circle(screen, COLORS["freighter"], (int(map_x), int(map_y)), 3, 0)
+    if state.boss:
+        map_x, map_y = map_point(rect, bounds, state.boss.pos)
+        pygame.draw.circle(screen, COLORS["boss"], (int(map_x), int(map_y)), 6, 0)
+        pygame.draw.circle(screen, COLORS["boss_shield"], (int(map_x), int(map_y)), 9, 1)
+    map_x, map_y = map_point(rect, bounds, state.ship_pos)
+    pygame.draw.circle(screen, COLORS["pickup_shield"], (int(map_x), int(map_y)), 5, 0)
+    screen.set_clip(None)
+
+
+def draw_objectives_screen(screen, state, font):
+    width = screen.get_width()
+    screen.fill(COLORS["bg"])
+    title = render_text(font, "Objectives - press O to close", COLORS["ui"])
+    screen.blit(title, (width / 2 - title.get_width() / 2, 24))
+    planet_goal = state.planet_total if state.planet_total > 0 else 10
+    objectives = [
+        ("Defeat boss", state.boss_defeated),
+        ("First kill", state.enemies_destroyed >= 1),
+        (f"Discover all {planet_goal} planets", len(state.discovered_planets) >= planet_goal),
+        (f"Destroy {OBJECTIVE_ENEMIES_10} enemies", state.enemies_destroyed >= OBJECTIVE_ENEMIES_10),
+        (f"Destroy {OBJECTIVE_ENEMIES_50} enemies", state.enemies_destroyed >= OBJECTIVE_ENEMIES_50),
+        (f"Boost {OBJECTIVE_BOOST_50} times", state.boosts_used >= OBJECTIVE_BOOST_50),
+    ]
+    start_y = 120
+    line_gap = 40
+    for index, (label, completed) in enumerate(objectives):
+        prefix = "[x]" if completed else "[ ]"
+        line = f"{prefix} {label}"
+        color = COLORS["ui"] if completed else scale_color(COLORS["ui"], 0.75)
+        line_surface = render_text(font, line, color)
+        screen.blit(line_surface, (120, start_y + index * line_gap))
+
+
+def pack_color(color):
+    return (color[0] << 16) | (color[1] << 8) | color[2]
+
+
+def unpack_color(value):
+    value = int(value)
+    return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+
+def popup_code(text):
+    if text.isdigit():
+        return int(text)
+    return -1 - POPUP_WORDS.index(text)
+
+
+def popup_text(code):
+    code = int(code)
+    if code >= 0:
+        return str(code)
+    return POPUP_WORDS[-1 - code]
+
+
+def encode_snapshot(state, frame, sim_ms):
+    flags = 0
+    for bit, name in enumerate(SNAPSHOT_FLAGS):
+        if getattr(state, name):
+            flags |= 1 << bit
+    records = []
+    add = records.extend
+    for asteroid in state.asteroids:
+        add((RECORD_ASTEROID, asteroid.pos.x, asteroid.pos.y, asteroid.angle, asteroid.radius, asteroid.size, 0, 0))
+    for bullet in state.bullets:
+        add((RECORD_BULLET, bullet["pos"].x, bullet["pos"].y, 0, 0, 0, 0, 0))
+    for bullet in state.enemy_bullets:
+        add((RECORD_ENEMY_BULLET, bullet["pos"].x, bullet["pos"].y, 0, bullet.get("radius", 2), 0, 0, 0))
+    for mine in state.mines:
+        add((RECORD_MINE, mine["pos"].x, mine["pos"].y, 0, mine["ttl"], 0, 0, 0))
+    for enemy in state.enemies:
+        enemy_flags = enemy.pursuing | (enemy.elite << 1) | (enemy.escort << 2)
+        add((RECORD_ENEMY, enemy.pos.x, enemy.pos.y, enemy.angle, enemy.shield, enemy_flags, enemy.vel.x, enemy.vel.y))
+    for freighter in state.freighters:
+        add((RECORD_FREIGHTER, freighter["pos"].x, freighter["pos"].y, freighter["angle"], 0, 0, 0, 0))
+    # Pickups number in the thousands and are only ever drawn on screen, so
+    # only the ones inside the view (plus a margin) are published.
+    view = view_rect(state.ship_pos)
+    for pickup in state.pickups:
+        if not in_view(view, pickup.pos, SNAPSHOT_PICKUP_MARGIN):
+            continue
+        kind = PICKUP_KIND_CODES.get(pickup.kind, PICKUP_KIND_CODES["rapid"])
+        add((RECORD_PICKUP, pickup.pos.x, pickup.pos.y, 0, kind, pickup.shell_hp, 0, 0))
+    for popup in state.damage_popups:
+        add(
+            (
+                RECORD_POPUP,
+                popup["pos"].x,
+                popup["pos"].y,
+                0,
+                popup["ttl"],
+                popup_code(popup["text"]),
+                pack_color(popup["color"]),
+                0,
+            )
+        )
+    for shard in state.enemy_shards:
+        color = pack_color(shard.get("color", COLORS["enemy"]))
+        add((RECORD_SHARD, shard["start"].x, shard["start"].y, 0, shard["end"].x, shard["end"].y, shard["ttl"], color))
+    for planet_id in state.discovered_planets:
+        add((RECORD_DISCOVERED, 0, 0, 0, planet_id, planet_id in state.beacons, 0, 0))
+    if state.boss:
+        boss = state.boss
+        add((RECORD_BOSS, boss.pos.x, boss.pos.y, boss.angle, boss.hp, 0, boss.vel.x, boss.vel.y))
+    record_count = min(len(records) // SNAPSHOT_RECORD, SNAPSHOT_MAX_RECORDS)
+    if record_count < len(records) // SNAPSHOT_RECORD and state.boss:
+        # Keep the boss when the record region overflows; everything else is
+        # cosmetic for a single frame.
+        records[(record_count - 1) * SNAPSHOT_RECORD:] = records[-SNAPSHOT_RECORD:]
+    header = (
+        frame,
+        state.seed,
+        sim_ms,
+        state.score,
+        state.lives,
+        state.ship_pos.x,
+        state.ship_pos.y,
+        state.ship_angle,
+        state.ship_vel.x,
+        state.ship_vel.y,
+        state.shield_time,
+        state.shield_size_mult,
+        state.shield_stock,
+        state.rapid_time,
+        state.rapid_stock,
+        state.spread_time,
+        state.spread_stock,
+        state.mine_stock,
+        state.boost_time,
+        state.boost_stock,
+        state.stop_thruster_timer,
+        DEATH_CAUSES.index(state.last_death_cause),
+        state.enemies_destroyed,
+        state.boosts_used,
+        state.planet_total,
+        flags,
+        len(state.spawn_queue.jobs),
+        state.spawn_queue.spilled,
+        state.spawn_queue.spill_total,
+        record_count,
+    )
+    values = array("d", header)
+    values.extend(records[: record_count * SNAPSHOT_RECORD])
+    return values
+
+
+def publish_snapshot(control, data, values):
+    # Seqlock over two slots: the writer only ever touches the slot that is
+    # not published, bumping its sequence to odd while writing and back to
+    # even when done, so a reader can detect a torn copy and retry.
+    slot = 1 - control[0]
+    base = slot * SNAPSHOT_SLOT
+    control[1 + slot] += 1
+    data[base:base + len(values)] = values
+    control[1 + slot] += 1
+    control[0] = slot
+
+
+def read_snapshot(control, data):
+    for _ in range(4):
+        slot = control[0]
+        seq = control[1 + slot]
+        if seq & 1:
+            continue
+        base = slot * SNAPSHOT_SLOT
+        header = data[base:base + SNAPSHOT_HEADER].tolist()
+        record_count = int(header[-1])
+        start = base + SNAPSHOT_HEADER
+        records = data[start:start + record_count * SNAPSHOT_RECORD].tolist()
+        if control[1 + slot] == seq:
+            return dict(zip(SNAPSHOT_FIELDS, header)), records
+    return None, None
+
+
+def apply_snapshot(view, header, records, landmarks_by_id):
+    view.score = int(header["score"])
+    view.lives = int(header["lives"])
+    view.ship_pos = pygame.Vector2(header["ship_x"], header["ship_y"])
+    view.ship_vel = pygame.Vector2(header["ship_vx"], header["ship_vy"])
+    view.ship_angle = header["ship_angle"]
+    view.shield_time = header["shield_time"]
+    view.shield_size_mult = header["shield_size_mult"]
+    view.shield_stock = int(header["shield_stock"])
+    view.rapid_time = header["rapid_time"]
+    view.rapid_stock = int(header["rapid_stock"])
+    view.spread_time = header["spread_time"]
+    view.spread_stock = int(header["spread_stock"])
+    view.mine_stock = int(header["mine_stock"])
+    view.boost_time = header["boost_time"]
+    view.boost_stock = int(header["boost_stock"])
+    view.stop_thruster_timer = header["stop_thruster_timer"]
+    view.last_death_cause = DEATH_CAUSES[int(header["death_cause"])]
+    view.enemies_destroyed = int(header["enemies_destroyed"])
+    view.boosts_used = int(header["boosts_used"])
+    view.planet_total = int(header["planet_total"])
+    flags = int(header["flags"])
+    for bit, name in enumerate(SNAPSHOT_FLAGS):
+        setattr(view, name, bool(flags & (1 << bit)))
+    view.spawn_queue.jobs = [None] * int(header["spawn_depth"])
+    view.spawn_queue.spilled = int(header["spawn_spilled"])
+    view.spawn_queue.spill_total = int(header["spawn_spill_total"])
 
-def draw_mine(surface, pos, radius, color, core_color):
-    points = []
-    for i in range(5):
-        angle = math.radians(72 * i - 90)
-        points.append((pos.x + math.cos(angle) * radius, pos.y + math.sin(angle) * radius))
-    pygame.draw.polygon(surface, color, points, 2)
-    pygame.draw.circle(surface, core_color, (int(pos.x), int(pos.y)), max(2, int(radius * 0.35)), 0)
+    asteroids = []
+    bullets = []
+    enemy_bullets = []
+    mines = []
+    enemies = []
+    freighters = []
+    pickups = []
+    popups = []
+    shards = []
+    discovered = set()
+    beacons = {}
+    boss = None
+    for i in range(0, len(records), SNAPSHOT_RECORD):
+        kind, x, y, angle, a, b, c, d = records[i:i + SNAPSHOT_RECORD]
+        kind = int(kind)
+        pos = pygame.Vector2(x, y)
+        if kind == RECORD_ASTEROID:
+            shape = ASTEROID_SHAPE_CACHE.get(int(a))
+            if shape is not None:
+                asteroids.append(Asteroid(pos, pygame.Vector2(), int(b), int(a), 0.0, angle, shape))
+        elif kind == RECORD_BULLET:
+            bullets.append({"pos": pos})
+        elif kind == RECORD_ENEMY_BULLET:
+            enemy_bullets.append({"pos": pos, "radius": a})
+        elif kind == RECORD_MINE:
+            mines.append({"pos": pos, "ttl": a})
+        elif kind == RECORD_ENEMY:
+            enemy_flags = int(b)
+            enemies.append(
+                Enemy(
+                    pos,
+                    pygame.Vector2(c, d),
+                    angle,
+                    int(a),
+                    0.0,
+                    0.0,
+                    0.0,
+                    pursuing=bool(enemy_flags & 1),
+                    elite=bool(enemy_flags & 2),
+                    escort=bool(enemy_flags & 4),
+                )
+            )
+        elif kind == RECORD_FREIGHTER:
+            freighters.append({"pos": pos, "angle": angle})
+        elif kind == RECORD_PICKUP:
+            pickups.append(Pickup(PICKUP_KINDS[int(a)], pos, 0.0, int(b)))
+        elif kind == RECORD_POPUP:
+            popups.append({"pos": pos, "ttl": a, "text": popup_text(b), "color": unpack_color(c)})
+        elif kind == RECORD_SHARD:
+            shards.append({"start": pos, "end": pygame.Vector2(a, b), "ttl": c, "color": unpack_color(d)})
+        elif kind == RECORD_DISCOVERED:
+            planet_id = int(a)
+            discovered.add(planet_id)
+            if b and planet_id in landmarks_by_id:
+                beacon = view.beacons.get(planet_id)
+                beacons[planet_id] = beacon if beacon else make_beacon(view.seed, landmarks_by_id[planet_id])
+        elif kind == RECORD_BOSS:
+            boss = Boss(pos, pygame.Vector2(c, d), angle, int(a), 0.0, 0, [])
+    view.asteroids = asteroids
+    view.bullets = bullets
+    view.enemy_bullets = enemy_bullets
+    view.mines = mines
+    view.enemies = enemies
+    view.boss_escorts = [enemy for enemy in enemies if enemy.escort]
+    view.freighters = freighters
+    view.pickups = pickups
+    view.damage_popups = popups
+    view.enemy_shards = shards
+    view.discovered_planets = discovered
+    # Rebuilt from the records every time, so beacons a load (of any seed)
+    # drops go away here too; the ones still present are reused.
+    view.beacons = beacons
+    view.boss = boss
+
+
+def push_input(link, controls, actions, paused, quality_level, camera_zoom):
+    # Single-producer/single-consumer ring: only this process advances the
+    # head and only the worker advances the tail. Actions that do not fit
+    # are kept and merged into the next record.
+    for action in actions:
+        if action in RING_ACTIONS:
+            link.pending_actions |= 1 << RING_ACTIONS.index(action)
+    head = link.ring_control[0]
+    if head - link.ring_control[1] >= INPUT_RING_SLOTS:
+        return
+    held = 0
+    for bit, name in enumerate(CONTROL_BITS):
+        if getattr(controls, name):
+            held |= 1 << bit
+    offset = (head % INPUT_RING_SLOTS) * INPUT_RECORD.size
+    INPUT_RECORD.pack_into(
+        link.ring_data, offset, controls.turn, held, link.pending_actions, paused, quality_level, camera_zoom
+    )
+    link.ring_control[0] = head + 1
+    link.pending_actions = 0
+
+
+def drain_input(ring_control, ring_data, controls):
+    # Returns (actions, paused, quality_level, camera_zoom) merged over every
+    # queued record; held controls and the view keep the latest value.
+    head = ring_control[0]
+    tail = ring_control[1]
+    if head == tail:
+        return [], None, None, None
+    action_bits = 0
+    paused = None
+    quality_level = None
+    camera_zoom = None
+    while tail < head:
+        offset = (tail % INPUT_RING_SLOTS) * INPUT_RECORD.size
+        turn, held, bits, paused, quality_level, camera_zoom = INPUT_RECORD.unpack_from(ring_data, offset)
+        action_bits |= bits
+        tail += 1
+    ring_control[1] = tail
+    controls.turn = turn
+    for bit, name in enumerate(CONTROL_BITS):
+        setattr(controls, name, bool(held & (1 << bit)))
+    actions = [name for bit, name in enumerate(RING_ACTIONS) if action_bits & (1 << bit)]
+    return actions, bool(paused), quality_level, camera_zoom
+
+
+def run_simulation_worker(
+    seed, width, height, camera_zoom, landmark_counts, use_world_cache, snapshot_name, ring_name, events
+):
+    global WIDTH, HEIGHT, CAMERA_ZOOM, PLANET_COUNT, MOONS_PER_PLANET, USE_WORLD_CACHE
+    WIDTH, HEIGHT, CAMERA_ZOOM = width, height, camera_zoom
+    PLANET_COUNT, MOONS_PER_PLANET = landmark_counts
+    USE_WORLD_CACHE = use_world_cache
+    snapshot_memory = shared_memory.SharedMemory(name=snapshot_name)
+    ring_memory = shared_memory.SharedMemory(name=ring_name)
+    snapshot_control = snapshot_memory.buf[:SNAPSHOT_CONTROL_BYTES].cast("q")
+    snapshot_data = snapshot_memory.buf[SNAPSHOT_CONTROL_BYTES:].cast("d")
+    ring_control = ring_memory.buf[:RING_CONTROL_BYTES].cast("q")
+    ring_data = ring_memory.buf[RING_CONTROL_BYTES:]
+    state, _ = new_game_state(seed)
+    prefetcher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="world-prefetch")
+    prefetch = prefetch_world(prefetcher, seed)
+    controls = Controls()
+    quality = QUALITY_LEVELS[0]
+    paused = False
+    shapes_sent = set()
+    frame = 0
+    sim_ms = 0.0
+    tick = 1.0 / FPS
+    last = time.perf_counter()
+    running = True
+    try:
+        while running:
+            actions, paused_flag, quality_level, camera_zoom = drain_input(ring_control, ring_data, controls)
+            if paused_flag is not None:
+                paused = paused_flag
+                quality = QUALITY_LEVELS[quality_level]
+                # Spawn exclusion and snapshot culling follow the player's view.
+                CAMERA_ZOOM = camera_zoom
+                prefetch = refresh_prefetch(prefetcher, prefetch)
+            new_seed_requested = False
+            save_requested = False
+            load_requested = False
+            for action in actions:
+                if action == "quit":
+                    running = False
+                elif action == "new_seed":
+                    new_seed_requested = True
+                elif action == "save":
+                    save_requested = True
+                elif action == "load":
+                    load_requested = True
+                else:
+                    apply_game_action(state, action)
+            if new_seed_requested:
+                _, prefetch = swap_world(state, prefetcher, prefetch)
+            if save_requested:
+                save_state(build_save_state(state))
+            if load_requested:
+                data = load_state()
+                if data:
+                    load_world(state, data)
+
+            now = time.perf_counter()
+            dt = now - last
+            last = now
+            if paused or (state.game_over and not actions):
+                if actions:
+                    frame += 1
+                    publish_snapshot(snapshot_control, snapshot_data, encode_snapshot(state, frame, sim_ms))
+                    if state.sound_events:
+                        events.put(("sounds", state.sound_events))
+                        state.sound_events = []
+                time.sleep(tick / 2)
+                continue
+            step_start = time.perf_counter()
+            step_game(state, controls, 0.0 if state.game_over else dt, quality)
+            for radius, shape in list(ASTEROID_SHAPE_CACHE.items()):
+                if radius not in shapes_sent:
+                    events.put(("shape", radius, shape))
+                    shapes_sent.add(radius)
+            if state.sound_events:
+                events.put(("sounds", state.sound_events))
+                state.sound_events = []
+            frame += 1
+            publish_snapshot(snapshot_control, snapshot_data, encode_snapshot(state, frame, sim_ms))
+            sim_ms = (time.perf_counter() - step_start) * 1000.0
+            remaining = tick - (time.perf_counter() - now)
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        prefetcher.shutdown(cancel_futures=True)
+        del snapshot_control, snapshot_data, ring_control, ring_data
+        snapshot_memory.close()
+        ring_memory.close()
+
+
+def start_simulation(seed):
+    snapshot_memory = shared_memory.SharedMemory(
+        create=True, size=SNAPSHOT_CONTROL_BYTES + 2 * SNAPSHOT_SLOT * 8
+    )
+    ring_memory = shared_memory.SharedMemory(
+        create=True, size=RING_CONTROL_BYTES + INPUT_RING_SLOTS * INPUT_RECORD.size
+    )
+    snapshot_memory.buf[:SNAPSHOT_CONTROL_BYTES] = bytes(SNAPSHOT_CONTROL_BYTES)
+    ring_memory.buf[:RING_CONTROL_BYTES] = bytes(RING_CONTROL_BYTES)
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    process = context.Process(
+        target=run_simulation_worker,
+        args=(
+            seed,
+            WIDTH,
+            HEIGHT,
+            CAMERA_ZOOM,
+            (PLANET_COUNT, MOONS_PER_PLANET),
+            USE_WORLD_CACHE,
+            snapshot_memory.name,
+            ring_memory.name,
+            events,
+        ),
+        daemon=True,
+    )
+    process.start()
+    return SimLink(
+        process=process,
+        snapshot_memory=snapshot_memory,
+        ring_memory=ring_memory,
+        snapshot_control=snapshot_memory.buf[:SNAPSHOT_CONTROL_BYTES].cast("q"),
+        snapshot_data=snapshot_memory.buf[SNAPSHOT_CONTROL_BYTES:].cast("d"),
+        ring_control=ring_memory.buf[:RING_CONTROL_BYTES].cast("q"),
+        ring_data=ring_memory.buf[RING_CONTROL_BYTES:],
+        events=events,
+    )
 
 
-def main():
+def stop_simulation(link):
+    if link.process.is_alive():
+        push_input(link, Controls(), ["quit"], False, 0, CAMERA_ZOOM)
+        link.process.join(SIM_STOP_TIMEOUT)
+        if link.process.is_alive():
+            link.process.terminate()
+            link.process.join()
+    link.events.close()
+    link.events.cancel_join_thread()
+    link.snapshot_control.release()
+    link.snapshot_data.release()
+    link.ring_control.release()
+    link.ring_data.release()
+    for memory in (link.snapshot_memory, link.ring_memory):
+        memory.close()
+        memory.unlink()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seeded Asteroids - Open World Prototype")
+    parser.add_argument(
+        "--quality",
+        type=int,
+        choices=range(len(QUALITY_LEVELS)),
+        metavar="LEVEL",
+        help=f"pin the quality governor to a fixed level (0 = full, {len(QUALITY_LEVELS) - 1} = lowest)",
+    )
+    parser.add_argument(
+        "--rotation-step",
+        type=float,
+        default=ASTEROID_ROTATION_STEP,
+        metavar="DEG",
+        help="angular resolution of the pre-rotated asteroid vertex tables (0 = rotate exactly every frame)",
+    )
+    parser.add_argument(
+        "--sprites",
+        action="store_true",
+        help="blit ships, enemies, boss and freighters from a cache of pre-rendered rotated sprites",
+    )
+    parser.add_argument(
+        "--split-process",
+        action="store_true",
+        help="run the simulation in a worker process and render from shared-memory snapshots",
+    )
+    parser.add_argument(
+        "--render-scale",
+        type=float,
+        default=RENDER_SCALE,
+        metavar="SCALE",
+        help="draw the world at this fraction of the screen resolution and scale it up (e.g. 0.5 or 0.75); HUD and text stay native",
+    )
+    parser.add_argument(
+        "--planets",
+        type=int,
+        default=PLANET_COUNT,
+        metavar="N",
+        help="planets to place per seed; some are dropped when the world runs out of room (default 12)",
+    )
+    parser.add_argument(
+        "--moons-per-planet",
+        type=int,
+        default=MOONS_PER_PLANET,
+        metavar="N",
+        help="moons to place around each planet (default 1)",
+    )
+    parser.add_argument(
+        "--parallel-worldgen",
+        action="store_true",
+        help="generate new worlds in a pool of worker processes (same worlds as the serial path; not with --split-process)",
+    )
+    parser.add_argument(
+        "--universe",
+        action="store_true",
+        help="effectively unbounded world generated sector by sector around the ship (not with --split-process)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        metavar="SEED",
+        help="start from this seed instead of one taken from the clock",
+    )
+    parser.add_argument(
+        "--no-world-cache",
+        action="store_true",
+        help="always generate worlds instead of reusing ones cached in memory and under cache/worlds",
+    )
+    parser.add_argument(
+        "--capture",
+        metavar="DIR",
+        help="record every presented frame into DIR through a background writer; frames are dropped, not waited for, when it falls behind",
+    )
+    parser.add_argument(
+        "--capture-format",
+        choices=CAPTURE_FORMATS,
+        default=CAPTURE_FORMATS[0],
+        help="raw: one rgb24 stream (capture.rgb); png: an image sequence. Either way capture.json records size and drop counts",
+    )
+    parser.add_argument(
+        "--no-nebula",
+        action="store_true",
+        help="skip the procedural nebula backdrop behind the starfield",
+    )
+    parser.add_argument(
+        "--outline-planets",
+        action="store_true",
+        help="draw planets and moons as rings only, without the cached shaded bodies",
+    )
+    args = parser.parse_args(argv)
+    if not 0.25 <= args.render_scale <= 1.0:
+        parser.error("--render-scale must be between 0.25 and 1.0")
+    if args.planets < 0 or args.moons_per_planet < 0:
+        parser.error("--planets and --moons-per-planet must not be negative")
+    if args.parallel_worldgen and args.split_process:
+        parser.error("--parallel-worldgen cannot be combined with --split-process")
+    if args.universe and args.split_process:
+        parser.error("--universe cannot be combined with --split-process")
+    if args.seed is not None and not 0 <= args.seed <= 0xFFFFFFFF:
+        parser.error("--seed must be between 0 and 4294967295")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    global ASTEROID_ROTATION_STEP, USE_SPRITES, USE_IMPOSTORS, USE_NEBULA, PLANET_COUNT, MOONS_PER_PLANET, WORLD_POOL
+    global USE_WORLD_CACHE
+    ASTEROID_ROTATION_STEP = args.rotation_step
+    USE_SPRITES = args.sprites
+    USE_IMPOSTORS = not args.outline_planets
+    PLANET_COUNT = args.planets
+    MOONS_PER_PLANET = args.moons_per_planet
+    USE_NEBULA = not args.no_nebula and importlib.util.find_spec("numpy") is not None
+    USE_WORLD_CACHE = not args.no_world_cache
+    if args.universe:
+        enable_universe()
     pygame.mixer.pre_init(44100, -16, 2, 512)
     pygame.init()
     pygame.joystick.init()
     screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    global WIDTH, HEIGHT
+    global WIDTH, HEIGHT, CAMERA_ZOOM, RENDER_SCALE
     WIDTH, HEIGHT = screen.get_size()
+    world_surface = None
+    if args.render_scale < 1.0:
+        # The world is drawn at the internal size with the zoom scaled to
+        # match, so the same area stays in view; starfield, sprites and
+        # asteroid tables are all built from these globals. HUD and text
+        # are drawn at native size after the upscale.
+        RENDER_SCALE = args.render_scale
+        WIDTH = max(1, round(WIDTH * RENDER_SCALE))
+        HEIGHT = max(1, round(HEIGHT * RENDER_SCALE))
+        world_surface = pygame.Surface((WIDTH, HEIGHT)).convert(screen)
+    zoom_level = CAMERA_ZOOM_DEFAULT_LEVEL
+    CAMERA_ZOOM = CAMERA_ZOOM_LEVELS[zoom_level] * RENDER_SCALE
     pygame.display.set_caption("Seeded Asteroids - Prototype")
     pygame.event.clear()
     clock = pygame.time.Clock()
     font = pygame.font.SysFont("Consolas", 18)
-    debug_font = pygame.font.SysFont("Consolas", 16)
-    popup_font = pygame.font.SysFont("Consolas", 16, bold=True)
-    game_over_font_big = pygame.font.SysFont("Consolas", 64, bold=True)
-    game_over_font_med = pygame.font.SysFont("Consolas", 32)
-    game_over_font_small = pygame.font.SysFont("Consolas", 20)
+    fonts = {
+        "main": font,
+        "debug": pygame.font.SysFont("Consolas", 16),
+        "popup": pygame.font.SysFont("Consolas", 16, bold=True),
+        "big": pygame.font.SysFont("Consolas", 64, bold=True),
+        "med": pygame.font.SysFont("Consolas", 32),
+        "small": pygame.font.SysFont("Consolas", 20),
+    }
     shoot_sound = None
     explode_sound = None
     explode_channel = None
@@ -1100,20 +5526,12 @@ def main():
             discover_sound = None
             discover_channel = None
 
-    def attenuate_volume(world_pos, base_volume=1.0):
-        if world_pos is None:
-            return base_volume
-        dist = (world_pos - ship_pos).length()
-        if dist <= SOUND_NEAR_RADIUS:
-            return base_volume
-        if dist >= SOUND_FAR_RADIUS:
-            return 0.0
-        t = (SOUND_FAR_RADIUS - dist) / (SOUND_FAR_RADIUS - SOUND_NEAR_RADIUS)
-        return base_volume * t
-
-    def play_explode_sound(world_pos=None):
+    def play_shoot_sound(volume):
+        if shoot_sound:
+            shoot_sound.play()
+
+    def play_explode_sound(volume):
         if explode_sound:
-            volume = attenuate_volume(world_pos, 1.0)
             if volume <= 0.0:
                 return
             if explode_channel:
@@ -1124,11 +5542,11 @@ def main():
                 if channel:
                     channel.set_volume(volume)
 
-    def play_asteroid_explode_sound():
+    def play_asteroid_explode_sound(volume):
         return
-    def play_shield_sound():
+    def play_shield_sound(volume):
         return
-    def play_discover_sound(world_pos=None):
+    def play_discover_sound(volume):
         if discover_sound:
             volume = 0.6
             if discover_channel:
@@ -1138,6 +5556,13 @@ def main():
                 channel = discover_sound.play()
                 if channel:
                     channel.set_volume(volume)
+    sound_players = {
+        "shoot": play_shoot_sound,
+        "explode": play_explode_sound,
+        "asteroid_explode": play_asteroid_explode_sound,
+        "shield": play_shield_sound,
+        "discover": play_discover_sound,
+    }
     joystick = None
     joy_name = "none"
     joy_axes = 0
@@ -1152,1518 +5577,242 @@ def main():
         joy_buttons = joystick.get_numbuttons()
         joy_hats = joystick.get_numhats()
 
-    seed = seed_from_time()
-    asteroids, pickups, enemies, landmarks, stars, freighters, boss, boss_escorts = new_world(seed)
-    planet_total = count_planets(landmarks)
-
-    ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-    ship_vel = pygame.Vector2(0, 0)
-    ship_angle = -90
+    if args.parallel_worldgen:
+        WORLD_POOL = start_world_pool()
+    seed = seed_from_time() if args.seed is None else args.seed
+    sim = None
+    if args.split_process:
+        # The worker owns the real game state; this process keeps a view of
+        # it rebuilt from each published snapshot, plus the seed-derived
+        # landmarks and starfield which never travel over shared memory.
+        sim = start_simulation(seed)
+        landmarks = generate_landmarks(seed)
+        landmarks_by_id = {landmark.id: landmark for landmark in landmarks}
+        WORLD_GEN_STATS.placement = landmark_placement(landmarks)
+        stars = generate_starfield(seed)
+        state = GameState(
+            seed=seed,
+            asteroids=[],
+            pickups=[],
+            enemies=[],
+            landmarks=landmarks,
+            freighters=[],
+            boss=None,
+            boss_escorts=[],
+            planet_total=count_planets(landmarks),
+        )
+    else:
+        state, stars = new_game_state(seed)
+    # The next world is built on a background thread while this one is
+    # played, so N only swaps it in; the split worker does the same itself.
+    prefetcher = None
+    if not sim:
+        prefetcher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="world-prefetch")
+        prefetch = prefetch_world(prefetcher, seed)
+    idle_wait_ms = SIM_IDLE_WAIT_MS if sim else IDLE_WAIT_MS
 
-    bullets = []
-    enemy_bullets = []
-    bullet_pool = []
-    enemy_bullet_pool = []
-    damage_popups = []
-    damage_popup_pool = []
-    beacons = {}
-    enemy_shards = []
-    enemy_shard_pool = []
-    mines = []
-    fire_timer = 0.0
-    player_attack_timer = 0.0
-    enemies_destroyed = 0
-    boosts_used = 0
-    boss_defeated = False
-    score = 0
-    lives = 3
-    game_over = False
-    last_death_cause = None
-
-    shield_time = 10.0
-    shield_size_mult = 3.0
-    shield_stock = 0
-    rapid_time = 0.0
-    rapid_stock = 0
-    spread_time = 0.0
-    spread_stock = 0
-    mine_stock = 0
-    boost_time = 0.0
-    boost_stock = 0
-    mine_cooldown = 0.0
-    asteroid_spawn_timer = 0.0
-    enemy_spawn_timer = 0.0
-    thrusting_render = False
-    stopping_render = False
-    stop_thruster_timer = 0.0
-    stop_thruster_held = False
-    stop_thruster_side = "both"
     show_map = False
     show_objectives = False
-    discovered_planets = set()
-    god_mode = False
-    escorts_alerted = False
+    overlay_dirty = True
+    input_latency = InputLatency()
+    hud = HudLayer()
+    display = DisplayList()
+    map_layer = MapLayer()
+    capture = start_capture(screen, args.capture, args.capture_format) if args.capture else None
+    governor = QualityGovernor()
+    if args.quality is not None:
+        governor.level = args.quality
+        governor.pinned = True
+    quality = QUALITY_LEVELS[governor.level]
 
     running = True
-    while running:
-        dt = clock.tick(FPS) / 1000.0
-        ship_prev = pygame.Vector2(ship_pos)
-        shield_prev = shield_time
-
-        for event in pygame.event.get([pygame.QUIT, pygame.KEYDOWN, pygame.JOYBUTTONDOWN]):
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_F1:
+    try:
+        while running:
+            dt = clock.tick(FPS) / 1000.0
+            frame_start = time.perf_counter()
+
+            actions = poll_actions(input_latency)
+            if actions:
+                overlay_dirty = True
+            game_actions = []
+            world_actions = []
+            for action in actions:
+                if action == "quit":
+                    running = False
+                elif action == "toggle_debug":
                     show_gamepad_debug = not show_gamepad_debug
-                elif event.key == pygame.K_F3:
-                    play_explode_sound(ship_pos)
-                elif event.key == pygame.K_m:
+                elif action == "test_sound":
+                    play_explode_sound(1.0)
+                elif action == "toggle_map":
                     show_map = not show_map
                     if show_map:
                         show_objectives = False
-                elif event.key == pygame.K_o:
+                elif action == "toggle_objectives":
                     show_objectives = not show_objectives
                     if show_objectives:
                         show_map = False
-                elif event.key == pygame.K_F2:
-                    god_mode = not god_mode
-                    if god_mode:
-                        shield_stock += 4
-                        rapid_stock += 4
-                        spread_stock += 4
-                        mine_stock += 4
-                        boost_stock += 4
-                elif event.key == pygame.K_1 and not game_over:
-                    if shield_stock > 0 and shield_time <= 0:
-                        shield_stock -= 1
-                        shield_time = POWERUP_TIME
-                        shield_size_mult = 1.0
-                        play_shield_sound()
-                elif event.key == pygame.K_3 and not game_over:
-                    if spread_stock > 0 and spread_time <= 0:
-                        spread_stock -= 1
-                        spread_time = SPREAD_TIME
-                elif event.key == pygame.K_4 and not game_over:
-                    if mine_stock > 0 and mine_cooldown <= 0:
-                        mines.append({"pos": pygame.Vector2(ship_pos), "ttl": MINE_TTL})
-                        mine_stock -= 1
-                        mine_cooldown = MINE_DROP_COOLDOWN
-                elif event.key == pygame.K_5 and not game_over:
-                    if rapid_stock > 0 and rapid_time <= 0:
-                        rapid_stock -= 1
-                        rapid_time = POWERUP_TIME
-                elif event.key == pygame.K_2 and not game_over:
-                    if boost_stock > 0 and boost_time <= 0:
-                        boost_stock -= 1
-                        boost_time = BOOST_TIME
-                        boosts_used += 1
-            elif event.type == pygame.JOYBUTTONDOWN:
-                if event.button == BTN_MAP:
-                    show_map = not show_map
-                elif event.button == BTN_S and not game_over:
-                    if shield_stock > 0 and shield_time <= 0:
-                        shield_stock -= 1
-                        shield_time = POWERUP_TIME
-                        shield_size_mult = 1.0
-                        play_shield_sound()
-                elif event.button == BTN_T and not game_over:
-                    if boost_stock > 0 and boost_time <= 0:
-                        boost_stock -= 1
-                        boost_time = BOOST_TIME
-                        boosts_used += 1
-                elif event.button == BTN_O and not game_over:
-                    if spread_stock > 0 and spread_time <= 0:
-                        spread_stock -= 1
-                        spread_time = SPREAD_TIME
-                elif event.button == BTN_L3 and not game_over:
-                    if mine_stock > 0 and mine_cooldown <= 0:
-                        mines.append({"pos": pygame.Vector2(ship_pos), "ttl": MINE_TTL})
-                        mine_stock -= 1
-                        mine_cooldown = MINE_DROP_COOLDOWN
-
-        keys = pygame.key.get_pressed()
-        if joystick:
-            pygame.event.pump()
-        if keys[pygame.K_ESCAPE]:
-            running = False
-
-        if show_map:
-            screen.fill(COLORS["bg"])
-            margin = 80
-            map_w = WIDTH - margin * 2
-            map_h = HEIGHT - margin * 2
-            map_rect = pygame.Rect(margin, margin, map_w, map_h)
-            pygame.draw.rect(screen, COLORS["ui"], map_rect, 2)
-            map_scale_x = map_rect.width / WORLD_WIDTH
-            map_scale_y = map_rect.height / WORLD_HEIGHT
-            map_scale = min(map_scale_x, map_scale_y)
-            for landmark in landmarks:
-                kind = landmark.kind
-                if kind == "planet":
-                    color = COLORS["planet"]
-                elif kind == "moon":
-                    if landmark.parent_id not in discovered_planets:
-                        continue
-                    color = COLORS["moon"]
-                else:
-                    continue
-                map_x = map_rect.x + (landmark.pos.x / WORLD_WIDTH) * map_rect.width
-                map_y = map_rect.y + (landmark.pos.y / WORLD_HEIGHT) * map_rect.height
-                map_radius = max(1, int(landmark.radius * map_scale))
-                pygame.draw.circle(screen, color, (int(map_x), int(map_y)), map_radius, 1)
-                if kind == "planet" and landmark.id in beacons:
-                    beacon = beacons[landmark.id]
-                    label = font.render(beacon["code"], True, COLORS["ui"])
-                    screen.blit(label, (map_x + 6, map_y - 6))
-            for freighter in freighters:
-                map_x = map_rect.x + (freighter["pos"].x / WORLD_WIDTH) * map_rect.width
-                map_y = map_rect.y + (freighter["pos"].y / WORLD_HEIGHT) * map_rect.height
-                pygame.draw.circle(screen, COLORS["freighter"], (int(map_x), int(map_y)), 3, 0)
-            if boss:
-                map_x = map_rect.x + (boss.pos.x / WORLD_WIDTH) * map_rect.width
-                map_y = map_rect.y + (boss.pos.y / WORLD_HEIGHT) * map_rect.height
-                pygame.draw.circle(screen, COLORS["boss"], (int(map_x), int(map_y)), 6, 0)
-                pygame.draw.circle(screen, COLORS["boss_shield"], (int(map_x), int(map_y)), 9, 1)
-            map_x = map_rect.x + (ship_pos.x / WORLD_WIDTH) * map_rect.width
-            map_y = map_rect.y + (ship_pos.y / WORLD_HEIGHT) * map_rect.height
-            pygame.draw.circle(screen, COLORS["pickup_shield"], (int(map_x), int(map_y)), 5, 0)
-            title = font.render("Map - press M to close", True, COLORS["ui"])
-            screen.blit(title, (WIDTH / 2 - title.get_width() / 2, 24))
-            pygame.display.flip()
-            continue
-        if show_objectives:
-            screen.fill(COLORS["bg"])
-            title = font.render("Objectives - press O to close", True, COLORS["ui"])
-            screen.blit(title, (WIDTH / 2 - title.get_width() / 2, 24))
-            planet_goal = planet_total if planet_total > 0 else 10
-            objectives = [
-                ("Defeat boss", boss_defeated),
-                ("First kill", enemies_destroyed >= 1),
-                (f"Discover all {planet_goal} planets", len(discovered_planets) >= planet_goal),
-                (f"Destroy {OBJECTIVE_ENEMIES_10} enemies", enemies_destroyed >= OBJECTIVE_ENEMIES_10),
-                (f"Destroy {OBJECTIVE_ENEMIES_50} enemies", enemies_destroyed >= OBJECTIVE_ENEMIES_50),
-                (f"Boost {OBJECTIVE_BOOST_50} times", boosts_used >= OBJECTIVE_BOOST_50),
-            ]
-            start_y = 120
-            line_gap = 40
-            for index, (label, completed) in enumerate(objectives):
-                prefix = "[x]" if completed else "[ ]"
-                line = f"{prefix} {label}"
-                color = COLORS["ui"] if completed else scale_color(COLORS["ui"], 0.75)
-                line_surface = font.render(line, True, color)
-                screen.blit(line_surface, (120, start_y + index * line_gap))
-            pygame.display.flip()
-            continue
-
-        if keys[pygame.K_n]:
-            seed = seed_from_time()
-            asteroids, pickups, enemies, landmarks, stars, freighters, boss, boss_escorts = new_world(seed)
-            bullets = []
-            enemy_bullets = []
-            bullet_pool = []
-            enemy_bullet_pool = []
-            damage_popups = []
-            damage_popup_pool = []
-            beacons = {}
-            enemy_shards = []
-            enemy_shard_pool = []
-            mines = []
-            ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-            ship_vel = pygame.Vector2(0, 0)
-            ship_angle = -90
-            planet_total = count_planets(landmarks)
-            score = 0
-            lives = 3
-            shield_time = 10.0
-            shield_size_mult = 3.0
-            shield_stock = 0
-            rapid_time = 0.0
-            rapid_stock = 0
-            spread_time = 0.0
-            spread_stock = 0
-            mine_stock = 0
-            boost_time = 0.0
-            boost_stock = 0
-            mine_cooldown = 0.0
-            game_over = False
-            last_death_cause = None
-            discovered_planets = set()
-            enemies_destroyed = 0
-            boosts_used = 0
-            boss_defeated = False
-
-        if keys[pygame.K_F5]:
-            state = {
-                "seed": seed,
-                "player": {
-                    "pos": serialize_vec(ship_pos),
-                    "vel": serialize_vec(ship_vel),
-                    "angle": ship_angle,
-                    "score": score,
-                    "lives": lives,
-                    "shield_time": shield_time,
-                    "shield_stock": shield_stock,
-                    "rapid_time": rapid_time,
-                    "rapid_stock": rapid_stock,
-                    "spread_time": spread_time,
-                    "spread_stock": spread_stock,
-                    "mine_stock": mine_stock,
-                    "boost_time": boost_time,
-                    "boost_stock": boost_stock,
-                },
-                "asteroids": [serialize_asteroid(a) for a in asteroids],
-                "pickups": [serialize_pickup(p) for p in pickups],
-                "discovered_planets": sorted(discovered_planets),
-                "objectives": {
-                    "boss_defeated": boss_defeated,
-                    "enemies_destroyed": enemies_destroyed,
-                    "boosts_used": boosts_used,
-                },
-            }
-            save_state(state)
-
-        if keys[pygame.K_F6]:
-            data = load_state()
-            if data:
-                seed = data["seed"]
-                asteroids = [deserialize_asteroid(a) for a in data["asteroids"]]
-                pickups = [deserialize_pickup(p) for p in data["pickups"]]
-                bullet_pool = []
-                enemy_bullet_pool = []
-                damage_popups = []
-                damage_popup_pool = []
-                beacons = {}
-                enemy_shards = []
-                enemy_shard_pool = []
-                mines = []
-                landmarks = generate_landmarks(seed)
-                planet_total = count_planets(landmarks)
-                enemies = generate_enemies(seed, pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2), landmarks)
-                boss, boss_escorts = spawn_boss_with_escorts(seed)
-                enemies.extend(boss_escorts)
-                stars = generate_starfield(seed)
-                freighters = generate_freighters(seed, landmarks)
-                player = data["player"]
-                ship_pos = deserialize_vec(player["pos"])
-                ship_vel = deserialize_vec(player["vel"])
-                ship_angle = player["angle"]
-                score = player["score"]
-                lives = player["lives"]
-                shield_time = player["shield_time"]
-                shield_stock = player.get("shield_stock", 0)
-                rapid_time = player["rapid_time"]
-                rapid_stock = player.get("rapid_stock", 0)
-                spread_time = player.get("spread_time", 0.0)
-                spread_stock = player.get("spread_stock", 0)
-                mine_stock = player.get("mine_stock", 0)
-                boost_time = player.get("boost_time", 0.0)
-                boost_stock = player.get("boost_stock", 0)
-                mine_cooldown = 0.0
-                shield_size_mult = 1.0
-                game_over = False
-                last_death_cause = None
-                discovered_planets = set(data.get("discovered_planets", []))
-                objectives = data.get("objectives", {})
-                boss_defeated = objectives.get("boss_defeated", False)
-                enemies_destroyed = objectives.get("enemies_destroyed", 0)
-                boosts_used = objectives.get("boosts_used", 0)
-
-        strafe_left = False
-        strafe_right = False
-        if not game_over:
-            turn = 0
-            thrusting = False
-            reversing = False
-            stopping = False
-            hat_x = 0
-            hat_y = 0
-            fire_button = False
-            stop_button = False
-            thrust_button = False
-            axis_x = 0.0
-            axis_y = 0.0
-            axis_lt = -1.0
-            axis_rt = -1.0
-            axis_values = []
-            if joystick:
-                button_count = joystick.get_numbuttons()
-                if button_count > D_PAD_RIGHT:
-                    dpad_left = joystick.get_button(D_PAD_LEFT)
-                    dpad_right = joystick.get_button(D_PAD_RIGHT)
-                    dpad_up = joystick.get_button(D_PAD_UP)
-                    dpad_down = joystick.get_button(D_PAD_DOWN)
-                    hat_x = -1 if dpad_left else (1 if dpad_right else 0)
-                    hat_y = 1 if dpad_up else (-1 if dpad_down else 0)
-                elif joystick.get_numhats() > 0:
-                    hat = joystick.get_hat(0)
-                    hat_x, hat_y = hat[0], hat[1]
-                if joystick.get_numaxes() > 0:
-                    axis_values = [joystick.get_axis(i) for i in range(joystick.get_numaxes())]
-                    if len(axis_values) > JOY_AXIS_LX:
-                        axis_x = axis_values[JOY_AXIS_LX]
-                    if len(axis_values) > JOY_AXIS_LY:
-                        axis_y = axis_values[JOY_AXIS_LY]
-                    if len(axis_values) > JOY_AXIS_LT:
-                        axis_lt = axis_values[JOY_AXIS_LT]
-                    if len(axis_values) > JOY_AXIS_RT:
-                        axis_rt = axis_values[JOY_AXIS_RT]
-                fire_button = joystick.get_button(BTN_X) if button_count > BTN_X else False
-                stop_button = joystick.get_button(BTN_L1) if button_count > BTN_L1 else False
-                thrust_button = joystick.get_button(BTN_R1) if button_count > BTN_R1 else False
-            if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-                turn -= 1
-            if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-                turn += 1
-            if keys[pygame.K_UP] or keys[pygame.K_w]:
-                thrusting = True
-            if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-                reversing = True
-            if keys[pygame.K_q]:
-                strafe_left = True
-            if keys[pygame.K_e]:
-                strafe_right = True
-            if keys[pygame.K_LSHIFT]:
-                stopping = True
-            if joystick and thrust_button:
-                thrusting = True
-            if hat_x < 0:
-                turn -= 1
-            if hat_x > 0:
-                turn += 1
-            if hat_y > 0:
-                thrusting = True
-            if hat_y < 0:
-                reversing = True
-            if hat_x == 0 and hat_y == 0:
-                if axis_x < -JOY_AXIS_DEADZONE:
-                    turn -= 1
-                if axis_x > JOY_AXIS_DEADZONE:
-                    turn += 1
-                if axis_y > JOY_AXIS_DEADZONE:
-                    reversing = True
-            if axis_lt > JOY_AXIS_DEADZONE:
-                strafe_left = True
-            if axis_rt > JOY_AXIS_DEADZONE:
-                strafe_right = True
-            if stop_button:
-                stopping = True
-            thrusting_render = thrusting
-            stopping_render = stopping
-            if stopping_render and not stop_thruster_held:
-                stop_thruster_timer = STOP_THRUSTER_TTL
-            stop_thruster_held = stopping_render
-
-            boost_multiplier = BOOST_MULTIPLIER if boost_time > 0 else 1.0
-            ship_angle += turn * SHIP_TURN_SPEED * dt
-            if thrusting:
-                ship_vel += angle_to_vector(ship_angle) * (SHIP_THRUST * boost_multiplier) * dt
-            if reversing:
-                forward = angle_to_vector(ship_angle)
-                forward_speed = ship_vel.dot(forward)
-                if forward_speed > 10:
-                    ship_vel -= ship_vel.normalize() * SHIP_BRAKE * dt
-                else:
-                    ship_vel -= forward * SHIP_REVERSE_THRUST * dt
-            if strafe_left:
-                ship_vel += angle_to_vector(ship_angle - 90) * (SHIP_THRUST * boost_multiplier) * dt
-            if strafe_right:
-                ship_vel += angle_to_vector(ship_angle + 90) * (SHIP_THRUST * boost_multiplier) * dt
-            if stopping:
-                ship_vel *= max(0.0, 1.0 - SHIP_STOP_DAMP * dt)
-
-            max_speed = SHIP_MAX_SPEED * boost_multiplier
-            if ship_vel.length() > max_speed:
-                ship_vel.scale_to_length(max_speed)
-
-            new_pos = ship_pos + ship_vel * dt
-            ship_pos = clamp_position(new_pos, SHIP_RADIUS)
-            ship_prev = pygame.Vector2(ship_pos)
-
-            fire_timer = max(0.0, fire_timer - dt)
-            player_attack_timer = max(0.0, player_attack_timer - dt)
-            rapid_multiplier = 0.55 if rapid_time > 0 else 1.0
-            cooldown = FIRE_COOLDOWN * rapid_multiplier
-            if (keys[pygame.K_SPACE] or fire_button) and fire_timer <= 0.0:
-                angles = [ship_angle]
-                if spread_time > 0:
-                    angles = [ship_angle - SPREAD_ANGLE, ship_angle, ship_angle + SPREAD_ANGLE]
-                for angle in angles:
-                    bullet_vel = angle_to_vector(angle) * BULLET_SPEED + ship_vel * 0.35
-                    if bullet_pool:
-                        bullet = bullet_pool.pop()
-                        bullet["pos"].update(ship_pos)
-                        bullet["vel"].update(bullet_vel)
-                        bullet["ttl"] = BULLET_TTL
-                    else:
-                        bullet = {"pos": pygame.Vector2(ship_pos), "vel": bullet_vel, "ttl": BULLET_TTL}
-                    bullets.append(bullet)
-                if shoot_sound:
-                    shoot_sound.play()
-                player_attack_timer = PLAYER_ATTACK_MEMORY
-                fire_timer = cooldown
-
-        if god_mode:
-            shield_time = 10.0
-            shield_size_mult = 3.0
-        else:
-            shield_time = max(0.0, shield_time - dt)
-            if shield_time <= 0 and shield_size_mult != 1.0:
-                shield_size_mult = 1.0
-        rapid_time = max(0.0, rapid_time - dt)
-        spread_time = max(0.0, spread_time - dt)
-        boost_time = max(0.0, boost_time - dt)
-        mine_cooldown = max(0.0, mine_cooldown - dt)
-        stop_thruster_timer = max(0.0, stop_thruster_timer - dt)
-
-        for i in range(len(bullets) - 1, -1, -1):
-            bullet = bullets[i]
-            bullet["pos"] += bullet["vel"] * dt
-            bullet["ttl"] -= dt
-            if bullet["ttl"] <= 0:
-                bullets.pop(i)
-                bullet_pool.append(bullet)
-
-        for i in range(len(enemy_bullets) - 1, -1, -1):
-            bullet = enemy_bullets[i]
-            bullet["pos"] += bullet["vel"] * dt
-            bullet["ttl"] -= dt
-            if bullet["ttl"] <= 0:
-                enemy_bullets.pop(i)
-                enemy_bullet_pool.append(bullet)
-
-        for i in range(len(enemy_shards) - 1, -1, -1):
-            shard = enemy_shards[i]
-            shard["start"] += shard["vel"] * dt
-            shard["end"] += shard["vel"] * dt
-            shard["ttl"] -= dt
-            if shard["ttl"] <= 0:
-                enemy_shards.pop(i)
-                enemy_shard_pool.append(shard)
-
-        for asteroid in asteroids:
-            asteroid.pos += asteroid.vel * dt
-            asteroid.angle += asteroid.spin * dt
-            if asteroid.pos.x < asteroid.radius:
-                asteroid.pos.x = asteroid.radius
-                asteroid.vel.x = abs(asteroid.vel.x)
-            elif asteroid.pos.x > WORLD_WIDTH - asteroid.radius:
-                asteroid.pos.x = WORLD_WIDTH - asteroid.radius
-                asteroid.vel.x = -abs(asteroid.vel.x)
-            if asteroid.pos.y < asteroid.radius:
-                asteroid.pos.y = asteroid.radius
-                asteroid.vel.y = abs(asteroid.vel.y)
-            elif asteroid.pos.y > WORLD_HEIGHT - asteroid.radius:
-                asteroid.pos.y = WORLD_HEIGHT - asteroid.radius
-                asteroid.vel.y = -abs(asteroid.vel.y)
-
-        for i in range(len(damage_popups) - 1, -1, -1):
-            popup = damage_popups[i]
-            popup["pos"] += popup["vel"] * dt
-            popup["ttl"] -= dt
-            if popup["ttl"] <= 0:
-                damage_popups.pop(i)
-                damage_popup_pool.append(popup)
-
-        enemy_spawn_timer -= dt
-        if enemy_spawn_timer <= 0:
-            enemy_spawn_timer = ENEMY_SPAWN_INTERVAL
-            radius_sq = ENEMY_NEARBY_RADIUS * ENEMY_NEARBY_RADIUS
-            nearby = 0
-            for enemy in enemies:
-                if (enemy.pos - ship_pos).length_squared() <= radius_sq:
-                    nearby += 1
-            if nearby < ENEMY_NEARBY_TARGET:
-                rng = random.Random(seed + score + int(time.time()))
-                to_spawn = min(6, ENEMY_NEARBY_TARGET - nearby)
-                for _ in range(to_spawn):
-                    chance = elite_spawn_chance(ship_pos.x)
-                    enemies.append(spawn_enemy_near(rng, ship_pos, landmarks, elite=rng.random() < chance))
-        despawn_sq = ENEMY_DESPAWN_RADIUS * ENEMY_DESPAWN_RADIUS
-        for enemy in enemies[:]:
-            if enemy.escort:
-                continue
-            if (enemy.pos - ship_pos).length_squared() > despawn_sq:
-                remove_enemy(enemies, enemy, boss_escorts)
-
-        asteroid_spawn_timer -= dt
-        if asteroid_spawn_timer <= 0:
-            asteroid_spawn_timer = ASTEROID_SPAWN_INTERVAL
-            nearby = 0
-            radius_sq = ASTEROID_NEARBY_RADIUS * ASTEROID_NEARBY_RADIUS
-            for asteroid in asteroids:
-                if (asteroid.pos - ship_pos).length_squared() <= radius_sq:
-                    nearby += 1
-            if nearby < ASTEROID_NEARBY_TARGET:
-                rng = random.Random(seed + score + int(time.time()))
-                to_spawn = min(6, ASTEROID_NEARBY_TARGET - nearby)
-                for _ in range(to_spawn):
-                    size = 4 if rng.random() < 0.12 else 3
-                    asteroids.append(spawn_asteroid_near(rng, size, ship_pos))
-
-        boss_escorts = [enemy for enemy in enemies if enemy.escort]
-        escorts_alive = len(boss_escorts) > 0
-        formation_active = False
-        escorts_pursuing = False
-        if boss and escorts_alive:
-            within_pursue_radius = False
-            for escort in boss_escorts:
-                if (ship_pos - escort.pos).length_squared() <= ENEMY_PURSUE_RADIUS * ENEMY_PURSUE_RADIUS:
-                    within_pursue_radius = True
-                    break
-            if not within_pursue_radius:
-                escorts_alerted = False
-            escorts_pursuing = escorts_alerted
-        if boss:
-            to_player = ship_pos - boss.pos
-            formation_active = escorts_alive and not escorts_pursuing
-            if escorts_alive and escorts_pursuing:
-                boss.vel = pygame.Vector2(0, 0)
-                if to_player.length_squared() > 0:
-                    boss.angle = turn_towards(boss.angle, vector_to_angle(to_player), BOSS_TURN_SPEED * dt)
-            elif escorts_alive:
-                target = boss.patrol_points[boss.patrol_index]
-                to_target = target - boss.pos
-                if to_target.length_squared() <= BOSS_PATROL_NODE_RADIUS * BOSS_PATROL_NODE_RADIUS:
-                    boss.patrol_index = (boss.patrol_index + 1) % len(boss.patrol_points)
-                    target = boss.patrol_points[boss.patrol_index]
-                    to_target = target - boss.pos
-                if to_target.length_squared() > 0:
-                    target_angle = vector_to_angle(to_target)
-                    boss.angle = turn_towards(boss.angle, target_angle, BOSS_TURN_SPEED * dt)
-                    boss.vel = angle_to_vector(boss.angle) * BOSS_PATROL_SPEED
-                else:
-                    boss.vel = pygame.Vector2(0, 0)
-                boss.pos += boss.vel * dt
-            else:
-                if to_player.length_squared() > 0:
-                    target_angle = vector_to_angle(to_player)
-                    boss.angle = turn_towards(boss.angle, target_angle, BOSS_TURN_SPEED * dt)
-                if to_player.length_squared() <= BOSS_HOLD_RADIUS * BOSS_HOLD_RADIUS:
-                    boss.vel = pygame.Vector2(0, 0)
-                else:
-                    boss.vel = angle_to_vector(boss.angle) * (SHIP_MAX_SPEED * 0.5)
-                boss.pos += boss.vel * dt
-                boss.fire_timer = max(0.0, boss.fire_timer - dt)
-                if boss.fire_timer <= 0.0:
-                    bullet_vel = angle_to_vector(boss.angle) * BOSS_BULLET_SPEED + boss.vel * 0.2
-                    if enemy_bullet_pool:
-                        bullet = enemy_bullet_pool.pop()
-                        bullet["pos"].update(boss.pos)
-                        bullet["vel"].update(bullet_vel)
-                        bullet["ttl"] = ENEMY_BULLET_TTL
-                        bullet["radius"] = BOSS_BULLET_RADIUS
-                    else:
-                        bullet = {
-                            "pos": pygame.Vector2(boss.pos),
-                            "vel": bullet_vel,
-                            "ttl": ENEMY_BULLET_TTL,
-                            "radius": BOSS_BULLET_RADIUS,
-                        }
-                    enemy_bullets.append(bullet)
-                    boss.fire_timer = BOSS_FIRE_COOLDOWN
-            boss.pos = clamp_position(boss.pos, BOSS_RADIUS)
-
-        for enemy in enemies[:]:
-            escort_override = False
-            dist_sq = 0.0
-            if boss and formation_active and enemy.escort:
-                desired_pos = boss.pos + enemy.escort_offset.rotate(boss.angle)
-                to_desired = desired_pos - enemy.pos
-                dist = to_desired.length()
-                if dist > 1:
-                    return_speed = ENEMY_PURSUE_SPEED * 2.0
-                    max_step = return_speed * dt
-                    if dist <= max_step:
-                        enemy.pos = pygame.Vector2(desired_pos)
-                        enemy.vel = pygame.Vector2(0, 0)
-                        enemy.angle = boss.angle
-                    else:
-                        target_angle = vector_to_angle(to_desired)
-                        enemy.angle = turn_towards(enemy.angle, target_angle, ENEMY_TURN_SPEED * dt * 1.5)
-                        enemy.vel = angle_to_vector(enemy.angle) * return_speed
-                        enemy.pos = enemy.pos + enemy.vel * dt
-                else:
-                    enemy.pos = pygame.Vector2(desired_pos)
-                    enemy.vel = pygame.Vector2(0, 0)
-                    enemy.angle = boss.angle
-                enemy.pursuing = False
-                continue
-            if boss and enemy.escort and escorts_pursuing:
-                escort_override = True
-                to_player = ship_pos - enemy.pos
-                dist_sq = to_player.length_squared()
-                if dist_sq > 0:
-                    target_angle = vector_to_angle(to_player)
-                    enemy.angle = turn_towards(enemy.angle, target_angle, ENEMY_TURN_SPEED * dt)
-                speed_mult = ELITE_ENEMY_SPEED_MULT if enemy.elite else 1.0
-                enemy.vel = angle_to_vector(enemy.angle) * (ENEMY_PURSUE_SPEED * speed_mult)
-                enemy.pos = enemy.pos + enemy.vel * dt
-                enemy.pursuing = True
-            if not escort_override:
-                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-                to_player = ship_pos - enemy.pos
-                dist_sq = to_player.length_squared()
-                pursuing = dist_sq <= ENEMY_PURSUE_RADIUS * ENEMY_PURSUE_RADIUS
-                enemy.pursuing = pursuing
-                speed_mult = ELITE_ENEMY_SPEED_MULT if enemy.elite else 1.0
-                if pursuing and dist_sq > 0:
-                    target_angle = vector_to_angle(to_player)
-                    enemy.angle = turn_towards(enemy.angle, target_angle, ENEMY_TURN_SPEED * dt)
-                    if dist_sq <= ENEMY_HOLD_RADIUS * ENEMY_HOLD_RADIUS and ship_vel.length() <= ENEMY_HOLD_PLAYER_SPEED:
-                        speed = 0.0
-                    else:
-                        speed = ENEMY_PURSUE_SPEED * speed_mult
-                else:
-                    enemy.wander_timer -= dt
-                    if enemy.wander_timer <= 0:
-                        enemy.wander_timer = random.uniform(0.8, 2.2)
-                        enemy.wander_angle = (enemy.angle + random.uniform(-120, 120)) % 360
-                    enemy.angle = turn_towards(enemy.angle, enemy.wander_angle, ENEMY_TURN_SPEED * dt * 0.6)
-                    speed = ENEMY_SCOUT_SPEED * speed_mult
-
-                enemy.vel = angle_to_vector(enemy.angle) * speed
-                enemy.pos = enemy.pos + enemy.vel * dt
-                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-            else:
-                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-            if (
-                enemy.pos.x < -enemy_radius
-                or enemy.pos.x > WORLD_WIDTH + enemy_radius
-                or enemy.pos.y < -enemy_radius
-                or enemy.pos.y > WORLD_HEIGHT + enemy_radius
-            ):
-                if enemy.escort:
-                    enemy.pos = clamp_position(enemy.pos, enemy_radius)
-                    enemy.vel = pygame.Vector2(0, 0)
-                else:
-                    remove_enemy(enemies, enemy, boss_escorts)
-                    continue
-            fire_rate_mult = ELITE_ENEMY_FIRE_RATE_MULT if enemy.elite else 1.0
-            bullet_speed_mult = ELITE_ENEMY_BULLET_SPEED_MULT if enemy.elite else 1.0
-            enemy.fire_timer = max(0.0, enemy.fire_timer - dt)
-            if (
-                enemy.pursuing
-                and dist_sq <= ENEMY_FIRE_RANGE * ENEMY_FIRE_RANGE
-                and enemy.fire_timer <= 0.0
-            ):
-                bullet_vel = angle_to_vector(enemy.angle) * (ENEMY_BULLET_SPEED * bullet_speed_mult) + enemy.vel * 0.2
-                if enemy_bullet_pool:
-                    bullet = enemy_bullet_pool.pop()
-                    bullet["pos"].update(enemy.pos)
-                    bullet["vel"].update(bullet_vel)
-                    bullet["ttl"] = ENEMY_BULLET_TTL
-                    bullet["radius"] = 2
+                elif action in ("zoom_in", "zoom_out"):
+                    step = -1 if action == "zoom_in" else 1
+                    zoom_level = min(len(CAMERA_ZOOM_LEVELS) - 1, max(0, zoom_level + step))
+                    CAMERA_ZOOM = CAMERA_ZOOM_LEVELS[zoom_level] * RENDER_SCALE
+                elif action in ("new_seed", "save", "load"):
+                    world_actions.append(action)
                 else:
-                    bullet = {"pos": pygame.Vector2(enemy.pos), "vel": bullet_vel, "ttl": ENEMY_BULLET_TTL, "radius": 2}
-                enemy_bullets.append(bullet)
-                enemy.fire_timer = ENEMY_FIRE_COOLDOWN / fire_rate_mult
-
-        for freighter in freighters:
-            to_target = freighter["target"] - freighter["pos"]
-            dist_sq = to_target.length_squared()
-            if dist_sq <= 160 * 160:
-                if freighter["target"] == freighter["to"]:
-                    freighter["target"] = pygame.Vector2(freighter["from"])
-                else:
-                    freighter["target"] = pygame.Vector2(freighter["to"])
-                to_target = freighter["target"] - freighter["pos"]
-            if to_target.length_squared() > 0:
-                freighter["angle"] = vector_to_angle(to_target)
-                freighter["vel"] = to_target.normalize() * freighter["speed"]
-            else:
-                freighter["vel"] = pygame.Vector2(0, 0)
-            freighter["pos"] = freighter["pos"] + freighter["vel"] * dt
-
-        # Pickups persist until collected.
-
-        if not game_over:
-            if shield_prev > 0 and shield_time <= 0:
-                for asteroid in asteroids:
-                    hit_radius = asteroid.radius + SHIP_RADIUS
-                    if moving_circle_hit(ship_pos, ship_pos, asteroid.pos, asteroid.pos, hit_radius):
-                        play_explode_sound(ship_pos)
-                        lives -= 1
-                        last_death_cause = "asteroid"
-                        ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                        ship_vel = pygame.Vector2(0, 0)
-                        shield_time = 10.0
-                        shield_size_mult = 3.0
-                        rapid_time = 0.0
-                        spread_time = 0.0
-                        boost_time = 0.0
-                        if lives <= 0:
-                            game_over = True
-                        break
-                if not game_over:
-                    for landmark in landmarks:
-                        hit_radius = landmark.radius + SHIP_RADIUS
-                        if moving_circle_hit(ship_pos, ship_pos, landmark.pos, landmark.pos, hit_radius):
-                            play_explode_sound(ship_pos)
-                            lives -= 1
-                            if landmark.kind == "moon":
-                                last_death_cause = "moon"
-                            else:
-                                last_death_cause = "planet"
-                            ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                            ship_vel = pygame.Vector2(0, 0)
-                            shield_time = 10.0
-                            shield_size_mult = 3.0
-                            rapid_time = 0.0
-                            spread_time = 0.0
-                            boost_time = 0.0
-                            if lives <= 0:
-                                game_over = True
-                                break
-
-            for pickup in pickups:
-                pickup_hit_radius = SHIP_RADIUS + PICKUP_RADIUS * 0.8
-                if moving_circle_hit(ship_prev, ship_pos, pickup.pos, pickup.pos, pickup_hit_radius):
-                    if pickup.kind == "boost_canister":
-                        continue
-                    if pickup.kind == "shield":
-                        shield_stock += 3
-                    elif pickup.kind == "spread":
-                        spread_stock += 3
-                    elif pickup.kind == "mine":
-                        mine_stock += 3
-                    elif pickup.kind == "boost":
-                        boost_stock += 3
-                    else:
-                        rapid_stock += 3
-                    pickups.remove(pickup)
-                    break
+                    game_actions.append(action)
 
-            for bullet in enemy_bullets[:]:
-                bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
-                bullet_radius = bullet.get("radius", 2)
-                if moving_circle_hit(bullet_prev, bullet["pos"], ship_prev, ship_pos, SHIP_RADIUS + bullet_radius + 2):
-                    enemy_bullets.remove(bullet)
-                    enemy_bullet_pool.append(bullet)
-                    if shield_time <= 0:
-                        play_explode_sound(ship_pos)
-                        lives -= 1
-                        last_death_cause = "enemy bullet"
-                        ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                        ship_vel = pygame.Vector2(0, 0)
-                        shield_time = 10.0
-                        shield_size_mult = 3.0
-                        rapid_time = 0.0
-                        spread_time = 0.0
-                        boost_time = 0.0
-                        if lives <= 0:
-                            game_over = True
-                    break
-
-            for bullet in enemy_bullets[:]:
-                bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
-                hit = None
-                for asteroid in asteroids:
-                    asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
-                    radius = asteroid.radius + BULLET_HIT_SLOP
-                    if moving_circle_hit(bullet_prev, bullet["pos"], asteroid_prev, asteroid.pos, radius):
-                        hit = asteroid
-                        break
-                if hit:
-                    enemy_bullets.remove(bullet)
-                    enemy_bullet_pool.append(bullet)
-                    asteroids.remove(hit)
-                    if hit.size > 1:
-                        play_asteroid_explode_sound()
-                        rng = random.Random(seed + int(hit.pos.x) + int(hit.pos.y))
-                        for _ in range(2):
-                            child = spawn_asteroid(rng, hit.size - 1, avoid_center=False)
-                            child.pos = pygame.Vector2(hit.pos)
-                            child.vel = hit.vel.rotate(rng.uniform(-50, 50)) * 1.2
-                            asteroids.append(child)
-
-            for enemy in enemies:
-                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-                enemy_prev = prev_pos(enemy.pos, enemy.vel, dt)
-                hit_radius = enemy_radius + SHIP_RADIUS
-                if moving_circle_hit(enemy_prev, enemy.pos, ship_prev, ship_pos, hit_radius):
-                    if shield_time <= 0:
-                        play_explode_sound(ship_pos)
-                        lives -= 1
-                        last_death_cause = "enemy ship"
-                        ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                        ship_vel = pygame.Vector2(0, 0)
-                        shield_time = 10.0
-                        shield_size_mult = 3.0
-                        rapid_time = 0.0
-                        spread_time = 0.0
-                        boost_time = 0.0
-                        if lives <= 0:
-                            game_over = True
-                    break
-
-            if boss:
-                boss_prev = prev_pos(boss.pos, boss.vel, dt)
-                hit_radius = BOSS_RADIUS + SHIP_RADIUS
-                if moving_circle_hit(boss_prev, boss.pos, ship_prev, ship_pos, hit_radius):
-                    if shield_time <= 0:
-                        play_explode_sound(ship_pos)
-                        lives -= 1
-                        last_death_cause = "boss ship"
-                        ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                        ship_vel = pygame.Vector2(0, 0)
-                        shield_time = 10.0
-                        shield_size_mult = 3.0
-                        rapid_time = 0.0
-                        spread_time = 0.0
-                        boost_time = 0.0
-                        if lives <= 0:
-                            game_over = True
-
-            for asteroid in asteroids[:]:
-                asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
-                hit_radius = asteroid.radius + SHIP_RADIUS
-                if moving_circle_hit(ship_prev, ship_pos, asteroid_prev, asteroid.pos, hit_radius):
-                    if shield_time <= 0:
-                        play_explode_sound(ship_pos)
-                        lives -= 1
-                        last_death_cause = "asteroid"
-                        ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                        ship_vel = pygame.Vector2(0, 0)
-                        shield_time = 10.0
-                        shield_size_mult = 3.0
-                        rapid_time = 0.0
-                        spread_time = 0.0
-                        boost_time = 0.0
-                        if lives <= 0:
-                            game_over = True
-                    break
-
-            for bullet in bullets[:]:
-                if boss:
-                    bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
-                    boss_prev = prev_pos(boss.pos, boss.vel, dt)
-                    radius = BOSS_RADIUS + BULLET_HIT_SLOP
-                    if moving_circle_hit(bullet_prev, bullet["pos"], boss_prev, boss.pos, radius):
-                        bullets.remove(bullet)
-                        bullet_pool.append(bullet)
-                        if not escorts_alive:
-                            boss.hp = max(0, boss.hp - BOSS_HIT_DAMAGE)
-                            score += BOSS_HIT_DAMAGE
-                            spawn_damage_popup(
-                                damage_popups,
-                                damage_popup_pool,
-                                popup_font,
-                                str(BOSS_HIT_DAMAGE),
-                                boss.pos,
-                                COLORS["boss"],
-                            )
-                            if boss.hp <= 0:
-                                play_explode_sound(boss.pos)
-                                score += BOSS_SCORE_BONUS
-                                for _ in range(6):
-                                    spawn_enemy_shards(
-                                        enemy_shards, enemy_shard_pool, boss.pos, boss.angle, COLORS["boss"]
-                                    )
-                                boss_defeated = True
-                                boss = None
-                        continue
-                hit_enemy = None
-                for enemy in enemies:
-                    enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-                    enemy_prev = prev_pos(enemy.pos, enemy.vel, dt)
-                    bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
-                    radius = enemy_radius + BULLET_HIT_SLOP
-                    if moving_circle_hit(bullet_prev, bullet["pos"], enemy_prev, enemy.pos, radius):
-                        hit_enemy = enemy
-                        break
-                if hit_enemy:
-                    bullets.remove(bullet)
-                    bullet_pool.append(bullet)
-                    if hit_enemy.escort:
-                        escorts_alerted = True
-                    if hit_enemy.shield > 0:
-                        hit_enemy.shield -= 1
-                        score += 20
-                        if hit_enemy.escort:
-                            hit_color = COLORS["boss_shield"]
-                        else:
-                            hit_color = COLORS["elite_enemy"] if hit_enemy.elite else COLORS["enemy_shield"]
-                        spawn_damage_popup(
-                            damage_popups,
-                            damage_popup_pool,
-                            popup_font,
-                            "20",
-                            hit_enemy.pos,
-                            hit_color,
-                        )
-                    else:
-                        enemies_destroyed += 1
-                        remove_enemy(enemies, hit_enemy, boss_escorts)
-                        play_explode_sound(hit_enemy.pos)
-                        score += 80 + (ELITE_ENEMY_SCORE_BONUS if hit_enemy.elite else 0)
-                        shard_color = COLORS["elite_enemy"] if hit_enemy.elite else COLORS["enemy"]
-                        spawn_enemy_shards(enemy_shards, enemy_shard_pool, hit_enemy.pos, hit_enemy.angle, shard_color)
-                        spawn_damage_popup(
-                            damage_popups,
-                            damage_popup_pool,
-                            popup_font,
-                            "80",
-                            hit_enemy.pos,
-                            COLORS["elite_enemy"] if hit_enemy.elite else COLORS["enemy"],
-                        )
-                    continue
+            keys = pygame.key.get_pressed()
+            controls = read_controls(keys, joystick)
+            paused = show_map or show_objectives
 
-                hit_canister = None
-                for pickup in pickups:
-                    if pickup.kind != "boost_canister":
-                        continue
-                    bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
-                    radius = CANISTER_RADIUS + BULLET_HIT_SLOP
-                    if moving_circle_hit(bullet_prev, bullet["pos"], pickup.pos, pickup.pos, radius):
-                        hit_canister = pickup
+            if sim:
+                # World actions are dropped while an overlay is open, exactly
+                # as the single-process loop never reaches them there.
+                push_input(
+                    sim, controls, game_actions if paused else game_actions + world_actions, paused, governor.level, CAMERA_ZOOM
+                )
+                while True:
+                    try:
+                        message = sim.events.get_nowait()
+                    except queue.Empty:
                         break
-                if hit_canister:
-                    bullets.remove(bullet)
-                    bullet_pool.append(bullet)
-                    hit_canister.shell_hp = max(0, hit_canister.shell_hp - 1)
-                    if hit_canister.shell_hp <= 0:
-                        hit_canister.kind = "boost"
-                        hit_canister.shell_hp = 0
-                        spawn_damage_popup(
-                            damage_popups,
-                            damage_popup_pool,
-                            popup_font,
-                            "BOOST",
-                            hit_canister.pos,
-                            COLORS["pickup_boost"],
-                        )
+                    if message[0] == "shape":
+                        ASTEROID_SHAPE_CACHE[message[1]] = message[2]
                     else:
-                        spawn_damage_popup(
-                            damage_popups,
-                            damage_popup_pool,
-                            popup_font,
-                            "1",
-                            hit_canister.pos,
-                            COLORS["pickup_canister"],
-                        )
-                    continue
-
-                hit = None
-                for asteroid in asteroids:
-                    asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
-                    bullet_prev = prev_pos(bullet["pos"], bullet["vel"], dt)
-                    radius = asteroid.radius + BULLET_HIT_SLOP
-                    if moving_circle_hit(bullet_prev, bullet["pos"], asteroid_prev, asteroid.pos, radius):
-                        hit = asteroid
-                        break
-                if hit:
-                    bullets.remove(bullet)
-                    bullet_pool.append(bullet)
-                    asteroids.remove(hit)
-                    score += 10 * (5 - hit.size)
-                    spawn_damage_popup(
-                        damage_popups,
-                        damage_popup_pool,
-                        popup_font,
-                        str(10 * (5 - hit.size)),
-                        hit.pos,
-                        COLORS["bullet"],
-                    )
-                    if hit.size > 1:
-                        play_asteroid_explode_sound()
-                        rng = random.Random(seed + score + int(hit.pos.x))
-                        for _ in range(2):
-                            child = spawn_asteroid(rng, hit.size - 1, avoid_center=False)
-                            child.pos = pygame.Vector2(hit.pos)
-                            child.vel = hit.vel.rotate(rng.uniform(-50, 50)) * 1.2
-                            asteroids.append(child)
-                    break
+                        state.sound_events.extend(message[1])
+                header, records = read_snapshot(sim.snapshot_control, sim.snapshot_data)
+                if header and int(header["frame"]) != sim.frame:
+                    sim.frame = int(header["frame"])
+                    sim.sim_ms = header["sim_ms"]
+                    if int(header["seed"]) != state.seed:
+                        state.seed = int(header["seed"])
+                        state.landmarks = generate_landmarks(state.seed)
+                        landmarks_by_id = {landmark.id: landmark for landmark in state.landmarks}
+                        WORLD_GEN_STATS.placement = landmark_placement(state.landmarks)
+                        state.beacons = {}
+                        stars = generate_starfield(state.seed)
+                    apply_snapshot(state, header, records, landmarks_by_id)
+                    overlay_dirty = True
+                if not sim.process.is_alive():
+                    running = False
+            else:
+                for action in game_actions:
+                    apply_game_action(state, action)
 
-            for mine in mines[:]:
-                mine["ttl"] -= dt
-                if mine["ttl"] <= 0:
-                    mines.remove(mine)
+            if show_map:
+                if not overlay_dirty:
+                    if running:
+                        wait_for_input(clock, input_latency, idle_wait_ms)
                     continue
-                trigger_enemy = None
-                for enemy in enemies:
-                    enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-                    if (enemy.pos - mine["pos"]).length() <= enemy_radius + MINE_RADIUS:
-                        trigger_enemy = enemy
-                        break
-                trigger_boss = False
-                if not trigger_enemy and boss and not escorts_alive:
-                    if (boss.pos - mine["pos"]).length() <= BOSS_RADIUS + MINE_RADIUS:
-                        trigger_boss = True
-                if not trigger_enemy and not trigger_boss:
+                draw_map_screen(screen, map_layer, state, font)
+                present_frame(input_latency, capture)
+                overlay_dirty = False
+                continue
+            if show_objectives:
+                if not overlay_dirty:
+                    if running:
+                        wait_for_input(clock, input_latency, idle_wait_ms)
                     continue
+                draw_objectives_screen(screen, state, font)
+                present_frame(input_latency, capture)
+                overlay_dirty = False
+                continue
 
-                mines.remove(mine)
-                to_kill = [trigger_enemy] if trigger_enemy else []
-                for enemy in enemies:
-                    if enemy is trigger_enemy:
-                        continue
-                    if (enemy.pos - mine["pos"]).length() <= MINE_BLAST_RADIUS:
-                        to_kill.append(enemy)
-                for enemy in to_kill:
-                    if enemy in enemies:
-                        enemies_destroyed += 1
-                        remove_enemy(enemies, enemy, boss_escorts)
-                        play_explode_sound(enemy.pos)
-                        score += 80 + (ELITE_ENEMY_SCORE_BONUS if enemy.elite else 0)
-                        shard_color = COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"]
-                        spawn_enemy_shards(enemy_shards, enemy_shard_pool, enemy.pos, enemy.angle, shard_color)
-                        spawn_damage_popup(
-                            damage_popups,
-                            damage_popup_pool,
-                            popup_font,
-                            "80",
-                            enemy.pos,
-                            COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"],
-                        )
-                if boss and not escorts_alive and boss is not None:
-                    if (boss.pos - mine["pos"]).length() <= MINE_BLAST_RADIUS + BOSS_RADIUS:
-                        boss.hp = max(0, boss.hp - BOSS_HIT_DAMAGE)
-                        score += BOSS_HIT_DAMAGE
-                        spawn_damage_popup(
-                            damage_popups,
-                            damage_popup_pool,
-                            popup_font,
-                            str(BOSS_HIT_DAMAGE),
-                            boss.pos,
-                            COLORS["boss"],
-                        )
-                        if boss.hp <= 0:
-                            play_explode_sound(boss.pos)
-                            score += BOSS_SCORE_BONUS
-                            for _ in range(6):
-                                spawn_enemy_shards(
-                                    enemy_shards, enemy_shard_pool, boss.pos, boss.angle, COLORS["boss"]
-                                )
-                            boss_defeated = True
-                            boss = None
-
-            for enemy in enemies[:]:
-                if enemy.shield > 0:
+            if not sim:
+                prefetch = refresh_prefetch(prefetcher, prefetch)
+                for action in world_actions:
+                    if action == "new_seed":
+                        stars, prefetch = swap_world(state, prefetcher, prefetch)
+                    elif action == "save":
+                        save_state(build_save_state(state))
+                    elif action == "load":
+                        data = load_state()
+                        if data:
+                            stars = load_world(state, data)
+
+            if state.game_over:
+                # The world stays frozen behind the game over screen; only redraw
+                # it (with zero dt) when input could have changed what is shown.
+                if not overlay_dirty:
+                    if running:
+                        wait_for_input(clock, input_latency, idle_wait_ms)
                     continue
-                enemy_radius = ENEMY_RADIUS * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-                enemy_prev = prev_pos(enemy.pos, enemy.vel, dt)
-                for asteroid in asteroids:
-                    asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
-                    hit_radius = asteroid.radius + enemy_radius
-                    if moving_circle_hit(enemy_prev, enemy.pos, asteroid_prev, asteroid.pos, hit_radius):
-                        remove_enemy(enemies, enemy, boss_escorts)
-                        play_explode_sound(enemy.pos)
-                        score += 100
-                        break
-
-            for landmark in landmarks:
-                hit_radius = landmark.radius + SHIP_RADIUS
-                if moving_circle_hit(ship_prev, ship_pos, landmark.pos, landmark.pos, hit_radius):
-                    if shield_time <= 0:
-                        play_explode_sound(ship_pos)
-                        lives -= 1
-                        if landmark.kind == "moon":
-                            last_death_cause = "moon"
-                        else:
-                            last_death_cause = "planet"
-                        ship_pos = pygame.Vector2(WORLD_WIDTH / 2, WORLD_HEIGHT / 2)
-                        ship_vel = pygame.Vector2(0, 0)
-                        shield_time = 10.0
-                        shield_size_mult = 3.0
-                        rapid_time = 0.0
-                        spread_time = 0.0
-                        boost_time = 0.0
-                        if lives <= 0:
-                            game_over = True
-                    break
-
-        if not asteroids:
-            rng = random.Random(seed + score)
-            for _ in range(120):
-                size = 4 if rng.random() < 0.12 else 3
-                asteroids.append(spawn_asteroid(rng, size))
-
-        for asteroid in asteroids[:]:
-            for landmark in landmarks:
-                asteroid_prev = prev_pos(asteroid.pos, asteroid.vel, dt)
-                hit_radius = asteroid.radius + landmark.radius
-                if moving_circle_hit(asteroid_prev, asteroid.pos, landmark.pos, landmark.pos, hit_radius):
-                    asteroids.remove(asteroid)
-                    if asteroid.size > 1:
-                        rng = random.Random(seed + int(asteroid.pos.x) + int(asteroid.pos.y))
-                        for _ in range(2):
-                            child = spawn_asteroid(rng, asteroid.size - 1, avoid_center=False)
-                            child.pos = pygame.Vector2(asteroid.pos)
-                            child.vel = asteroid.vel.rotate(rng.uniform(-60, 60)) * 1.2
-                            asteroids.append(child)
-                    break
-
-        screen.fill(COLORS["bg"])
-
-        # Debug: universe bounds
-        top_left = world_to_screen(pygame.Vector2(0, 0), ship_pos)
-        bottom_right = world_to_screen(pygame.Vector2(WORLD_WIDTH, WORLD_HEIGHT), ship_pos)
-        rect_left = min(top_left.x, bottom_right.x)
-        rect_top = min(top_left.y, bottom_right.y)
-        rect_w = abs(bottom_right.x - top_left.x)
-        rect_h = abs(bottom_right.y - top_left.y)
-        pygame.draw.rect(
-            screen,
-            COLORS["warning"],
-            pygame.Rect(rect_left, rect_top, rect_w, rect_h),
-            4,
-        )
-
-        star_surface = stars["surface"]
-        tile_w = stars["width"]
-        tile_h = stars["height"]
-        offset_x = int((-ship_pos.x * STAR_PARALLAX) % tile_w)
-        offset_y = int((-ship_pos.y * STAR_PARALLAX) % tile_h)
-        for draw_x in (offset_x - tile_w, offset_x):
-            for draw_y in (offset_y - tile_h, offset_y):
-                screen.blit(star_surface, (draw_x, draw_y))
-
-        for landmark in landmarks:
-            screen_pos = world_to_screen(landmark.pos, ship_pos)
-            draw_radius = landmark.radius * CAMERA_ZOOM
-            pygame.draw.circle(
-                screen,
-                landmark.color,
-                (int(screen_pos.x), int(screen_pos.y)),
-                max(1, int(draw_radius)),
-                2,
-            )
-            if landmark.kind == "planet":
-                on_screen = (
-                    -draw_radius <= screen_pos.x <= WIDTH + draw_radius
-                    and -draw_radius <= screen_pos.y <= HEIGHT + draw_radius
-                )
-                if on_screen:
-                    if landmark.id not in beacons:
-                        rng = random.Random(seed + landmark.id * 7919)
-                        offset = pygame.Vector2(
-                            rng.uniform(landmark.radius + BEACON_OFFSET_MIN, landmark.radius + BEACON_OFFSET_MAX), 0
-                        ).rotate(rng.uniform(0, 360))
-                        beacon_pos = clamp_position(landmark.pos + offset)
-                        beacons[landmark.id] = {
-                            "pos": beacon_pos,
-                            "code": make_beacon_id(rng),
-                        }
-                    if landmark.id not in discovered_planets:
-                        play_discover_sound(landmark.pos)
-                    discovered_planets.add(landmark.id)
-
-        for planet_id, beacon in beacons.items():
-            screen_pos = world_to_screen(beacon["pos"], ship_pos)
-            draw_beacon(screen, screen_pos, COLORS["pickup_shield"])
-            label = font.render(beacon["code"], True, COLORS["ui"])
-            screen.blit(label, (screen_pos.x + 18, screen_pos.y - 10))
-
-        for asteroid in asteroids:
-            screen_pos = world_to_screen(asteroid.pos, ship_pos)
-            draw_radius = asteroid.radius * CAMERA_ZOOM
-            draw_vector_shape(screen, screen_pos, asteroid.angle, asteroid.shape, COLORS["asteroid"], 2)
-
-        for bullet in bullets:
-            screen_pos = world_to_screen(bullet["pos"], ship_pos)
-            bullet_radius = max(1, int(2 * CAMERA_ZOOM))
-            pygame.draw.circle(
-                screen,
-                COLORS["bullet"],
-                (int(screen_pos.x), int(screen_pos.y)),
-                bullet_radius,
-                1,
-            )
-
-        for bullet in enemy_bullets:
-            screen_pos = world_to_screen(bullet["pos"], ship_pos)
-            bullet_radius = max(1, int(bullet.get("radius", 2) * CAMERA_ZOOM))
-            pygame.draw.circle(
-                screen,
-                COLORS["enemy"],
-                (int(screen_pos.x), int(screen_pos.y)),
-                bullet_radius,
-                1,
-            )
-
-        for mine in mines:
-            screen_pos = world_to_screen(mine["pos"], ship_pos)
-            draw_mine(
-                screen,
-                screen_pos,
-                max(2, int(MINE_RADIUS * CAMERA_ZOOM)),
-                COLORS["pickup_mine"],
-                COLORS["mine_core"],
-            )
-
-        if boss:
-            screen_pos = world_to_screen(boss.pos, ship_pos)
-            if escorts_alive:
-                shield_radius = (BOSS_RADIUS + 16) * CAMERA_ZOOM
-                pygame.draw.circle(
-                    screen,
-                    COLORS["boss_shield"],
-                    (int(screen_pos.x), int(screen_pos.y)),
-                    max(1, int(shield_radius)),
-                    2,
-                )
-            if boss.vel.length_squared() > 0:
-                draw_thruster(
-                    screen,
-                    screen_pos,
-                    boss.angle,
-                    COLORS["pickup_rapid"],
-                    2.2,
-                    3.0,
-                )
-            draw_boss(screen, screen_pos, boss.angle, COLORS["boss"], BOSS_SCALE)
+                dt = 0.0
 
-        for enemy in enemies:
-            screen_pos = world_to_screen(enemy.pos, ship_pos)
-            if enemy.shield > 0:
-                shield_mult = ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0
-                if not enemy.elite and not enemy.escort:
-                    shield_radius = (SHIP_RADIUS + 10) * CAMERA_ZOOM
-                else:
-                    shield_radius = (ENEMY_RADIUS + 8) * CAMERA_ZOOM * shield_mult
-                pygame.draw.circle(
-                    screen,
-                    COLORS["boss_shield"] if enemy.escort else (COLORS["elite_enemy_shield"] if enemy.elite else COLORS["enemy_shield"]),
-                    (int(screen_pos.x), int(screen_pos.y)),
-                    max(1, int(shield_radius)),
-                    2 if enemy.elite or enemy.escort else 1,
-                )
-            if enemy.pursuing:
-                back_mult = 2.0 * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0)
-                draw_thruster(
-                    screen,
-                    screen_pos,
-                    enemy.angle,
-                    COLORS["elite_enemy"] if enemy.elite else COLORS["enemy"],
-                    0.7 * (ELITE_ENEMY_SIZE_MULT if enemy.elite else 1.0),
-                    back_mult,
-                )
-            if enemy.elite:
-                draw_ship(screen, screen_pos, enemy.angle, COLORS["elite_enemy"], ELITE_ENEMY_SIZE_MULT)
-            else:
-                draw_ship(screen, screen_pos, enemy.angle, COLORS["enemy"])
-
-        for freighter in freighters:
-            screen_pos = world_to_screen(freighter["pos"], ship_pos)
-            shield_radius = (FREIGHTER_RADIUS + 14) * CAMERA_ZOOM
-            pygame.draw.circle(
-                screen,
-                COLORS["freighter_shield"],
-                (int(screen_pos.x), int(screen_pos.y)),
-                max(1, int(shield_radius)),
-                1,
-            )
-            draw_thruster(screen, screen_pos, freighter["angle"], COLORS["pickup_rapid"], 0.9, 2.8)
-            draw_freighter(screen, screen_pos, freighter["angle"], COLORS["freighter"])
-
-        for pickup in pickups:
-            screen_pos = world_to_screen(pickup.pos, ship_pos)
-            if pickup.kind == "boost_canister":
-                shell_radius = max(2, int(CANISTER_RADIUS * CAMERA_ZOOM))
-                core_radius = max(1, int((PICKUP_RADIUS * 0.45) * CAMERA_ZOOM))
-                shell_rect = pygame.Rect(0, 0, shell_radius * 2, shell_radius * 2)
-                shell_rect.center = (int(screen_pos.x), int(screen_pos.y))
-                core_rect = pygame.Rect(0, 0, core_radius * 2, core_radius * 2)
-                core_rect.center = (int(screen_pos.x), int(screen_pos.y))
-                pygame.draw.rect(screen, COLORS["pickup_canister"], shell_rect, 2)
-                pygame.draw.rect(screen, COLORS["pickup_canister"], core_rect, 1)
-                continue
+            if not sim:
+                step_game(state, controls, dt, quality)
+            for name, volume in state.sound_events:
+                sound_players[name](volume)
+            state.sound_events.clear()
 
-            if pickup.kind == "shield":
-                color = COLORS["pickup_shield"]
-            elif pickup.kind == "spread":
-                color = COLORS["pickup_spread"]
-            elif pickup.kind == "mine":
-                color = COLORS["pickup_mine"]
-            elif pickup.kind == "boost":
-                color = COLORS["pickup_boost"]
+            if world_surface:
+                drawn, culled = draw_world(world_surface, state, stars, quality, display)
+                pygame.transform.scale(world_surface, screen.get_size(), screen)
             else:
-                color = COLORS["pickup_rapid"]
-            pickup_radius = max(2, int(PICKUP_RADIUS * CAMERA_ZOOM))
-            core_radius = max(1, int((PICKUP_RADIUS * 0.25) * CAMERA_ZOOM))
-            pygame.draw.circle(screen, color, (int(screen_pos.x), int(screen_pos.y)), pickup_radius, 2)
-            pygame.draw.circle(screen, color, (int(screen_pos.x), int(screen_pos.y)), core_radius, 0)
-
-        if shield_time > 0 and not game_over:
-            shield_screen_pos = pygame.Vector2(WIDTH / 2, HEIGHT / 2)
-            shield_radius = (SHIP_RADIUS * CAMERA_ZOOM + 10 * CAMERA_ZOOM) * shield_size_mult * 1.2
-            pygame.draw.circle(
-                screen,
-                COLORS["god_shield"] if god_mode else COLORS["pickup_shield"],
-                (int(shield_screen_pos.x), int(shield_screen_pos.y)),
-                max(1, int(shield_radius)),
-                1,
-            )
-
-        for popup in damage_popups:
-            screen_pos = world_to_screen(popup["pos"], ship_pos)
-            alpha = int(255 * (popup["ttl"] / DAMAGE_POPUP_TTL))
-            surface = popup["surface"]
-            surface.set_alpha(max(0, min(255, alpha)))
-            screen.blit(surface, (screen_pos.x - surface.get_width() / 2, screen_pos.y - surface.get_height() / 2))
-
-        for shard in enemy_shards:
-            alpha = shard["ttl"] / ENEMY_SHARD_TTL
-            color = scale_color(shard.get("color", COLORS["enemy"]), alpha)
-            start = world_to_screen(shard["start"], ship_pos)
-            end = world_to_screen(shard["end"], ship_pos)
-            pygame.draw.line(screen, color, start, end, 2)
-
-        ship_color = COLORS["warning"] if game_over else COLORS["ship"]
-        if thrusting_render and not game_over:
-            thruster_scale = 2.0 if boost_time > 0 else 1.0
-            draw_thruster(
-                screen,
-                pygame.Vector2(WIDTH / 2, HEIGHT / 2),
-                ship_angle,
-                COLORS["pickup_rapid"],
-                thruster_scale,
-            )
-        if stop_thruster_timer > 0 and not game_over:
-            alpha = stop_thruster_timer / STOP_THRUSTER_TTL
-            draw_stop_thruster(
-                screen,
-                pygame.Vector2(WIDTH / 2, HEIGHT / 2),
-                ship_angle,
-                scale_color(COLORS["pickup_boost"], alpha),
-                stop_thruster_side,
-            )
-        if (strafe_left or strafe_right) and not game_over:
-            strafe_side = "right" if strafe_left and not strafe_right else "left"
-            draw_stop_thruster(
-                screen,
-                pygame.Vector2(WIDTH / 2, HEIGHT / 2),
-                ship_angle,
-                scale_color(COLORS["pickup_boost"], 0.7),
-                strafe_side,
-            )
-        draw_ship(screen, pygame.Vector2(WIDTH / 2, HEIGHT / 2), ship_angle, ship_color)
+                drawn, culled = draw_world(screen, state, stars, quality, display)
+            text_drawn, text_culled = draw_world_text(screen, state, fonts)
+            drawn += text_drawn
+            culled += text_culled
 
-        ui_pickups = [
-            ("shield", COLORS["god_shield"] if god_mode else COLORS["pickup_shield"], shield_stock, shield_time, "1"),
-            ("boost", COLORS["pickup_boost"], boost_stock, boost_time, "2"),
-            ("spread", COLORS["pickup_spread"], spread_stock, spread_time, "3"),
-            ("mine", COLORS["pickup_mine"], mine_stock, 0.0, "4"),
-        ]
-        start_x = WIDTH / 2 - UI_PICKUP_SPACING * ((len(ui_pickups) - 1) / 2)
-        for index, (kind, color, count, timer, key_label) in enumerate(ui_pickups):
-            center = pygame.Vector2(start_x + index * UI_PICKUP_SPACING, UI_PICKUP_TOP_Y)
-            active = count > 0 or timer > 0
-            draw_color = color if active else scale_color(color, 0.35)
-            pickup_radius = UI_PICKUP_RADIUS
-            core_radius = max(2, int(pickup_radius * 0.4))
-            pygame.draw.circle(screen, draw_color, (int(center.x), int(center.y)), pickup_radius, 2)
-            pygame.draw.circle(screen, draw_color, (int(center.x), int(center.y)), core_radius, 0)
-
-            count_text = str(count)
-            count_surface = font.render(count_text, True, COLORS["ui"])
-            screen.blit(
-                count_surface,
-                (center.x + pickup_radius + 8, center.y - count_surface.get_height() / 2),
-            )
+            gamepad_lines = []
+            status_lines = []
             if show_gamepad_debug:
-                key_surface = debug_font.render(key_label, True, COLORS["ui"])
-                screen.blit(
-                    key_surface,
-                    (center.x - key_surface.get_width() / 2, center.y - pickup_radius - 18),
-                )
-            if timer > 0:
-                timer_text = f"{timer:.1f}s"
-                timer_surface = debug_font.render(timer_text, True, COLORS["ui"])
-                screen.blit(
-                    timer_surface,
-                    (center.x - timer_surface.get_width() / 2, center.y + pickup_radius + 6),
-                )
-
-        nearest_planet = None
-        nearest_dist_sq = None
-        for landmark in landmarks:
-            if landmark.kind != "planet":
-                continue
-            if landmark.id not in discovered_planets:
-                continue
-            delta = landmark.pos - ship_pos
-            dist_sq = delta.length_squared()
-            if nearest_dist_sq is None or dist_sq < nearest_dist_sq:
-                nearest_dist_sq = dist_sq
-                nearest_planet = delta
-        if nearest_planet is not None:
-            draw_edge_arrow(screen, nearest_planet, COLORS["planet"])
-
-        if show_gamepad_debug:
-            ram_mb = get_process_ram_mb()
-            lines = [
-                f"Gamepad: {joy_name}",
-                f"Axes: {joy_axes}  Buttons: {joy_buttons}  Hats: {joy_hats}",
-            ]
-            if ram_mb is not None:
-                lines.append(f"RAM: {ram_mb:.1f} MB")
-            if joystick:
-                if joy_hats > 0:
-                    lines.append(f"Hat0: {joystick.get_hat(0)}")
-                if joy_buttons > 0:
-                    pressed = [str(i) for i in range(joy_buttons) if joystick.get_button(i)]
-                    lines.append(f"Pressed: {' '.join(pressed) if pressed else '-'}")
-                if joy_axes > 0:
-                    axes = " ".join(f"{i}:{joystick.get_axis(i):.2f}" for i in range(min(8, joy_axes)))
-                    lines.append(f"Axes: {axes}")
-            for i, line in enumerate(lines):
-                text = debug_font.render(line, True, COLORS["ui"])
-                screen.blit(text, (10, HEIGHT - 120 + i * 18))
-
-        lives_text = font.render(f"Lives: {lives}", True, COLORS["ui"])
-        screen.blit(lives_text, (10, 10))
-
-        score_text = font.render(f"Score: {score}", True, COLORS["ui"])
-        screen.blit(score_text, (WIDTH - score_text.get_width() - 10, 10))
-
-        if show_gamepad_debug:
-            ram_mb = get_process_ram_mb()
-            hud = [
-                f"Seed: {seed}",
-                f"Shield: {shield_time:.1f}s" if shield_time > 0 else "Shield: -",
-                f"Shield Stock: {shield_stock}",
-                f"Spread: {spread_time:.1f}s" if spread_time > 0 else "Spread: -",
-                f"Spread Stock: {spread_stock}",
-                f"Mine Stock: {mine_stock}",
-                f"Boost: {boost_time:.1f}s" if boost_time > 0 else "Boost: -",
-                f"Boost Stock: {boost_stock}",
-            ]
-            hud.append(f"RAM: {ram_mb:.1f} MB" if ram_mb is not None else "RAM: n/a")
-            hud.append(f"Last Death: {last_death_cause}" if last_death_cause else "Last Death: -")
-            for i, line in enumerate(hud):
-                text = font.render(line, True, COLORS["ui"])
-                screen.blit(text, (10, 10 + (i + 1) * 20))
-
-        if show_gamepad_debug:
-            help_text = "Arrows/WASD move  Q/E strafe  LShift stop  L-stick aim  R1 thrust  L1 brake  Space shoot  1 shield  2 boost  3 spread  4 mine  M map  O objectives  F5 save  F6 load  F2 god shield  N new seed"
-            text = font.render(help_text, True, COLORS["ui"])
-            screen.blit(text, (10, HEIGHT - 28))
-
-        if game_over:
-            title = "Game Over"
-            reason = f"{(last_death_cause or 'Unknown').title()} Killed You"
-            prompt = "Press N key for New Map"
-            title_surface = game_over_font_big.render(title, True, COLORS["warning"])
-            reason_surface = game_over_font_med.render(reason, True, COLORS["warning"])
-            prompt_surface = game_over_font_small.render(prompt, True, COLORS["warning"])
-            total_h = title_surface.get_height() + reason_surface.get_height() + prompt_surface.get_height() + 18
-            start_y = HEIGHT / 2 - total_h / 2
-            screen.blit(title_surface, (WIDTH / 2 - title_surface.get_width() / 2, start_y))
-            screen.blit(
-                reason_surface,
-                (WIDTH / 2 - reason_surface.get_width() / 2, start_y + title_surface.get_height() + 8),
-            )
-            screen.blit(
-                prompt_surface,
-                (
-                    WIDTH / 2 - prompt_surface.get_width() / 2,
-                    start_y + title_surface.get_height() + reason_surface.get_height() + 16,
-                ),
-            )
-
-        pygame.display.flip()
+                ram_mb = get_process_ram_mb()
+                gamepad_lines = [
+                    f"Gamepad: {joy_name}",
+                    f"Axes: {joy_axes}  Buttons: {joy_buttons}  Hats: {joy_hats}",
+                ]
+                if ram_mb is not None:
+                    gamepad_lines.append(f"RAM: {ram_mb:.1f} MB")
+                if joystick:
+                    if joy_hats > 0:
+                        gamepad_lines.append(f"Hat0: {joystick.get_hat(0)}")
+                    if joy_buttons > 0:
+                        pressed = [str(i) for i in range(joy_buttons) if joystick.get_button(i)]
+                        gamepad_lines.append(f"Pressed: {' '.join(pressed) if pressed else '-'}")
+                    if joy_axes > 0:
+                        axes = " ".join(f"{i}:{joystick.get_axis(i):.2f}" for i in range(min(8, joy_axes)))
+                        gamepad_lines.append(f"Axes: {axes}")
+                status_lines = [
+                    f"Quality: L{governor.level} {'pinned' if governor.pinned else 'auto'}"
+                    f"  Frame: {governor.frame_ms:.1f}/{1000.0 / FPS:.1f} ms",
+                    f"Degraded: {describe_quality(quality)}",
+                    f"Input Latency: {input_latency.last_ms:.1f} ms"
+                    f"  avg {input_latency.avg_ms:.1f}  max {input_latency.max_ms:.1f}",
+                    f"Culling: drawn {drawn}  culled {culled}",
+                    describe_text_cache(),
+                    describe_display_list(display),
+                    describe_impostor_cache(),
+                    describe_nebula(),
+                    f"HUD: {hud.ms:.2f} ms ({100.0 * hud.ms / (1000.0 / FPS):.1f}% of frame budget)  redraws {hud.redraws}",
+                ]
+                status_lines.append(f"Zoom: {CAMERA_ZOOM_LEVELS[zoom_level]:.2f}  level {zoom_level}")
+                if world_surface:
+                    status_lines.append(f"Render Scale: {RENDER_SCALE:.0%}  world {WIDTH}x{HEIGHT}")
+                if not sim:
+                    status_lines.append(describe_world_gen())
+                    if USE_WORLD_CACHE:
+                        status_lines.append(describe_world_cache())
+                if state.universe:
+                    status_lines.append(describe_universe(state.universe))
+                if capture:
+                    status_lines.append(describe_capture(capture))
+                if sim:
+                    status_lines.append(f"Sim Process: step {sim.sim_ms:.2f} ms  frame {sim.frame}")
+            draw_hud(screen, hud, state, fonts, show_gamepad_debug, gamepad_lines, status_lines)
+
+            present_frame(input_latency, capture)
+            overlay_dirty = False
+            if update_quality(governor, (time.perf_counter() - frame_start) * 1000.0, dt):
+                quality = QUALITY_LEVELS[governor.level]
+    finally:
+        if sim:
+            stop_simulation(sim)
+        if capture:
+            stop_capture(capture)
+        if prefetcher:
+            prefetcher.shutdown(cancel_futures=True)
+        if WORLD_POOL:
+            WORLD_POOL.shutdown(cancel_futures=True)
 
     pygame.quit()
 
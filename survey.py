@@ -0,0 +1,136 @@
+import argparse
+import concurrent.futures
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+# Rows may go to stdout; keep pygame's banner, printed again by every
+# spawned worker on import, out of them.
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import main as game
+
+FIELDS = (
+    "seed",
+    "planets",
+    "planets_requested",
+    "moons",
+    "moons_requested",
+    "freighters",
+    "boss_start",
+    "elite_planets",
+    "elite_coverage",
+    "asteroids",
+    "pickups",
+    "gen_ms",
+)
+
+
+def survey_seed(seed):
+    # Every world generator except the starfield, which needs a display and
+    # says nothing about the layout; the order matches new_world's.
+    start = time.perf_counter()
+    asteroids = game.seed_asteroids(seed)
+    pickups = game.generate_pickups(seed)
+    landmarks = game.generate_landmarks(seed)
+    game.generate_enemies(seed, game.pygame.Vector2(game.WORLD_WIDTH / 2, game.WORLD_HEIGHT / 2), landmarks)
+    freighters = game.generate_freighters(seed, landmarks)
+    boss, _ = game.spawn_boss_with_escorts(seed)
+    gen_ms = (time.perf_counter() - start) * 1000.0
+    planets, planets_requested, moons, moons_requested = game.landmark_placement(landmarks)
+    elite_planets = sum(1 for l in landmarks if l.kind == "planet" and game.in_elite_band(l.pos.x))
+    return {
+        "seed": seed,
+        "planets": planets,
+        "planets_requested": planets_requested,
+        "moons": moons,
+        "moons_requested": moons_requested,
+        "freighters": len(freighters),
+        "boss_start": (boss.patrol_index - 1) % len(boss.patrol_points),
+        "elite_planets": elite_planets,
+        "elite_coverage": round(elite_planets / planets, 4) if planets else 0.0,
+        "asteroids": len(asteroids),
+        "pickups": len(pickups),
+        "gen_ms": round(gen_ms, 3),
+    }
+
+
+def write_rows(stream, rows, fmt):
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            stream.write(json.dumps(row) + "\n")
+    count = 0
+    for row in rows:
+        write(row)
+        count += 1
+    return count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Azteroidz seed survey: world statistics for a range of seeds, without a display")
+    parser.add_argument("--start", type=int, default=0, metavar="SEED", help="first seed to survey (default 0)")
+    parser.add_argument("--count", type=int, default=1000, metavar="N", help="number of consecutive seeds (default 1000)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="worker processes generating seeds (default: one per core)",
+    )
+    parser.add_argument("--chunk", type=int, default=16, metavar="N", help="seeds handed to a worker at a time (default 16)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--output", default="-", metavar="PATH", help="file to write the rows to (default: stdout)")
+    parser.add_argument("--planets", type=int, default=game.PLANET_COUNT, metavar="N", help="planets to place per seed (default 12)")
+    parser.add_argument(
+        "--moons-per-planet",
+        type=int,
+        default=game.MOONS_PER_PLANET,
+        metavar="N",
+        help="moons to place around each planet (default 1)",
+    )
+    args = parser.parse_args(argv)
+    if args.count < 1 or args.workers < 1 or args.chunk < 1:
+        parser.error("--count, --workers and --chunk must be at least 1")
+    if not 0 <= args.start or args.start + args.count - 1 > 0xFFFFFFFF:
+        parser.error("seeds must be between 0 and 4294967295")
+    if args.planets < 0 or args.moons_per_planet < 0:
+        parser.error("--planets and --moons-per-planet must not be negative")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    game.PLANET_COUNT = args.planets
+    game.MOONS_PER_PLANET = args.moons_per_planet
+    seeds = range(args.start, args.start + args.count)
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    start = time.perf_counter()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=game.apply_world_settings,
+            initargs=(game.world_settings(),),
+        ) as pool:
+            # map keeps seed order, so rows stream out as soon as the
+            # earliest outstanding chunk is done.
+            count = write_rows(stream, pool.map(survey_seed, seeds, chunksize=args.chunk), args.format)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{count} seeds in {elapsed:.2f} s, {count / elapsed:.1f} seeds/s on {args.workers} workers",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()